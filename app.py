@@ -1,25 +1,41 @@
-import cv2
-import mediapipe as mp
 import numpy as np
 import os
-import csv
 import json
 import time
 from flask import Flask, render_template, Response, jsonify, request, send_file
 from flask_cors import CORS
-from inference_sdk import InferenceHTTPClient
 import threading
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from datetime import datetime
+from lazy_init import Lazy, LazyModule, StartupReport
+from fuzzy_art import ModelFiles
+from model_snapshot import SharedModel
+import sample_store
+from feature_archive import FeatureArchive
+from camera_sources import describe_source, open_source, parse_cameras
+from frame_ring import FrameRing, RGBBuffer
+from pipeline import Broadcast, Pipeline
+from hands_pool import HandsPool
+from stream_encoder import AdaptiveProfile, JpegFrame
+from hand_detector import AsyncDetector, LandmarkTracker, NullDetector, create_detector, extract_all_features, parse_box
 
 app = Flask(__name__)
 CORS(app)
 
+# Waktu inisialisasi per langkah; cv2/mediapipe baru diimpor saat pertama dipakai
+startup = StartupReport()
+cv2 = LazyModule('cv2', startup)
+mp = LazyModule('mediapipe', startup)
+
 # ========== CONFIGURATION ==========
 WEIGHTS_FILE = 'model_art_weights.csv' 
 NAMES_FILE = 'model_art_names.csv'
+MODEL_FILE = 'model_art.bin'
 GESTURE_DATA_DIR = 'gesture_data'
+ARCHIVE_DIR = 'gesture_archive'
+# Sampel baru di arsip fitur dan journal model di-fsync bersama paling lambat setiap interval
+# ini (detik); saat listrik padam keduanya kehilangan paling banyak jendela yang sama
+ARCHIVE_FLUSH_INTERVAL = 1.0
+SAMPLE_LOG_FILE = 'gestures_log.db'
+EXCEL_FILE = 'gestures_data.xlsx'
 
 # Create gesture data directory if not exists
 os.makedirs(GESTURE_DATA_DIR, exist_ok=True)
@@ -27,317 +43,486 @@ os.makedirs(GESTURE_DATA_DIR, exist_ok=True)
 ROBOFLOW_API_KEY = "5vFdrINv9FtzcV3AztHzI" 
 ROBOFLOW_MODEL_ID = "object-dect-qhvpj/3" 
 ROBOFLOW_URL = "https://detect.roboflow.com"
-
+# Backend detektor tangan: roboflow | onnx | mediapipe | fake
+HAND_DETECTOR = os.getenv('HAND_DETECTOR', 'roboflow')
+HAND_DETECTOR_MODEL = os.getenv('HAND_DETECTOR_MODEL', 'models/hand_detector.onnx')
+HAND_DETECTOR_FAKE_BOX = os.getenv('HAND_DETECTOR_FAKE_BOX', '')
+# Crop berikutnya dari landmark frame sebelumnya (HAND_TRACKING=0: detektor tiap frame)
+HAND_TRACKING = os.getenv('HAND_TRACKING', '1') != '0'
+# Jumlah tangan per frame (MAX_HANDS=2 untuk isyarat dua tangan, tanpa crop detektor)
+MAX_HANDS = max(1, int(os.getenv('MAX_HANDS', '1')))
+# Proses worker MediaPipe, masing-masing dengan graph Hands sendiri (0 = Hands di thread inferensi)
+HANDS_WORKERS = max(0, int(os.getenv('HANDS_WORKERS', '0')))
+# Kamera per id: "id=source,..." (indeks webcam, file video, rtsp://..., fake[:WxH@FPS]), lihat camera_sources.py.
+# Kamera pertama juga dilayani /video_feed dan /api/gesture tanpa id
+CAMERAS = parse_cameras(os.getenv('CAMERAS', '0'))
+# Batas frame per detik per kamera (0 = selaju kamera), agar banyak kamera mendapat laju yang stabil
+CAMERA_FPS = max(0.0, float(os.getenv('CAMERA_FPS', '0')))
+# Umur maksimum (detik) kotak tangan dari stage deteksi sebelum dianggap basi
+DETECTOR_MAX_AGE = 0.5
+# Kapasitas antrian antar stage pipeline; frame tertua dibuang jika penuh
+PIPELINE_QUEUE_SIZE = 1
+# Pipeline kamera tanpa klien video/SSE selama ini (detik) dihentikan dan kameranya dilepas (0 = tidak pernah)
+PIPELINE_IDLE_TIMEOUT = max(0.0, float(os.getenv('PIPELINE_IDLE_TIMEOUT', '30')))
+# Slot frame di ring shared memory antara capture dan stage hilir
+RING_SLOTS = 8
+# Kualitas JPEG default stream dan batas lama tulis (detik) sebelum kualitas klien diturunkan
+STREAM_QUALITY = 80
+STREAM_SLOW_WRITE = 0.05
+# Interval komentar keep-alive (detik) pada stream SSE /api/gesture/stream
+SSE_KEEPALIVE = 15
+
+# Parameter Fuzzy ART untuk model baru (implementasi di fuzzy_art.py)
 RHO = 0.90
 ALPHA = 0.001
 BETA = 1.0
 
-# ========== FUZZY ART CLASS ==========
-class FuzzyART:
-    def __init__(self, rho=RHO, alpha=ALPHA, beta=BETA):
-        self.rho = rho
-        self.alpha = alpha
-        self.beta = beta
-        self.weights = []
-
-    def complement_coding(self, x):
-        x = np.clip(x, 0, 1)
-        return np.concatenate((x, 1 - x))
-
-    def classify(self, x_raw):
-        if len(self.weights) == 0: 
-            return -1
-        x = self.complement_coding(x_raw)
-
-        T = []
-        for W_j in self.weights:
-            fuzzy_and = np.minimum(x, W_j)
-            T_j = np.sum(fuzzy_and) / (self.alpha + np.sum(W_j))
-            T.append(T_j)
-        
-        j_star = np.argmax(T)
-        W_jstar = self.weights[j_star]
-        match_ratio = np.sum(np.minimum(x, W_jstar)) / np.sum(x)
-
-        if match_ratio >= self.rho: 
-            return j_star
-        else: 
-            return -2
-
 # ========== MODEL FUNCTIONS ==========
-def save_model_csv(art_model, gesture_names):
-    with open(WEIGHTS_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
-        for w in art_model.weights:
-            writer.writerow(w) 
-    
-    with open(NAMES_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["id", "name"])
-        for idx, name in gesture_names.items():
-            writer.writerow([idx, name])
-
-def load_model_csv():
-    art = FuzzyART()
-    names = {}
-    
-    if os.path.exists(WEIGHTS_FILE):
-        with open(WEIGHTS_FILE, 'r') as f:
-            reader = csv.reader(f)
-            loaded_weights = []
-            for row in reader:
-                if not row: continue
-                try:
-                    w_vec = np.array(row, dtype=np.float32)
-                    loaded_weights.append(w_vec)
-                except ValueError:
-                    pass
-            art.weights = loaded_weights
-
-    if os.path.exists(NAMES_FILE):
-        with open(NAMES_FILE, 'r') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                if len(row) >= 2:
-                    try:
-                        idx = int(row[0])
-                        label = row[1]
-                        names[idx] = label
-                    except ValueError:
-                        continue
-    
-    return art, names
-
-def save_to_excel(gesture_name, features, confidence, timestamp=None):
-    """Simpan gesture data real-time ke Excel"""
+def build_hand_detector():
+    """Buat detektor sesuai HAND_DETECTOR; jatuh ke MediaPipe saja jika gagal"""
     try:
-        from openpyxl import Workbook, load_workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        from datetime import datetime as dt
-        
-        excel_file = 'gestures_data.xlsx'
-        
-        # Cek apakah file sudah ada
-        if os.path.exists(excel_file):
-            wb = load_workbook(excel_file)
-            ws = wb.active
-        else:
-            # Buat workbook baru dengan header
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Gestures"
-            
-            # Header styling
-            headers = ["No", "Gesture Name", "Timestamp", "Confidence", "Features (Sample)"]
-            ws.append(headers)
-            
-            # Style header
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF")
-            
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Tambah data baru
-        row_num = ws.max_row + 1
-        timestamp = timestamp or dt.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Format features (ambil 5 pertama sebagai sample)
-        if isinstance(features, (list, np.ndarray)):
-            features_sample = ', '.join([f"{f:.3f}" for f in features[:5]]) + "..."
-        else:
-            features_sample = str(features)
-        
-        ws.append([row_num - 1, gesture_name, timestamp, f"{confidence:.2f}", features_sample])
-        
-        # Set column widths
-        ws.column_dimensions['A'].width = 5
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 35
-        
-        # Center alignment untuk beberapa kolom
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=4):
-            for cell in row:
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Save file
-        wb.save(excel_file)
-        return True
+        detector = create_detector(HAND_DETECTOR, confidence=0.5,
+                                   roboflow_url=ROBOFLOW_URL, roboflow_api_key=ROBOFLOW_API_KEY,
+                                   roboflow_model_id=ROBOFLOW_MODEL_ID,
+                                   onnx_model=HAND_DETECTOR_MODEL,
+                                   fake_box=parse_box(HAND_DETECTOR_FAKE_BOX))
+        print(f"[INFO] Hand detector: {HAND_DETECTOR}")
+        return detector
     except Exception as e:
-        print(f"[ERROR] Failed to save to Excel: {e}")
-        return False
-
-def extract_features(results):
-    if not results.multi_hand_landmarks: 
-        return None
-    hand_landmarks = results.multi_hand_landmarks[0]
-    base_x = hand_landmarks.landmark[0].x
-    base_y = hand_landmarks.landmark[0].y
-    feature_vector = []
-    for lm in hand_landmarks.landmark:
-        norm_x = (lm.x - base_x) + 0.5
-        norm_y = (lm.y - base_y) + 0.5
-        feature_vector.append(max(0.0, min(1.0, norm_x)))
-        feature_vector.append(max(0.0, min(1.0, norm_y)))
-    return np.array(feature_vector, dtype=np.float32)
+        print(f"[ERROR] Hand detector '{HAND_DETECTOR}' unavailable ({e}), using MediaPipe only")
+        return NullDetector()
+
+def open_camera(source):
+    return open_source(source)
+
+def build_hands():
+    """MediaPipe Hands di proses ini, atau HandsPool (frame lewat shared memory, dipakai semua kamera) jika HANDS_WORKERS > 0"""
+    if HANDS_WORKERS > 0:
+        # Mode tracking butuh satu worker per kamera; jika kamera lebih banyak,
+        # setiap frame dideteksi ulang (mode gambar statis) agar tracking tidak tercampur
+        tracking = len(CAMERAS) <= HANDS_WORKERS
+        if not tracking:
+            print(f"[INFO] {len(CAMERAS)} kamera > HANDS_WORKERS={HANDS_WORKERS}: "
+                  f"MediaPipe memakai mode gambar statis (tanpa tracking)")
+        print(f"[INFO] MediaPipe: {HANDS_WORKERS} proses worker")
+        return HandsPool(HANDS_WORKERS, max_hands=MAX_HANDS, static_image_mode=not tracking)
+    return mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=MAX_HANDS, min_detection_confidence=0.5)
 
 # ========== GLOBAL STATE ==========
-art, gesture_names = load_model_csv()
-yolo_client = InferenceHTTPClient(api_url=ROBOFLOW_URL, api_key=ROBOFLOW_API_KEY)
+with startup.step('model'):
+    model_files = ModelFiles(MODEL_FILE, WEIGHTS_FILE, NAMES_FILE, RHO, ALPHA, BETA,
+                             sync_interval=ARCHIVE_FLUSH_INTERVAL)
+    # Klasifikasi membaca snapshot immutable; pelatihan menerbitkan versi baru (copy-on-write)
+    model = SharedModel(*model_files.load())
+with startup.step('sample_log'):
+    sample_log = sample_store.SampleLog(SAMPLE_LOG_FILE, legacy_excel=EXCEL_FILE, json_dir=GESTURE_DATA_DIR)
+    # Jumlah sampel tersimpan untuk status gesture; diperbarui hanya saat sampel disimpan,
+    # jadi jalur per frame tidak pernah membaca SQLite
+    saved_gestures = sample_log.count()
+feature_archive = FeatureArchive(ARCHIVE_DIR, flush_interval=ARCHIVE_FLUSH_INTERVAL)
+
+class CameraStream:
+    """State satu kamera: pipeline capture -> inferensi -> encode dan status gesture-nya.
+
+    Setiap kamera punya thread pipeline, ring frame, tracker, detektor asinkron
+    dan klien SSE sendiri. Model FuzzyART (snapshot SharedModel) dan HandsPool
+    dipakai bersama; tanpa HandsPool setiap kamera memakai MediaPipe
+    Hands sendiri karena state tracking-nya per stream.
+    """
+
+    def __init__(self, cam_id, source):
+        self.id = cam_id
+        self.source = source
+        # Sumber daya berat dibuat saat pertama dipakai (stream video), bukan saat impor,
+        # sehingga endpoint model/sampel dan cold start tidak menunggu kamera atau MediaPipe
+        self.camera = Lazy(f"camera {cam_id}", lambda: open_camera(source), startup)
+        self.hand_detector = Lazy(f"hand_detector {cam_id}",
+                                  lambda: AsyncDetector(build_hand_detector(), max_age=DETECTOR_MAX_AGE), startup)
+        self.hands = hands if HANDS_WORKERS > 0 else Lazy(f"mediapipe_hands {cam_id}", build_hands, startup)
+        self.hand_tracker = LandmarkTracker(pad=30, enabled=HAND_TRACKING)
+        # Frame kamera ditulis ke ring shared memory (dialokasikan saat frame pertama)
+        self.frame_ring = FrameRing(RING_SLOTS)
+        self.gesture = "Mencari Tangan..."
+        self.confidence = 0.0
+        self.features = None
+        self.hand_results = []  # hasil per tangan (handedness, gesture, features)
+        self.pipeline = None
+        self.last_active = 0.0  # waktu terakhir pipeline diminta atau punya klien (time.monotonic)
+        self.last_frame = None  # JpegFrame terakhir yang diterbitkan
+        self.pipeline_lock = threading.Lock()
+        self.gesture_events = Broadcast()  # perubahan status gesture untuk klien SSE
+        self.last_gesture_event = None
+
+# HandsPool dipakai bersama semua kamera (setiap pipeline kamera memegang satu worker)
+hands = Lazy('mediapipe_hands', build_hands, startup)
+if HANDS_WORKERS > 0:
+    # Worker di-fork sekarang, sebelum thread Flask/pipeline berjalan; MediaPipe
+    # diimpor di dalam setiap worker, jadi impor modul ini tetap cepat
+    hands.get()
+rgb_buffer = RGBBuffer()
+cameras = {cam_id: CameraStream(cam_id, source) for cam_id, source in CAMERAS.items()}
+default_camera = next(iter(cameras.values()))
 
-mp_hands = mp.solutions.hands
-mp_draw = mp.solutions.drawing_utils
-hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5)
-
-cap = cv2.VideoCapture(0)
-current_gesture = "Mencari Tangan..."
-current_confidence = 0.0
-current_features = None
 auto_save_unknown = False  # Toggle untuk auto-save gesture yang tidak dikenal
 unknown_gesture_counter = 0  # Counter untuk unknown gesture
 last_saved_gesture = None  # Untuk menghindari save duplicate
+# Status gesture kamera dan counter auto-save (tidak pernah ditahan selama I/O disk)
 lock = threading.Lock()
 
 # ========== VIDEO STREAM ==========
-def generate_frames():
-    global current_gesture, current_confidence, current_features, art, gesture_names
+def process_frame(cam, frame):
+    """Stage inferensi satu kamera: deteksi tangan, MediaPipe, klasifikasi Fuzzy ART semua tangan"""
     global auto_save_unknown, unknown_gesture_counter, last_saved_gesture
     
-    while True:
-        success, frame = cap.read()
-        if not success:
-            break
-        
-        frame = cv2.flip(frame, 1)
-        display_frame = frame.copy()
+    status = "Mencari Tangan..."
+    color = (255, 255, 0)
+    vec = None
+    cropped_frame = None
+    confidence = 0.0
+    hand_results = []
+
+    # HAND DETECTION: crop dari landmark frame sebelumnya, detektor asinkron
+    # hanya dipakai saat tracking lepas (kotak terakhirnya dipakai ulang).
+    # Detektor hanya memberi satu kotak, jadi mode banyak tangan memakai frame penuh
+    roi, confidence, tracked = cam.hand_tracker.next_roi(cam.hand_detector.get() if MAX_HANDS == 1 else None, frame)
+    if roi is not None:
+        x_min, y_min, x_max, y_max = roi
+        cropped_frame = frame[y_min:y_max, x_min:x_max]
+        if cropped_frame.size == 0:
+            roi, cropped_frame = None, None
+    
+    # MEDIAPIPE PROCESSING
+    frame_to_process = cropped_frame if cropped_frame is not None else frame
+    if HANDS_WORKERS > 0:
+        # Konversi RGB langsung ke slot shared memory worker
+        results = cam.hands.get().process(frame_to_process, bgr=True, stream=cam.id)
+    else:
+        results = cam.hands.get().process(rgb_buffer.convert(frame_to_process))
+    cam.hand_tracker.update(results, roi, frame.shape)
+
+    # Overlay digambar di salinan privat, tidak pernah di slot ring: pembaca
+    # lain slot (detektor asinkron) tetap melihat frame asli, dan slot bebas
+    # lagi begitu inferensi selesai walau klien stream lambat
+    display_frame = frame.copy()
+    if roi is not None:
+        cv2.rectangle(display_frame, (x_min, y_min), (x_max, y_max), (0, 255, 255) if tracked else (255, 0, 0), 2)
+
+    if results.multi_hand_landmarks:
+        mp_hands, mp_draw = mp.solutions.hands, mp.solutions.drawing_utils
+        for hand_landmarks in results.multi_hand_landmarks:
+            mp_draw.draw_landmarks(display_frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
         
-        status = "Mencari Tangan..."
-        color = (255, 255, 0)
-        vec = None
-        cropped_frame = None
-        confidence = 0.0
-
-        # ROBOFLOW DETECTION
-        try:
-            predictions = yolo_client.infer(display_frame, model_id=ROBOFLOW_MODEL_ID, confidence=0.5)
-            
-            if predictions and 'predictions' in predictions:
-                hand_predictions = [p for p in predictions['predictions'] if p['class'].lower() == 'hand']
-                if hand_predictions:
-                    best_pred = max(hand_predictions, key=lambda x: x['confidence'])
-                    x_min, y_min, x_max, y_max = int(best_pred['x_min']), int(best_pred['y_min']), int(best_pred['x_max']), int(best_pred['y_max'])
-                    
-                    pad = 30 
-                    H, W, _ = frame.shape
-                    x_min = max(0, x_min - pad)
-                    y_min = max(0, y_min - pad)
-                    x_max = min(W, x_max + pad)
-                    y_max = min(H, y_max + pad)
-                    
-                    cv2.rectangle(display_frame, (x_min, y_min), (x_max, y_max), (255, 0, 0), 2)
-                    cropped_frame = frame[y_min:y_max, x_min:x_max]
-                    confidence = best_pred.get('confidence', 0.0)
-        except:
-            pass
+        # Semua tangan diklasifikasi dalam satu panggilan batch dari snapshot model
+        X = extract_all_features(results)
+        snap = model.snapshot()
+        indices, _, match_ratio = snap.art.classify_batch(X)
+        handedness = [h.classification[0].label for h in results.multi_handedness or []]
+        hand_colors = []
         
-        # MEDIAPIPE PROCESSING
-        frame_to_process = cropped_frame if cropped_frame is not None and cropped_frame.size > 0 else frame
-        rgb_frame = cv2.cvtColor(frame_to_process, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
-
-        if results.multi_hand_landmarks:
-            mp_draw.draw_landmarks(display_frame, results.multi_hand_landmarks[0], mp_hands.HAND_CONNECTIONS)
-            vec = extract_features(results)
+        for i, (hand_vec, idx) in enumerate(zip(X, indices)):
+            idx = int(idx)
+            hand_status, hand_color, hand_confidence, name = "Mencari Tangan...", (255, 255, 0), confidence, None
             
-            if vec is not None:
-                idx = art.classify(vec)     
+            if idx >= 0:
+                name = snap.names.get(idx, f"Unknown ({idx})")
+                hand_status = f"Gesture: {name}"
+                hand_color = (0, 255, 0)
+                hand_confidence = 0.95
+            elif idx == -2:
+                hand_status = "Tidak Dikenal"
+                hand_color = (0, 0, 255)
+                hand_confidence = 0.5
                 
-                if idx >= 0:
-                    name = gesture_names.get(idx, f"Unknown ({idx})")
-                    status = f"Gesture: {name}"
-                    color = (0, 255, 0)
-                    confidence = 0.95
-                elif idx == -2:
-                    status = "Tidak Dikenal"
-                    color = (0, 0, 255)
-                    confidence = 0.5
-                    
-                    # Auto-save gesture yang tidak dikenal
-                    if auto_save_unknown and last_saved_gesture != vec.tobytes():
-                        try:
-                            with lock:
-                                gesture_name = f"unknown_{unknown_gesture_counter}"
-                                filename, gesture_id = save_gesture_sample(gesture_name, vec)
-                                unknown_gesture_counter += 1
-                            last_saved_gesture = vec.tobytes()
-                            status = f"Auto-saved: {gesture_name}"
-                            color = (0, 165, 255)  # Orange
-                        except Exception as e:
-                            print(f"[ERROR] Auto-save failed: {e}")
+                # Auto-save gesture yang tidak dikenal
+                if auto_save_unknown and last_saved_gesture != hand_vec.tobytes():
+                    try:
+                        with lock:
+                            gesture_name = f"unknown_{unknown_gesture_counter}"
+                            unknown_gesture_counter += 1
+                        filename, gesture_id = save_gesture_sample(gesture_name, hand_vec)
+                        last_saved_gesture = hand_vec.tobytes()
+                        hand_status = f"Auto-saved: {gesture_name}"
+                        hand_color = (0, 165, 255)  # Orange
+                    except Exception as e:
+                        print(f"[ERROR] Auto-save failed: {e}")
+            
+            hand_results.append({
+                'handedness': handedness[i] if i < len(handedness) else None,
+                'gesture': hand_status,
+                'name': name,
+                'gesture_id': idx,
+                'confidence': hand_confidence,
+                'match_ratio': round(float(match_ratio[i]), 3),
+                'features': hand_vec.tolist()
+            })
+            hand_colors.append(hand_color)
+        
+        # Tangan pertama tetap jadi status utama (kompatibel dengan klien satu tangan)
+        first = hand_results[0]
+        vec, status, color, confidence = X[0], first['gesture'], hand_colors[0], first['confidence']
+        if len(hand_results) > 1:
+            status = ' | '.join(f"{h['handedness'] or i + 1}: {h['name'] or h['gesture']}"
+                                for i, h in enumerate(hand_results))
+
+    with lock:
+        cam.gesture = status
+        cam.confidence = confidence
+        cam.features = vec.tolist() if vec is not None else None
+        cam.hand_results = hand_results
+        publish_gesture_event(cam)
+
+    return display_frame, status, color, confidence
+
+def render_frame(cam, item):
+    """Stage encode: gambar overlay status lalu encode JPEG (di-cache untuk semua klien)"""
+    display_frame, status, color, confidence = item
+    cv2.rectangle(display_frame, (0, 0), (640, 90), (0, 0, 0), -1)
+    cv2.putText(display_frame, status, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+    cv2.putText(display_frame, f"Confidence: {confidence:.2f} | Categories: {len(model.snapshot().art.weights)}", (20, 75), cv2.FONT_ITALIC, 0.5, (200, 200, 200), 1)
+    
+    # Encode profil default sekali di sini; profil lain di-encode saat pertama diminta
+    frame = JpegFrame(display_frame)
+    frame.jpeg(STREAM_QUALITY)
+    # Klien yang masih memegang frame sebelumnya cukup memakai JPEG ter-cache-nya
+    if cam.last_frame is not None:
+        cam.last_frame.release_image()
+    cam.last_frame = frame
+    return frame
+
+def gesture_event(cam):
+    """Ringkasan status gesture satu kamera untuk klien SSE (tanpa feature vector; panggil dengan lock)"""
+    return {
+        'camera': cam.id,
+        'gesture': cam.gesture,
+        'confidence': round(float(cam.confidence), 3),
+        'hands': [{'handedness': h['handedness'], 'gesture': h['gesture'], 'confidence': h['confidence']}
+                  for h in cam.hand_results],
+        'saved_gestures': saved_gestures
+    }
 
+def publish_gesture_event(cam):
+    """Kirim status gesture kamera ke klien SSE-nya hanya jika berubah (panggil dengan lock)"""
+    event = gesture_event(cam)
+    if event != cam.last_gesture_event:
+        cam.last_gesture_event = event
+        cam.gesture_events.put(event)
+
+def release_hands(cam):
+    """Lepas worker HandsPool yang dipegang kamera setelah pipeline-nya berhenti"""
+    if HANDS_WORKERS > 0 and hands.loaded:
+        hands.peek().release_stream(cam.id)
+
+def get_pipeline(cam):
+    """Satu loop capture -> inferensi -> encode per kamera untuk semua kliennya, dimulai saat pertama diminta.
+
+    Hasil encode dipublikasikan ke Broadcast; setiap klien /video_feed hanya
+    mengambil JPEG terbaru, jadi klien tambahan tidak menjalankan inferensi lagi.
+    Pipeline tanpa klien dihentikan oleh watch_idle_pipelines() dan dimulai
+    ulang (kamera dibuka lagi) pada permintaan berikutnya.
+    """
+    if PIPELINE_IDLE_TIMEOUT > 0:
+        idle_watcher.get()
+    with cam.pipeline_lock:
+        if cam.pipeline is not None and not cam.pipeline.running:
+            # Kamera gagal dibaca: pipeline lama sudah berhenti, kamera dibuka ulang
+            stop_pipeline(cam)
+        cam.last_active = time.monotonic()
+        if cam.pipeline is None:
+            cam.pipeline = Pipeline(cam.camera.get(),
+                                    [('inference', lambda frame: process_frame(cam, frame)),
+                                     ('encode', lambda item: render_frame(cam, item))],
+                                    transform=lambda frame, dst: cv2.flip(frame, 1, dst=dst),
+                                    queue_size=PIPELINE_QUEUE_SIZE, output=Broadcast(), ring=cam.frame_ring,
+                                    max_fps=CAMERA_FPS, on_stop=lambda: release_hands(cam),
+                                    release_camera=True).start()
+        return cam.pipeline
+
+def stop_pipeline(cam):
+    """Hentikan pipeline kamera (panggil dengan cam.pipeline_lock); get_pipeline() memulai ulang"""
+    cam.pipeline.stop()
+    cam.pipeline = None
+    # Thread capture melepas kamera saat berhenti; get() berikutnya membukanya lagi
+    cam.camera.reset()
+
+def watch_idle_pipelines():
+    """Thread latar: hentikan pipeline yang tidak punya klien video/SSE selama PIPELINE_IDLE_TIMEOUT detik"""
+    while True:
+        time.sleep(min(1.0, PIPELINE_IDLE_TIMEOUT))
+        now = time.monotonic()
+        for cam in cameras.values():
+            with cam.pipeline_lock:
+                if cam.pipeline is None or cam.pipeline.output.subscribers or cam.gesture_events.subscribers:
+                    cam.last_active = now
+                elif now - cam.last_active >= PIPELINE_IDLE_TIMEOUT:
+                    print(f"[INFO] Kamera {cam.id}: tanpa klien {PIPELINE_IDLE_TIMEOUT:g} detik, pipeline dihentikan")
+                    stop_pipeline(cam)
+
+def start_idle_watcher():
+    thread = threading.Thread(target=watch_idle_pipelines, name='pipeline-idle', daemon=True)
+    thread.start()
+    return thread
+
+# Dimulai saat pipeline pertama diminta
+idle_watcher = Lazy('pipeline_idle_watcher', start_idle_watcher)
+
+def generate_frames(cam, quality=None, scale=1.0, adaptive=True):
+    """Stream MJPEG satu klien dari JPEG terbaru kamera, kualitas/skala per klien"""
+    broadcast = get_pipeline(cam).output
+    profile = AdaptiveProfile(quality or STREAM_QUALITY, scale, slow_write=STREAM_SLOW_WRITE, adaptive=adaptive)
+    seq = 0
+    with broadcast.subscribe():
+        while True:
+            seq, frame = broadcast.wait(seq, timeout=1.0)
+            if frame is None:
+                if broadcast.closed:
+                    break
+                continue
+            frame_bytes = frame.jpeg(*profile.profile())
+            # Lama tertahan di yield = lama server menulis chunk ke socket klien
+            start = time.monotonic()
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            profile.record_write(time.monotonic() - start)
+
+def generate_gesture_events(cam, debounce=0.0):
+    """Stream SSE perubahan gesture satu kamera; debounce menggabungkan perubahan beruntun"""
+    gesture_events = cam.gesture_events
+    seq, event = gesture_events.latest()
+    if event is None:
         with lock:
-            current_gesture = status
-            current_confidence = confidence
-            current_features = vec.tolist() if vec is not None else None
-
-        # UI
-        cv2.rectangle(display_frame, (0, 0), (640, 90), (0, 0, 0), -1)
-        cv2.putText(display_frame, status, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        cv2.putText(display_frame, f"Confidence: {confidence:.2f} | Categories: {len(art.weights)}", (20, 75), cv2.FONT_ITALIC, 0.5, (200, 200, 200), 1)
-        
-        ret, buffer = cv2.imencode('.jpg', display_frame)
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            event = gesture_event(cam)
+    with gesture_events.subscribe():
+        yield 'retry: 2000\n\n'
+        yield f"data: {json.dumps(event)}\n\n"
+        sent = event
+        while True:
+            seq, event = gesture_events.wait(seq, timeout=SSE_KEEPALIVE)
+            if event is None:
+                if gesture_events.closed:
+                    break
+                yield ': keep-alive\n\n'
+                continue
+            if debounce:
+                time.sleep(debounce)
+                seq, event = gesture_events.latest()
+            if event != sent:
+                sent = event
+                yield f"data: {json.dumps(event)}\n\n"
 
 # ========== ROUTES ==========
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/video_feed')
-def video_feed():
-    return Response(generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+def get_camera(cam_id):
+    """CameraStream untuk id di URL; tanpa id kamera pertama, None jika tidak dikenal"""
+    return default_camera if cam_id is None else cameras.get(cam_id)
+
+def unknown_camera(cam_id):
+    return jsonify({'status': 'error', 'message': f'Kamera tidak dikenal: {cam_id}'}), 404
+
+@app.route('/video_feed', defaults={'cam_id': None})
+@app.route('/video_feed/<cam_id>')
+def video_feed(cam_id):
+    cam = get_camera(cam_id)
+    if cam is None:
+        return unknown_camera(cam_id)
+    # ?quality=30-95&scale=0.25-1.0&adaptive=0 untuk profil stream per klien
+    quality = request.args.get('quality', STREAM_QUALITY, type=int)
+    scale = request.args.get('scale', 1.0, type=float)
+    adaptive = request.args.get('adaptive', '1') != '0'
+    return Response(generate_frames(cam, quality, scale, adaptive), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 def get_saved_gestures_count():
-    """Hitung jumlah gesture yang tersimpan di folder gesture_data"""
+    """Jumlah sampel gesture tersimpan, dari katalog sampel (tanpa listdir)"""
     try:
-        if os.path.exists(GESTURE_DATA_DIR):
-            gesture_files = [f for f in os.listdir(GESTURE_DATA_DIR) if f.endswith('.json')]
-            return len(gesture_files)
-    except:
-        pass
-    return 0
-
-@app.route('/api/gesture')
-def get_gesture():
+        return sample_log.count()
+    except Exception as e:
+        print(f"[ERROR] Failed to count samples: {e}")
+        return 0
+
+@app.route('/api/gesture', defaults={'cam_id': None})
+@app.route('/api/gesture/<cam_id>')
+def get_gesture(cam_id):
+    cam = get_camera(cam_id)
+    if cam is None:
+        return unknown_camera(cam_id)
+    # Jumlah terbaru (termasuk sampel dari capture_gestures.py), dibaca di luar lock
+    saved_count = get_saved_gestures_count()
     with lock:
-        saved_count = get_saved_gestures_count()
         return jsonify({
-            'gesture': current_gesture,
-            'confidence': current_confidence,
+            'camera': cam.id,
+            'gesture': cam.gesture,
+            'confidence': cam.confidence,
             'saved_gestures': saved_count,
-            'features': current_features
+            'features': cam.features,
+            'hands': cam.hand_results
         })
 
+@app.route('/api/gesture/stream', defaults={'cam_id': None})
+@app.route('/api/gesture/<cam_id>/stream')
+def gesture_stream(cam_id):
+    """Server-Sent Events: status gesture kamera dikirim saat berubah (?debounce=ms)"""
+    cam = get_camera(cam_id)
+    if cam is None:
+        return unknown_camera(cam_id)
+    debounce = max(0, request.args.get('debounce', 0, type=int)) / 1000.0
+    # Event berasal dari loop inferensi, jadi pastikan loop sudah berjalan
+    get_pipeline(cam)
+    return Response(generate_gesture_events(cam, debounce), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/pipeline/stats', defaults={'cam_id': None})
+@app.route('/api/pipeline/stats/<cam_id>')
+def get_pipeline_stats(cam_id):
+    """Throughput, latensi, kedalaman antrian dan frame dibuang per stage satu kamera"""
+    cam = get_camera(cam_id)
+    if cam is None:
+        return unknown_camera(cam_id)
+    pipeline = cam.pipeline
+    return jsonify({
+        'status': 'success',
+        'camera': cam.id,
+        'running': pipeline is not None and pipeline.running,
+        'stages': pipeline.stats() if pipeline is not None else [],
+        'hands_pool': hands.peek().stats() if HANDS_WORKERS > 0 and hands.loaded else None
+    })
+
+@app.route('/api/cameras')
+def list_cameras():
+    """Kamera dari CAMERAS dengan status pipeline, laju capture/inferensi dan gesture terakhir"""
+    result = []
+    for cam in cameras.values():
+        pipeline = cam.pipeline
+        fps = {s['stage']: s['fps'] for s in pipeline.stats() if 'fps' in s} if pipeline is not None else {}
+        result.append({
+            'id': cam.id,
+            'source': describe_source(cam.source),
+            'running': pipeline is not None and pipeline.running,
+            'capture_fps': fps.get('capture', 0.0),
+            'inference_fps': fps.get('inference', 0.0),
+            'gesture': cam.gesture
+        })
+    return jsonify({
+        'status': 'success',
+        'cameras': result,
+        'total': len(result),
+        'max_fps': CAMERA_FPS
+    })
+
 @app.route('/api/save_model', methods=['POST'])
 def save_model():
-    save_model_csv(art, gesture_names)
+    # Read lock: tidak ada record() journal di antara snapshot dan pengosongan journal
+    with model.read() as snap:
+        model_files.save(snap.art, snap.names)
     return jsonify({'status': 'success', 'message': 'Model saved successfully'})
 
 def save_gesture_sample(gesture_name, feature_vector):
-    """Simpan gesture sample ke file JSON dan ART model"""
-    global art, gesture_names
-    
+    """Simpan gesture sample ke arsip fitur dan ART model (aman dipanggil dari banyak thread)"""
+    global saved_gestures
     timestamp = int(time.time() * 1000)
-    filename = os.path.join(GESTURE_DATA_DIR, f"{gesture_name}_{timestamp}.json")
     
-    # Ensure feature_vector is converted to list for JSON
+    # Ensure feature_vector is converted to list for the sample log
     if isinstance(feature_vector, np.ndarray):
         features_list = feature_vector.tolist()
         vec = feature_vector
@@ -347,66 +532,32 @@ def save_gesture_sample(gesture_name, feature_vector):
     else:
         raise ValueError(f"Invalid feature_vector type: {type(feature_vector)}")
     
-    data = {
-        'gesture': gesture_name,
-        'timestamp': timestamp,
-        'features': features_list
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(data, f)
-    
-    # Train ke model ART
-    x = np.clip(vec, 0, 1)
-    x = np.concatenate((x, 1 - x))  # Complement coding
-    
-    if len(art.weights) == 0:
-        art.weights.append(x)
-        idx = 0
-    else:
-        # Classify first to find closest match
-        T = []
-        for W_j in art.weights:
-            fuzzy_and = np.minimum(x, W_j)
-            T_j = np.sum(fuzzy_and) / (ALPHA + np.sum(W_j))
-            T.append(T_j)
-        
-        sorted_indices = np.argsort(T)[::-1]
-        idx = None
-        
-        # Check vigilance
-        for j_star in sorted_indices:
-            W_jstar = art.weights[int(j_star)]
-            match_ratio = np.sum(np.minimum(x, W_jstar)) / np.sum(x)
-            
-            if match_ratio >= RHO:
-                # Update weight
-                new_weight = BETA * np.minimum(x, W_jstar) + (1 - BETA) * W_jstar
-                art.weights[int(j_star)] = new_weight
-                idx = int(j_star)
-                break
-        
-        if idx is None:
-            # Create new category
-            art.weights.append(x)
-            idx = int(len(art.weights) - 1)
+    # Simpan ke arsip fitur terpaket (pengganti satu file JSON per sampel)
+    filename = os.path.join(ARCHIVE_DIR, feature_archive.append(gesture_name, vec, timestamp, flush=False))
     
-    gesture_names[int(idx)] = gesture_name
+    # Train ke salinan model; pembaca tetap memakai snapshot lama sampai edit selesai
+    with model.edit() as (art, gesture_names):
+        idx = art.train_single_input(vec)
+        gesture_names[int(idx)] = gesture_name
+        # Save model (append ke journal, snapshot dikompaksi di latar belakang)
+        model_files.record(idx, art.weights[idx], gesture_name)
     
-    # Save model
-    save_model_csv(art, gesture_names)
+    # Catat ke log sampel (Excel dibangun saat diunduh)
+    sample_log.append(gesture_name, features_list, 0.95, timestamp)
     
-    # Save to Excel (real-time)
-    timestamp_str = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
-    save_to_excel(gesture_name, features_list, 0.95, timestamp_str)
+    # Hitung di luar lock; jumlah hanya bertambah, jadi simpan bersamaan tidak
+    # menimpa hitungan baru dengan yang lama
+    saved_count = get_saved_gestures_count()
+    with lock:
+        saved_gestures = max(saved_gestures, saved_count)
+        for cam in cameras.values():
+            publish_gesture_event(cam)
     
     return filename, int(idx)
 
 @app.route('/api/save_gesture', methods=['POST'])
 def save_gesture_endpoint():
     """Simpan gesture saat ini dengan nama yang diberikan"""
-    global art, gesture_names
-    
     data = request.json
     gesture_name = data.get('gesture_name', '').strip()
     feature_vector = data.get('features', None)
@@ -418,28 +569,67 @@ def save_gesture_endpoint():
         return jsonify({'status': 'error', 'message': 'Feature vector tidak ditemukan'}), 400
     
     try:
-        with lock:
-            filename, gesture_id = save_gesture_sample(gesture_name, feature_vector)
+        filename, gesture_id = save_gesture_sample(gesture_name, feature_vector)
         
         return jsonify({
             'status': 'success',
             'message': f'Gesture "{gesture_name}" berhasil disimpan',
             'filename': os.path.basename(filename),
             'gesture_id': gesture_id,
-            'total_categories': len(art.weights)
+            'total_categories': len(model.snapshot().art.weights)
         })
     
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/classify_batch', methods=['POST'])
+def classify_batch_endpoint():
+    """Klasifikasi banyak feature vector sekaligus (N x 42)"""
+    data = request.json or {}
+    features = data.get('features', None)
+    
+    if not features:
+        return jsonify({'status': 'error', 'message': 'Feature vector tidak ditemukan'}), 400
+    
+    try:
+        X = np.asarray(features, dtype=np.float32)
+    except (TypeError, ValueError):
+        return jsonify({'status': 'error', 'message': 'Feature vector harus berupa matriks angka'}), 400
+    
+    if not np.isfinite(X).all():
+        # null di JSON menjadi NaN; hasilnya tidak bisa dikirim balik sebagai JSON valid
+        return jsonify({'status': 'error', 'message': 'Feature vector berisi null, NaN atau Infinity'}), 400
+    
+    art, gesture_names, _ = model.snapshot()
+    if X.ndim != 2 or (len(art.weights) > 0 and 2 * X.shape[1] != art.weights.shape[1]):
+        return jsonify({'status': 'error', 'message': f'Ukuran feature tidak valid: {list(X.shape)}'}), 400
+    
+    indices, choice, match_ratio = art.classify_batch(X)
+    names = [gesture_names.get(int(idx)) if idx >= 0 else None for idx in indices]
+    
+    return jsonify({
+        'status': 'success',
+        'count': int(len(indices)),
+        'gesture_ids': indices.tolist(),
+        'gestures': names,
+        'choice': choice.tolist(),
+        'match_ratio': match_ratio.tolist(),
+        'total_categories': len(art.weights)
+    })
+
+@app.route('/api/model/stats')
+def get_model_stats():
+    """Kandidat yang diperiksa per pencarian vigilance (tuning rho dan indeks kategori)"""
+    snap = model.snapshot()
+    return jsonify({'status': 'success', 'version': snap.version, **snap.art.search_stats()})
+
 @app.route('/api/gestures/list', methods=['GET'])
 def list_gestures():
     """List semua gesture yang sudah disimpan"""
-    with lock:
-        gestures = [
-            {'id': int(idx), 'name': name}
-            for idx, name in sorted(gesture_names.items())
-        ]
+    gestures = [
+        {'id': int(idx), 'name': name}
+        for idx, name in sorted(model.snapshot().names.items())
+    ]
     return jsonify({
         'status': 'success',
         'gestures': gestures,
@@ -465,7 +655,7 @@ def get_auto_save_status():
         'status': 'success',
         'auto_save_enabled': auto_save_unknown,
         'unknown_counter': unknown_gesture_counter,
-        'total_categories': len(art.weights)
+        'total_categories': len(model.snapshot().art.weights)
     })
 
 @app.route('/api/auto_save/reset', methods=['POST'])
@@ -478,14 +668,55 @@ def reset_auto_save_counter():
         'message': 'Unknown gesture counter reset to 0'
     })
 
+@app.route('/api/samples/counts', methods=['GET'])
+def sample_counts():
+    """Jumlah sampel per gesture dan total dari katalog sampel"""
+    counts = sample_log.counts()
+    return jsonify({
+        'status': 'success',
+        'total': sum(counts.values()),
+        'counts': counts
+    })
+
+@app.route('/api/samples', methods=['GET'])
+def list_samples():
+    """Query sampel per label/rentang waktu: ?gesture=&start=&end= (ms), &limit=&offset=&features=1"""
+    limit = min(max(1, request.args.get('limit', 100, type=int)), 10000)
+    offset = max(0, request.args.get('offset', 0, type=int))
+    with_features = request.args.get('features', '0') == '1'
+    samples = sample_log.query(gesture=request.args.get('gesture'),
+                               start=request.args.get('start', type=int),
+                               end=request.args.get('end', type=int),
+                               limit=limit, offset=offset, with_features=with_features)
+    if with_features:
+        for sample in samples:
+            if sample['features'] is not None:
+                sample['features'] = sample['features'].tolist()
+    return jsonify({
+        'status': 'success',
+        'count': len(samples),
+        'samples': samples
+    })
+
 @app.route('/api/download/excel', methods=['GET'])
 def download_excel():
-    """Download Excel file dengan gesture data"""
-    excel_file = 'gestures_data.xlsx'
-    if os.path.exists(excel_file):
-        return send_file(excel_file, as_attachment=True, download_name='gestures_data.xlsx')
-    else:
+    """Download Excel file dengan gesture data (dibangun dari log sampel)"""
+    if sample_log.count() == 0:
         return jsonify({'status': 'error', 'message': 'Excel file not found'}), 404
+    
+    try:
+        excel_file = sample_log.export_excel(EXCEL_FILE)
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'Failed to build Excel: {e}'}), 500
+    return send_file(os.path.abspath(excel_file), as_attachment=True, download_name='gestures_data.xlsx')
+
+@app.route('/api/startup', methods=['GET'])
+def startup_stats():
+    """Lama inisialisasi per langkah: eager saat impor, lazy saat pertama dipakai"""
+    return jsonify({'status': 'success', **startup.stats()})
+
+startup.ready()
+print(f"[INFO] Startup {startup.summary()}")
 
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=5000, threaded=True)
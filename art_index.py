@@ -0,0 +1,222 @@
+"""Indeks kategori untuk model FuzzyART besar: pruning dengan hasil eksak.
+
+Untuk bobot w_j dan batas bawah U <= w_j (elemen per elemen) berlaku
+
+    |x ^ w_j| <= |w_j| - |U| + |x ^ U|
+
+karena untuk setiap komponen min(x, w) - w = -(w - x)+ <= -(U - x)+.
+Kategori dikelompokkan ke leaf (pembagian median pada pusat hyperbox,
+dimensi dengan sebaran terlebar lebih dulu). Setiap leaf menyimpan
+U = minimum bobot anggotanya dan |w| terbesar, sehingga dengan satu
+fuzzy AND per leaf didapat batas atas choice T dan match ratio semua
+anggotanya:
+
+    T_j     <= (maxnorm - |U| + |x ^ U|) / (alpha + maxnorm)
+    match_j <= (maxnorm - |U| + |x ^ U|) / |x|
+
+candidates() memeriksa leaf urut batas T menurun dan berhenti sebelum
+leaf yang batasnya di bawah kandidat terbaik; saat pelatihan leaf yang
+batas match-nya di bawah rho dilewati seluruhnya. Choice function tetap
+dihitung eksak untuk setiap kategori yang diperiksa, jadi urutan dan hasil
+sama dengan scan penuh.
+
+Kategori baru (indeks >= size) masuk ekor yang selalu diperiksa penuh;
+indeks dibangun ulang setelah ekor melewati rebuild_fraction dari ukuran.
+
+iter_descending() adalah padanan tanpa indeks: urutan T menurun dari
+scan penuh, dihasilkan lazily per blok top-k, bukan argsort seluruhnya.
+"""
+import copy
+import heapq
+
+import numpy as np
+
+LEAF_SIZE = 64
+MIN_CATEGORIES = 8192  # di bawah ini scan penuh sudah cukup cepat
+REBUILD_FRACTION = 0.1
+# Margin batas atas terhadap pembulatan float32 pada perhitungan eksak
+BOUND_EPS = 1e-4
+# Jika leaf yang harus diperiksa melebihi fraksi ini, scan contiguous sisa kategori
+FULL_SCAN_FRACTION = 0.3
+# Ukuran blok top-k pertama iter_descending (blok berikutnya dua kali lipat)
+TOPK_BLOCK = 8
+
+
+def iter_descending(T, block=TOPK_BLOCK, prefer_high=True):
+    """Indeks T urut menurun secara lazy, per blok top-k dengan np.partition.
+
+    Setiap blok berisi block nilai terbesar dari sisa (plus yang seri dengan
+    batasnya), diurutkan sendiri; blok berikutnya dua kali lebih besar. Jika
+    vigilance lolos di beberapa kandidat pertama biayanya O(C), bukan
+    O(C log C) seperti argsort. Seri: indeks terbesar lebih dulu jika
+    prefer_high (sama dengan argsort stabil yang dibalik).
+    """
+    ids = np.arange(len(T))
+    vals = np.asarray(T)
+    sign = -1 if prefer_high else 1
+    while len(ids):
+        if block < len(ids):
+            kth = np.partition(vals, len(vals) - block)[len(vals) - block]
+            top = vals >= kth
+            head_ids, head_vals = ids[top], vals[top]
+            ids, vals = ids[~top], vals[~top]
+        else:
+            head_ids, head_vals, ids = ids, vals, ids[:0]
+        order = np.lexsort((sign * head_ids, -head_vals))
+        yield from head_ids[order].tolist()
+        block *= 2
+
+
+class CategoryIndex:
+    """Leaf hyperbox di atas baris bobot [0, size); lihat docstring modul"""
+
+    def __init__(self, W, leaf_size=LEAF_SIZE, rebuild_fraction=REBUILD_FRACTION):
+        W = np.asarray(W, dtype=np.float32)
+        self.size = len(W)
+        self.leaf_size = leaf_size
+        self.rebuild_fraction = rebuild_fraction
+        self.examined = 0
+
+        half = W.shape[1] // 2
+        centers = (W[:, :half] + 1 - W[:, half:]) / 2
+        leaves = self._partition(centers, leaf_size)
+
+        self.members = np.concatenate(leaves) if leaves else np.empty(0, dtype=np.int64)
+        self.offsets = np.cumsum([0] + [len(ids) for ids in leaves])
+        self.leaf_of = np.empty(self.size, dtype=np.int64)
+        self.lower = np.empty((len(leaves), W.shape[1]), dtype=np.float64)
+        self.maxnorm = np.empty(len(leaves), dtype=np.float64)
+        for leaf, ids in enumerate(leaves):
+            self.leaf_of[ids] = leaf
+            self.lower[leaf] = W[ids].min(axis=0)
+            self.maxnorm[leaf] = W[ids].sum(axis=1, dtype=np.float64).max()
+        self.lower_norm = self.lower.sum(axis=1)
+
+    @staticmethod
+    def _partition(centers, leaf_size):
+        """Bagi indeks kategori di median dimensi terlebar sampai <= leaf_size"""
+        leaves = []
+        stack = [np.arange(len(centers))]
+        while stack:
+            ids = stack.pop()
+            if len(ids) <= leaf_size:
+                if len(ids):
+                    leaves.append(np.sort(ids))
+                continue
+            c = centers[ids]
+            dim = int(np.argmax(c.max(axis=0) - c.min(axis=0)))
+            mid = len(ids) // 2
+            order = np.argpartition(c[:, dim], mid)
+            stack.append(ids[order[mid:]])
+            stack.append(ids[order[:mid]])
+        return leaves
+
+    def stale(self, n):
+        """True jika ekor kategori baru sudah terlalu panjang untuk discan penuh"""
+        return n - self.size > max(self.leaf_size, self.rebuild_fraction * self.size)
+
+    def copy(self):
+        """Salinan untuk model copy-on-write; partisi leaf dipakai bersama, batas leaf disalin"""
+        clone = copy.copy(self)
+        clone.lower = self.lower.copy()
+        clone.lower_norm = self.lower_norm.copy()
+        clone.maxnorm = self.maxnorm.copy()
+        return clone
+
+    def update(self, j, w):
+        """Perbarui batas leaf kategori j; panggil SEBELUM bobot baru ditulis"""
+        if j >= self.size:
+            return
+        leaf = self.leaf_of[j]
+        lower = np.minimum(self.lower[leaf], w)
+        self.lower_norm[leaf] = lower.sum()
+        self.lower[leaf] = lower
+        self.maxnorm[leaf] = max(self.maxnorm[leaf], float(np.sum(w, dtype=np.float64)))
+
+    def candidates(self, x, W, norms, alpha, rho=None, prefer_high=True):
+        """Yield (j, T_j, match_j) urut T menurun, dari W/norms sepanjang n kategori.
+
+        rho: hanya kategori dengan match >= rho (pencarian vigilance).
+        Seri T: indeks terbesar lebih dulu jika prefer_high, selain itu
+        indeks terkecil (sama dengan np.argmax).
+        """
+        x_sum = np.sum(x)
+        bound = self.maxnorm - self.lower_norm + np.minimum(x, self.lower).sum(axis=1)
+        t_bound = bound / (alpha + self.maxnorm) + BOUND_EPS
+        leaves = np.arange(len(self.maxnorm))
+        if rho is not None:
+            leaves = leaves[bound / x_sum + BOUND_EPS >= rho]
+        leaves = leaves[np.argsort(-t_bound[leaves], kind='stable')]
+        sign = -1 if prefer_high else 1
+        # Heap berisi satu kepala per blok yang diperiksa (k-way merge). Blok baru
+        # diurutkan penuh hanya jika kandidat kedua darinya benar-benar diminta.
+        heap = []
+        serial = 0
+
+        def push(ids, fuzzy_and=None):
+            nonlocal serial
+            self.examined += len(ids)
+            if fuzzy_and is None:
+                fuzzy_and = np.minimum(x, W[ids]).sum(axis=1)
+            T = fuzzy_and / (alpha + norms[ids])
+            match_ratio = fuzzy_and / x_sum
+            if rho is not None:
+                keep = match_ratio >= rho
+                ids, T, match_ratio = ids[keep], T[keep], match_ratio[keep]
+            if len(ids) == 0:
+                return
+            best = np.flatnonzero(T == T.max())
+            best = best[np.argmin(sign * ids[best])]
+            serial += 1
+            heapq.heappush(heap, (-float(T[best]), sign * int(ids[best]), serial, [ids, T, match_ratio, best, None, 0]))
+
+        def advance(block):
+            """Kepala berikutnya dari blok (urutkan sekali saat pertama kali perlu)"""
+            nonlocal serial
+            ids, T, match_ratio, best, order, pos = block
+            if order is None:
+                order = np.lexsort((sign * ids, -T))
+                block[4] = order
+            pos += 1
+            block[5] = pos
+            if pos < len(order):
+                j = order[pos]
+                serial += 1
+                heapq.heappush(heap, (-float(T[j]), sign * int(ids[j]), serial, block))
+
+        if len(norms) > self.size:
+            push(np.arange(self.size, len(norms)))
+        neg_bound = -t_bound[leaves]
+        sizes = np.diff(self.offsets)[leaves]
+        gathered = 0
+        k = 0
+        chunk = 1
+        while True:
+            # Leaf yang batasnya masih bisa menyamai kandidat teratas harus diperiksa
+            # dulu; diambil per kelompok (1, 2, 4, ... leaf) dalam satu gather
+            while k < len(leaves):
+                stop = len(leaves) if not heap else int(np.searchsorted(neg_bound, heap[0][0], side='right'))
+                stop = min(stop, k + chunk)
+                if stop <= k:
+                    break
+                if gathered + sizes[k:stop].sum() > FULL_SCAN_FRACTION * self.size:
+                    # Hampir semua kategori tetap harus diperiksa: scan contiguous
+                    # lebih murah daripada gather baris per leaf
+                    pending = np.zeros(len(self.maxnorm), dtype=bool)
+                    pending[leaves[k:]] = True
+                    rows = np.flatnonzero(pending[self.leaf_of])
+                    push(rows, np.minimum(x, W[:self.size]).sum(axis=1)[rows])
+                    k = len(leaves)
+                    break
+                push(np.concatenate([self.members[self.offsets[leaf]:self.offsets[leaf + 1]]
+                                     for leaf in leaves[k:stop]]))
+                gathered += sizes[k:stop].sum()
+                k = stop
+                chunk *= 2
+            if not heap:
+                return
+            neg_t, signed_j, _, block = heapq.heappop(heap)
+            j = sign * signed_j
+            row = block[4][block[5]] if block[4] is not None else block[3]
+            yield j, -neg_t, float(block[2][row])
+            advance(block)
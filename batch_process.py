@@ -0,0 +1,262 @@
+"""Mode batch offline: file video dan folder gambar tanpa kamera.
+
+    python batch_process.py rekaman/kiosk1.mp4 rekaman/kiosk2.mp4 foto/ > label.jsonl
+    python batch_process.py rekaman/ --every 5 --workers 8 --output label.jsonl
+    python batch_process.py rekaman/demo.mp4 --benchmark
+
+Thread decoder membaca frame dari semua sumber ke antrian terbatas
+(frame yang dilewati --every hanya di-grab, tidak di-decode) dan
+mengubahnya ke RGB. Setiap frame dikirim ke HandsPool (hands_pool.py):
+satu instance MediaPipe Hands per proses, frame lewat shared memory.
+Proses utama mengklasifikasi fitur dengan FuzzyART per blok frame (satu
+classify_batch per blok) dan menulis satu baris JSON per frame, urut
+sesuai sumber:
+
+    {"source": ..., "frame": 12, "time_ms": 400.0,
+     "hands": [{"handedness": "Right", "gesture_id": 3, "gesture": "ok",
+                "match_ratio": 0.97, "features": [...42 nilai]}]}
+
+Jumlah frame yang menunggu di pool dibatasi slot shared memory, jadi
+memori tetap kecil berapa pun panjang rekamannya. Ringkasan (frame, fps) dicetak ke stderr.
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from fuzzy_art import ModelFiles
+from hand_detector import extract_all_features
+from hands_pool import HandsPool
+
+WEIGHTS_FILE = 'model_art_weights.csv'
+NAMES_FILE = 'model_art_names.csv'
+MODEL_FILE = 'model_art.bin'
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.mpg', '.mpeg')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+# Frame ter-decode yang boleh menunggu di antrian decoder
+DECODE_QUEUE_SIZE = 64
+# Frame yang diklasifikasi bersama dalam satu classify_batch
+CLASSIFY_BLOCK = 64
+
+
+def iter_sources(paths):
+    """File video/gambar dari argumen; folder dibuka (urut nama, rekursif)"""
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(glob.glob(os.path.join(path, '**', '*'), recursive=True))
+            for file_path in files:
+                if file_path.lower().endswith(VIDEO_EXTENSIONS + IMAGE_EXTENSIONS):
+                    yield file_path
+        elif os.path.exists(path):
+            yield path
+        else:
+            print(f"[ERROR] Sumber tidak ditemukan: {path}", file=sys.stderr)
+
+
+def iter_frames(sources, every=1, flip=True):
+    """(sumber, nomor frame, waktu ms, frame RGB) dari video dan gambar.
+
+    Untuk video hanya setiap frame ke-every yang di-decode; sisanya cukup
+    di-grab. Gambar tunggal selalu frame 0. flip: mirror seperti kamera live.
+    """
+    import cv2
+
+    def to_rgb(frame):
+        if flip:
+            frame = cv2.flip(frame, 1)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+    for source in sources:
+        if source.lower().endswith(IMAGE_EXTENSIONS):
+            frame = cv2.imread(source)
+            if frame is None:
+                print(f"[ERROR] Gagal membaca gambar: {source}", file=sys.stderr)
+                continue
+            yield source, 0, 0.0, to_rgb(frame)
+            continue
+
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            print(f"[ERROR] Gagal membuka video: {source}", file=sys.stderr)
+            continue
+        try:
+            index = 0
+            while True:
+                if index % every:
+                    if not cap.grab():
+                        break
+                else:
+                    success, frame = cap.read()
+                    if not success:
+                        break
+                    yield source, index, round(cap.get(cv2.CAP_PROP_POS_MSEC), 1), to_rgb(frame)
+                index += 1
+        finally:
+            cap.release()
+
+
+class FrameReader:
+    """Decode iter_frames() di thread latar ke antrian terbatas (tanpa membuang frame)"""
+
+    _END = object()
+
+    def __init__(self, sources, every=1, flip=True, maxsize=DECODE_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize)
+        self._frames = iter_frames(sources, every, flip)
+        self.decoded = 0
+        self.decode_time = 0.0
+        self._thread = threading.Thread(target=self._run, name='batch-decoder', daemon=True)
+
+    def _run(self):
+        try:
+            while True:
+                start = time.monotonic()
+                item = next(self._frames, None)
+                self.decode_time += time.monotonic() - start
+                if item is None:
+                    break
+                self.decoded += 1
+                self._queue.put(item)
+        except Exception as e:
+            print(f"[ERROR] Decoder berhenti: {e}", file=sys.stderr)
+        finally:
+            self._queue.put(self._END)
+
+    def __iter__(self):
+        self._thread.start()
+        while True:
+            item = self._queue.get()
+            if item is self._END:
+                return
+            yield item
+
+
+def hand_features(results):
+    """Fitur (tangan x 42) dan handedness semua tangan dari hasil MediaPipe"""
+    X = extract_all_features(results)
+    handedness = [h.classification[0].label for h in results.multi_handedness or []]
+    return X, handedness
+
+
+def classify_block(art, gesture_names, block, with_features=True):
+    """Klasifikasi semua tangan dari sekumpulan frame dalam satu classify_batch"""
+    features = [X for _, X, _ in block if X is not None]
+    if features:
+        indices, _, match_ratio = art.classify_batch(np.concatenate(features))
+    row = 0
+    for (source, index, time_ms), X, handedness in block:
+        hands = []
+        for i in range(0 if X is None else len(X)):
+            idx = int(indices[row])
+            hand = {
+                'handedness': handedness[i] if i < len(handedness) else None,
+                'gesture_id': idx,
+                'gesture': gesture_names.get(idx, f"Unknown ({idx})") if idx >= 0 else None,
+                'match_ratio': round(float(match_ratio[row]), 3)
+            }
+            if with_features:
+                hand['features'] = X[i].tolist()
+            hands.append(hand)
+            row += 1
+        yield {'source': source, 'frame': index, 'time_ms': time_ms, 'hands': hands}
+
+
+def process(paths, art, gesture_names, workers=None, every=1, max_hands=2, flip=True,
+            with_features=True, stats=None):
+    """Yield satu record per frame (lihat docstring modul), urut sesuai sumber.
+
+    workers=0 menjalankan MediaPipe di proses ini (untuk debug); selain itu
+    HandsPool dengan `workers` proses (default jumlah CPU). Dengan satu
+    proses frame datang berurutan, jadi MediaPipe memakai mode tracking video.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    reader = FrameReader(iter_sources(paths), every, flip)
+    stats = stats if stats is not None else {}
+    stats.update(frames=0, hands=0)
+
+    if workers > 0:
+        # Pool dibuat sebelum thread decoder mulai (aman untuk fork)
+        hands = HandsPool(workers, max_hands=max_hands, static_image_mode=workers != 1)
+    else:
+        import mediapipe as mp
+        hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=max_hands,
+                                         min_detection_confidence=0.5)
+
+    # Future disimpan sesuai urutan frame: hasil dirakit ulang berurutan walau
+    # worker selesai tidak berurutan
+    max_pending = 4 * max(1, workers)
+    pending = deque()
+    block = []
+
+    def finish(meta, results):
+        X, handedness = hand_features(results.result() if workers > 0 else results)
+        block.append((meta, X, handedness))
+        stats['frames'] += 1
+        stats['hands'] += 0 if X is None else len(X)
+
+    try:
+        for source, index, time_ms, rgb in reader:
+            meta = (source, index, time_ms)
+            if workers > 0:
+                pending.append((meta, hands.submit(rgb)))
+                if len(pending) >= max_pending:
+                    finish(*pending.popleft())
+            else:
+                finish(meta, hands.process(rgb))
+            if len(block) >= CLASSIFY_BLOCK:
+                yield from classify_block(art, gesture_names, block, with_features)
+                block.clear()
+        while pending:
+            finish(*pending.popleft())
+        yield from classify_block(art, gesture_names, block, with_features)
+    finally:
+        hands.close()
+        stats['decode_time'] = round(reader.decode_time, 2)
+        if workers > 0:
+            stats['pool'] = hands.stats()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Label gesture offline dari file video dan folder gambar')
+    parser.add_argument('paths', nargs='+', help='file video, file gambar, atau folder')
+    parser.add_argument('--output', '-o', help='file JSON Lines (default stdout)')
+    parser.add_argument('--workers', type=int, default=None, help='jumlah proses MediaPipe (0 = di proses ini)')
+    parser.add_argument('--every', type=int, default=1, help='proses setiap frame ke-N video')
+    parser.add_argument('--max-hands', type=int, default=2)
+    parser.add_argument('--no-flip', action='store_true',
+                        help='jangan mirror frame (model dilatih dari frame kamera yang di-mirror)')
+    parser.add_argument('--no-features', action='store_true', help='hanya label, tanpa feature vector')
+    parser.add_argument('--benchmark', action='store_true', help='tanpa output record, hanya ringkasan kecepatan')
+    parser.add_argument('--model', default=MODEL_FILE)
+    args = parser.parse_args()
+
+    art, gesture_names = ModelFiles(args.model, WEIGHTS_FILE, NAMES_FILE).load()
+    print(f"[INFO] Model: {len(art.weights)} kategori, {len(gesture_names)} nama gesture", file=sys.stderr)
+
+    out = None
+    if not args.benchmark:
+        out = open(args.output, 'w') if args.output else sys.stdout
+    stats = {}
+    start = time.monotonic()
+    try:
+        for record in process(args.paths, art, gesture_names, workers=args.workers, every=max(1, args.every),
+                              max_hands=args.max_hands, flip=not args.no_flip,
+                              with_features=not args.no_features, stats=stats):
+            if out is not None:
+                out.write(json.dumps(record) + '\n')
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    elapsed = time.monotonic() - start
+    fps = stats['frames'] / elapsed if elapsed > 0 else 0.0
+    print(f"[INFO] {stats['frames']} frame, {stats['hands']} tangan dalam {elapsed:.1f}s "
+          f"({fps:.1f} fps, decode {stats['decode_time']}s)", file=sys.stderr)
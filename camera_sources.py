@@ -0,0 +1,218 @@
+"""Sumber kamera per id: webcam, file video, RTSP/HTTP, atau frame sintetis.
+
+    CAMERAS="lobby=0,kiosk1=rtsp://10.0.0.21/stream1,demo=rekaman/demo.mp4,tes=fake:640x480@15"
+
+parse_cameras() mengubah konfigurasi menjadi {id: source} (urut sesuai
+konfigurasi; entri tanpa "id=" memakai nomor urutnya sebagai id).
+open_source() membuka sumber menjadi objek mirip cv2.VideoCapture
+(read/grab/retrieve/release/isOpened):
+
+- angka: webcam lokal (indeks device)
+- rtsp://, rtmp://, http(s)://: stream jaringan, dibuka ulang otomatis saat putus
+- fake[:WxH@FPS]: frame sintetis dengan laju tetap, pengganti kamera RTSP
+  untuk tes lokal tanpa perangkat
+- path lain: file video, diputar berulang dengan laju fps aslinya seperti
+  kamera live
+"""
+import re
+import time
+
+import numpy as np
+
+STREAM_SCHEMES = ('rtsp://', 'rtmp://', 'http://', 'https://')
+# Laju file video jika fps di metadata tidak valid
+DEFAULT_FPS = 30.0
+# Percobaan buka ulang stream jaringan yang putus, jeda antar percobaan (detik)
+RECONNECT_RETRIES = 5
+RECONNECT_DELAY = 2.0
+
+_CAMERA_ID = re.compile(r'[A-Za-z0-9_-]+')
+_FAKE_SOURCE = re.compile(r'fake(?::(\d+)x(\d+))?(?:@(\d+(?:\.\d+)?))?')
+
+
+def parse_cameras(spec):
+    """"id=source,id=source" -> {id: source}; entri tanpa id memakai nomor urut"""
+    cameras = {}
+    entries = [entry.strip() for entry in spec.split(',') if entry.strip()]
+    for i, entry in enumerate(entries):
+        cam_id, sep, source = entry.partition('=')
+        if not sep or not _CAMERA_ID.fullmatch(cam_id.strip()):
+            # "=" milik source (mis. query string URL), bukan pemisah id
+            cam_id, source = str(i), entry
+        cam_id, source = cam_id.strip(), source.strip()
+        if cam_id == 'stream':
+            raise ValueError("Id kamera 'stream' dipakai oleh /api/gesture/stream")
+        if cam_id in cameras:
+            raise ValueError(f"Id kamera ganda: {cam_id}")
+        if not source:
+            raise ValueError(f"Source kamera '{cam_id}' kosong")
+        cameras[cam_id] = source
+    if not cameras:
+        raise ValueError('Tidak ada kamera di konfigurasi')
+    return cameras
+
+
+def describe_source(source):
+    """Source untuk ditampilkan di API: kredensial di URL disamarkan"""
+    return re.sub(r'//[^/@]+@', '//***@', source)
+
+
+class FramePacer:
+    """Menahan pemanggil agar frame keluar paling cepat setiap 1/fps detik"""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        delay = self._next - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        # Jika tertinggal, mulai jadwal baru dari sekarang (tanpa burst mengejar)
+        self._next = max(self._next + self.interval, time.monotonic())
+
+
+class SyntheticCapture:
+    """Frame sintetis (kotak bergerak) dengan laju tetap, untuk tes tanpa kamera"""
+
+    def __init__(self, width=640, height=480, fps=15.0):
+        self.shape = (height, width, 3)
+        self.index = 0
+        self._pacer = FramePacer(fps)
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def grab(self):
+        if not self._opened:
+            return False
+        self._pacer.wait()
+        self.index += 1
+        return True
+
+    def retrieve(self):
+        height, width, _ = self.shape
+        frame = np.full(self.shape, 40, dtype=np.uint8)
+        size = min(80, height, width)
+        x = (self.index * 8) % max(1, width - size)
+        y = (height - size) // 2
+        frame[y:y + size, x:x + size] = (0, 200, 255)
+        return True, frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        self._opened = False
+
+
+class FileCapture:
+    """File video yang diputar berulang dengan laju fps aslinya (seperti kamera live)"""
+
+    def __init__(self, path, loop=True):
+        import cv2
+
+        self.path = path
+        self.loop = loop
+        self._cap = cv2.VideoCapture(path)
+        fps = self._cap.get(cv2.CAP_PROP_FPS) if self._cap.isOpened() else 0.0
+        self._pacer = FramePacer(fps if 0 < fps <= 240 else DEFAULT_FPS)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def grab(self):
+        import cv2
+
+        self._pacer.wait()
+        if self._cap.grab():
+            return True
+        if not self.loop:
+            return False
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self._cap.grab()
+
+    def retrieve(self):
+        return self._cap.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        self._cap.release()
+
+
+class StreamCapture:
+    """Stream jaringan (RTSP/HTTP) yang dibuka ulang saat putus.
+
+    read()/grab() baru gagal setelah `retries` percobaan buka ulang gagal
+    berturut-turut, sehingga gangguan jaringan singkat tidak menghentikan
+    pipeline kamera.
+    """
+
+    def __init__(self, url, retries=RECONNECT_RETRIES, delay=RECONNECT_DELAY):
+        self.url = url
+        self.retries = retries
+        self.delay = delay
+        self.reconnects = 0
+        self._cap = self._open()
+
+    def _open(self):
+        import cv2
+
+        return cv2.VideoCapture(self.url, cv2.CAP_FFMPEG)
+
+    def _reconnect(self):
+        for _ in range(self.retries):
+            self._cap.release()
+            time.sleep(self.delay)
+            self._cap = self._open()
+            self.reconnects += 1
+            if self._cap.isOpened():
+                print(f"[INFO] Stream tersambung ulang: {describe_source(self.url)}")
+                return True
+        print(f"[ERROR] Stream tidak bisa dibuka ulang: {describe_source(self.url)}")
+        return False
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def grab(self):
+        while not self._cap.grab():
+            if not self._reconnect():
+                return False
+        return True
+
+    def retrieve(self):
+        return self._cap.retrieve()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def release(self):
+        self._cap.release()
+
+
+def open_source(source):
+    """Buka source kamera (lihat docstring modul) menjadi objek mirip cv2.VideoCapture"""
+    source = str(source).strip()
+    if source.isdigit():
+        import cv2
+
+        return cv2.VideoCapture(int(source))
+    fake = _FAKE_SOURCE.fullmatch(source)
+    if fake:
+        width, height, fps = fake.groups()
+        return SyntheticCapture(int(width or 640), int(height or 480), float(fps or 15))
+    if source.lower().startswith(STREAM_SCHEMES):
+        return StreamCapture(source)
+    return FileCapture(source)
@@ -2,16 +2,18 @@ import cv2
 import mediapipe as mp
 import numpy as np
 import os
-import csv
-import json
 import time
-from inference_sdk import InferenceHTTPClient
 import threading
 import requests
-from datetime import datetime
+from fuzzy_art import ModelFiles
+from model_snapshot import SharedModel
+import sample_store
+from feature_archive import FeatureArchive
+from frame_ring import FrameRing, RGBBuffer
+from pipeline import Pipeline
+from hand_detector import AsyncDetector, LandmarkTracker, NullDetector, create_detector, extract_all_features, parse_box
 try:
-    from openpyxl import Workbook, load_workbook
-    from openpyxl.styles import Font, PatternFill, Alignment
+    import openpyxl
     EXCEL_AVAILABLE = True
 except ImportError:
     EXCEL_AVAILABLE = False
@@ -19,179 +21,46 @@ except ImportError:
 # ========== CONFIGURATION ==========
 WEIGHTS_FILE = 'model_art_weights.csv' 
 NAMES_FILE = 'model_art_names.csv'
+MODEL_FILE = 'model_art.bin'
 GESTURE_DATA_DIR = 'gesture_data'
+ARCHIVE_DIR = 'gesture_archive'
+# Sampel baru di arsip fitur dan journal model di-fsync bersama paling lambat setiap interval
+# ini (detik); saat listrik padam keduanya kehilangan paling banyak jendela yang sama
+ARCHIVE_FLUSH_INTERVAL = 1.0
+SAMPLE_LOG_FILE = 'gestures_log.db'
+EXCEL_FILE = 'gestures_data.xlsx'
 
 os.makedirs(GESTURE_DATA_DIR, exist_ok=True)
 
 ROBOFLOW_API_KEY = "5vFdrINv9FtzcV3AztHzI" 
 ROBOFLOW_MODEL_ID = "object-dect-qhvpj/3" 
 ROBOFLOW_URL = "https://detect.roboflow.com"
+# Umur maksimum (detik) kotak tangan dari stage deteksi sebelum dianggap basi
+DETECTOR_MAX_AGE = 0.5
+# Kapasitas antrian antar stage pipeline; frame tertua dibuang jika penuh
+PIPELINE_QUEUE_SIZE = 1
+# Backend detektor tangan: roboflow | onnx | mediapipe | fake
+HAND_DETECTOR = os.getenv('HAND_DETECTOR', 'roboflow')
+HAND_DETECTOR_MODEL = os.getenv('HAND_DETECTOR_MODEL', 'models/hand_detector.onnx')
+HAND_DETECTOR_FAKE_BOX = os.getenv('HAND_DETECTOR_FAKE_BOX', '')
+# Crop berikutnya dari landmark frame sebelumnya (HAND_TRACKING=0: detektor tiap frame)
+HAND_TRACKING = os.getenv('HAND_TRACKING', '1') != '0'
+# Jumlah tangan per frame (MAX_HANDS=2 untuk isyarat dua tangan, tanpa crop detektor)
+MAX_HANDS = max(1, int(os.getenv('MAX_HANDS', '1')))
+# Slot frame di ring shared memory antara capture dan stage hilir
+RING_SLOTS = 8
 
+# Parameter Fuzzy ART untuk model baru (implementasi di fuzzy_art.py)
 RHO = 0.90
 ALPHA = 0.001
 BETA = 1.0
 
-# ========== FUZZY ART CLASS ==========
-class FuzzyART:
-    def __init__(self, rho=RHO, alpha=ALPHA, beta=BETA):
-        self.rho = rho
-        self.alpha = alpha
-        self.beta = beta
-        self.weights = []
-
-    def complement_coding(self, x):
-        x = np.clip(x, 0, 1)
-        return np.concatenate((x, 1 - x))
-
-    def classify(self, x_raw):
-        if len(self.weights) == 0: 
-            return -1
-        x = self.complement_coding(x_raw)
-
-        T = []
-        for W_j in self.weights:
-            fuzzy_and = np.minimum(x, W_j)
-            T_j = np.sum(fuzzy_and) / (self.alpha + np.sum(W_j))
-            T.append(T_j)
-        
-        j_star = np.argmax(T)
-        W_jstar = self.weights[j_star]
-        match_ratio = np.sum(np.minimum(x, W_jstar)) / np.sum(x)
-
-        if match_ratio >= self.rho: 
-            return j_star
-        else: 
-            return -2
-
 # ========== MODEL FUNCTIONS ==========
-def save_model_csv(art_model, gesture_names):
-    with open(WEIGHTS_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
-        for w in art_model.weights:
-            writer.writerow(w) 
-    
-    with open(NAMES_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["id", "name"])
-        for idx, name in gesture_names.items():
-            writer.writerow([idx, name])
-
-def load_model_csv():
-    art = FuzzyART()
-    names = {}
-    
-    if os.path.exists(WEIGHTS_FILE):
-        with open(WEIGHTS_FILE, 'r') as f:
-            reader = csv.reader(f)
-            loaded_weights = []
-            for row in reader:
-                if not row: continue
-                try:
-                    w_vec = np.array(row, dtype=np.float32)
-                    loaded_weights.append(w_vec)
-                except ValueError:
-                    pass
-            art.weights = loaded_weights
-
-    if os.path.exists(NAMES_FILE):
-        with open(NAMES_FILE, 'r') as f:
-            reader = csv.reader(f)
-            next(reader, None)
-            for row in reader:
-                if len(row) >= 2:
-                    try:
-                        idx = int(row[0])
-                        label = row[1]
-                        names[idx] = label
-                    except ValueError:
-                        continue
-    
-    return art, names
-
-def save_to_excel(gesture_name, features, confidence, timestamp=None):
-    """Simpan gesture data real-time ke Excel"""
-    if not EXCEL_AVAILABLE:
-        return False
-    
-    try:
-        excel_file = 'gestures_data.xlsx'
-        
-        # Cek apakah file sudah ada
-        if os.path.exists(excel_file):
-            wb = load_workbook(excel_file)
-            ws = wb.active
-        else:
-            # Buat workbook baru dengan header
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Gestures"
-            
-            # Header styling
-            headers = ["No", "Gesture Name", "Timestamp", "Confidence", "Features (Sample)"]
-            ws.append(headers)
-            
-            # Style header
-            header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-            header_font = Font(bold=True, color="FFFFFF")
-            
-            for cell in ws[1]:
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Tambah data baru
-        row_num = ws.max_row + 1
-        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # Format features (ambil 5 pertama sebagai sample)
-        if isinstance(features, (list, np.ndarray)):
-            features_sample = ', '.join([f"{f:.3f}" for f in features[:5]]) + "..."
-        else:
-            features_sample = str(features)
-        
-        ws.append([row_num - 1, gesture_name, timestamp, f"{confidence:.2f}", features_sample])
-        
-        # Set column widths
-        ws.column_dimensions['A'].width = 5
-        ws.column_dimensions['B'].width = 15
-        ws.column_dimensions['C'].width = 20
-        ws.column_dimensions['D'].width = 12
-        ws.column_dimensions['E'].width = 35
-        
-        # Center alignment untuk beberapa kolom
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=4):
-            for cell in row:
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Save file
-        wb.save(excel_file)
-        return True
-    except Exception as e:
-        print(f"[ERROR] Failed to save to Excel: {e}")
-        return False
-
-def extract_features(results):
-    if not results.multi_hand_landmarks: 
-        return None
-    hand_landmarks = results.multi_hand_landmarks[0]
-    base_x = hand_landmarks.landmark[0].x
-    base_y = hand_landmarks.landmark[0].y
-    feature_vector = []
-    for lm in hand_landmarks.landmark:
-        norm_x = (lm.x - base_x) + 0.5
-        norm_y = (lm.y - base_y) + 0.5
-        feature_vector.append(max(0.0, min(1.0, norm_x)))
-        feature_vector.append(max(0.0, min(1.0, norm_y)))
-    return np.array(feature_vector, dtype=np.float32)
-
 def save_gesture_sample(gesture_name, feature_vector):
-    """Simpan gesture sample ke file JSON dan ART model"""
-    global art, gesture_names
-    
+    """Simpan gesture sample ke arsip fitur dan ART model (aman dipanggil dari banyak thread)"""
     timestamp = int(time.time() * 1000)
-    filename = os.path.join(GESTURE_DATA_DIR, f"{gesture_name}_{timestamp}.json")
     
-    # Ensure feature_vector is converted to list for JSON
+    # Ensure feature_vector is converted to list for the sample log
     if isinstance(feature_vector, np.ndarray):
         features_list = feature_vector.tolist()
         vec = feature_vector
@@ -201,72 +70,49 @@ def save_gesture_sample(gesture_name, feature_vector):
     else:
         raise ValueError(f"Invalid feature_vector type: {type(feature_vector)}")
     
-    data = {
-        'gesture': gesture_name,
-        'timestamp': timestamp,
-        'features': features_list
-    }
-    
-    with open(filename, 'w') as f:
-        json.dump(data, f)
-    
-    # Train ke model ART
-    x = np.clip(vec, 0, 1)
-    x = np.concatenate((x, 1 - x))  # Complement coding
+    # Simpan ke arsip fitur terpaket (pengganti satu file JSON per sampel)
+    filename = os.path.join(ARCHIVE_DIR, feature_archive.append(gesture_name, vec, timestamp, flush=False))
     
-    if len(art.weights) == 0:
-        art.weights.append(x)
-        idx = 0
-    else:
-        # Classify first to find closest match
-        T = []
-        for W_j in art.weights:
-            fuzzy_and = np.minimum(x, W_j)
-            T_j = np.sum(fuzzy_and) / (ALPHA + np.sum(W_j))
-            T.append(T_j)
-        
-        sorted_indices = np.argsort(T)[::-1]
-        idx = None
-        
-        # Check vigilance
-        for j_star in sorted_indices:
-            W_jstar = art.weights[int(j_star)]
-            match_ratio = np.sum(np.minimum(x, W_jstar)) / np.sum(x)
-            
-            if match_ratio >= RHO:
-                # Update weight
-                new_weight = BETA * np.minimum(x, W_jstar) + (1 - BETA) * W_jstar
-                art.weights[int(j_star)] = new_weight
-                idx = int(j_star)
-                break
-        
-        if idx is None:
-            # Create new category
-            art.weights.append(x)
-            idx = int(len(art.weights) - 1)
-    
-    gesture_names[int(idx)] = gesture_name
-    
-    # Save model
-    save_model_csv(art, gesture_names)
-    # Save to Excel (real-time) if available
-    try:
-        timestamp_str = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d %H:%M:%S")
-        save_to_excel(gesture_name, features_list, 0.95, timestamp_str)
-    except Exception:
-        pass
+    # Train ke salinan model; thread inferensi tetap memakai snapshot lama sampai edit selesai
+    with model.edit() as (art, gesture_names):
+        idx = art.train_single_input(vec)
+        gesture_names[int(idx)] = gesture_name
+        # Save model (append ke journal, snapshot dikompaksi di latar belakang)
+        model_files.record(idx, art.weights[idx], gesture_name)
+    # Catat ke log sampel (Excel dibangun saat diekspor)
+    sample_log.append(gesture_name, features_list, 0.95, timestamp)
 
     return filename, int(idx)
 
+def build_hand_detector():
+    """Buat detektor sesuai HAND_DETECTOR; jatuh ke MediaPipe saja jika gagal"""
+    try:
+        detector = create_detector(HAND_DETECTOR, confidence=0.5,
+                                   roboflow_url=ROBOFLOW_URL, roboflow_api_key=ROBOFLOW_API_KEY,
+                                   roboflow_model_id=ROBOFLOW_MODEL_ID,
+                                   onnx_model=HAND_DETECTOR_MODEL,
+                                   fake_box=parse_box(HAND_DETECTOR_FAKE_BOX))
+        print(f"[INFO] Hand detector: {HAND_DETECTOR}")
+        return detector
+    except Exception as e:
+        print(f"[ERROR] Hand detector '{HAND_DETECTOR}' unavailable ({e}), using MediaPipe only")
+        return NullDetector()
+
 # ========== GLOBAL STATE ==========
-art, gesture_names = load_model_csv()
-yolo_client = InferenceHTTPClient(api_url=ROBOFLOW_URL, api_key=ROBOFLOW_API_KEY)
+model_files = ModelFiles(MODEL_FILE, WEIGHTS_FILE, NAMES_FILE, RHO, ALPHA, BETA,
+                         sync_interval=ARCHIVE_FLUSH_INTERVAL)
+sample_log = sample_store.SampleLog(SAMPLE_LOG_FILE, legacy_excel=EXCEL_FILE, json_dir=GESTURE_DATA_DIR)
+feature_archive = FeatureArchive(ARCHIVE_DIR, flush_interval=ARCHIVE_FLUSH_INTERVAL)
+model = SharedModel(*model_files.load())
+hand_detector = AsyncDetector(build_hand_detector(), max_age=DETECTOR_MAX_AGE)
+hand_tracker = LandmarkTracker(pad=30, enabled=HAND_TRACKING)
 
 mp_hands = mp.solutions.hands
 mp_draw = mp.solutions.drawing_utils
-hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5)
+hands = mp_hands.Hands(static_image_mode=False, max_num_hands=MAX_HANDS, min_detection_confidence=0.5)
 
 cap = cv2.VideoCapture(0)
+rgb_buffer = RGBBuffer()
 
 gesture_counter = 0  # Counter untuk auto naming
 last_features = None
@@ -274,6 +120,7 @@ last_gesture_idx = -1
 auto_save_unknown = False  # Toggle untuk auto-save gesture yang tidak dikenal
 unknown_counter = 0  # Counter untuk unknown gesture
 last_saved_gesture_bytes = None  # Untuk deduplikasi
+lock = threading.Lock()  # counter auto-save (model punya lock sendiri di SharedModel)
 
 print("\n" + "="*60)
 print("  HAND GESTURE RECOGNITION - KEYBOARD CONTROL")
@@ -282,92 +129,116 @@ print("\nKontrol Keyboard:")
 print("  [t] - Simpan gesture saat ini dengan auto-naming")
 print("  [n] - Simpan dengan custom name (input via terminal)")
 print("  [s] - Simpan model ke CSV")
+print("  [e] - Ekspor log sampel ke Excel")
 print("  [a] - Toggle auto-save untuk gesture yang tidak dikenal")
+print("  [p] - Tampilkan statistik pipeline")
 print("  [r] - Reset counter")
 print("  [q] - Quit")
 print("\n" + "="*60 + "\n")
 
-def main():
-    global gesture_counter, last_features, last_gesture_idx, art, gesture_names
+def process_frame(frame):
+    """Stage inferensi: deteksi tangan, MediaPipe, klasifikasi Fuzzy ART semua tangan"""
+    global last_features, last_gesture_idx, unknown_counter, last_saved_gesture_bytes
     
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
-        
-        frame = cv2.flip(frame, 1)
-        display_frame = frame.copy()
-        
-        status = "Mencari Tangan..."
-        color = (255, 255, 0)
-        vec = None
-        cropped_frame = None
-        confidence = 0.0
+    status = "Mencari Tangan..."
+    color = (255, 255, 0)
+    cropped_frame = None
+    confidence = 0.0
 
-        # ROBOFLOW DETECTION
-        try:
-            predictions = yolo_client.infer(display_frame, model_id=ROBOFLOW_MODEL_ID, confidence=0.5)
-            
-            if predictions and 'predictions' in predictions:
-                hand_predictions = [p for p in predictions['predictions'] if p['class'].lower() == 'hand']
-                if hand_predictions:
-                    best_pred = max(hand_predictions, key=lambda x: x['confidence'])
-                    x_min, y_min, x_max, y_max = int(best_pred['x_min']), int(best_pred['y_min']), int(best_pred['x_max']), int(best_pred['y_max'])
-                    
-                    pad = 30 
-                    H, W, _ = frame.shape
-                    x_min = max(0, x_min - pad)
-                    y_min = max(0, y_min - pad)
-                    x_max = min(W, x_max + pad)
-                    y_max = min(H, y_max + pad)
-                    
-                    cv2.rectangle(display_frame, (x_min, y_min), (x_max, y_max), (255, 0, 0), 2)
-                    cropped_frame = frame[y_min:y_max, x_min:x_max]
-                    confidence = best_pred.get('confidence', 0.0)
-        except:
-            pass
-        
-        # MEDIAPIPE PROCESSING
-        frame_to_process = cropped_frame if cropped_frame is not None and cropped_frame.size > 0 else frame
-        rgb_frame = cv2.cvtColor(frame_to_process, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb_frame)
+    # HAND DETECTION: crop dari landmark frame sebelumnya, detektor asinkron
+    # hanya dipakai saat tracking lepas (kotak terakhirnya dipakai ulang).
+    # Detektor hanya memberi satu kotak, jadi mode banyak tangan memakai frame penuh
+    roi, confidence, tracked = hand_tracker.next_roi(hand_detector if MAX_HANDS == 1 else None, frame)
+    if roi is not None:
+        x_min, y_min, x_max, y_max = roi
+        cropped_frame = frame[y_min:y_max, x_min:x_max]
+        if cropped_frame.size == 0:
+            roi, cropped_frame = None, None
+    
+    # MEDIAPIPE PROCESSING
+    frame_to_process = cropped_frame if cropped_frame is not None else frame
+    results = hands.process(rgb_buffer.convert(frame_to_process))
+    hand_tracker.update(results, roi, frame.shape)
+
+    # Overlay digambar di salinan privat, tidak pernah di slot ring
+    display_frame = frame.copy()
+    if roi is not None:
+        cv2.rectangle(display_frame, (x_min, y_min), (x_max, y_max), (0, 255, 255) if tracked else (255, 0, 0), 2)
 
-        if results.multi_hand_landmarks:
-            mp_draw.draw_landmarks(display_frame, results.multi_hand_landmarks[0], mp_hands.HAND_CONNECTIONS)
-            vec = extract_features(results)
+    if results.multi_hand_landmarks:
+        for hand_landmarks in results.multi_hand_landmarks:
+            mp_draw.draw_landmarks(display_frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+        
+        # Semua tangan diklasifikasi dalam satu panggilan batch dari snapshot model
+        X = extract_all_features(results)
+        snap = model.snapshot()
+        indices, _, _ = snap.art.classify_batch(X)
+        handedness = [h.classification[0].label for h in results.multi_handedness or []]
+        labels = []
+        
+        for i, (vec, idx) in enumerate(zip(X, indices)):
+            idx = int(idx)
+            hand_status, hand_color, hand_confidence, name = "Mencari Tangan...", (255, 255, 0), confidence, None
             
-            if vec is not None:
-                idx = art.classify(vec)     
+            if idx >= 0:
+                name = snap.names.get(idx, f"Unknown ({idx})")
+                hand_status = f"Gesture: {name}"
+                hand_color = (0, 255, 0)
+                hand_confidence = 0.95
+            elif idx == -2:
+                hand_status = "Tidak Dikenal"
+                hand_color = (0, 0, 255)
+                hand_confidence = 0.5
                 
-                if idx >= 0:
-                    name = gesture_names.get(idx, f"Unknown ({idx})")
-                    status = f"Gesture: {name}"
-                    color = (0, 255, 0)
-                    confidence = 0.95
-                elif idx == -2:
-                    status = "Tidak Dikenal"
-                    color = (0, 0, 255)
-                    confidence = 0.5
-                    
-                    # Auto-save gesture yang tidak dikenal
-                    if auto_save_unknown and last_saved_gesture_bytes != vec.tobytes():
-                        try:
+                # Auto-save gesture yang tidak dikenal
+                if auto_save_unknown and last_saved_gesture_bytes != vec.tobytes():
+                    try:
+                        with lock:
                             gesture_name = f"unknown_{unknown_counter}"
-                            filename, gesture_id = save_gesture_sample(gesture_name, vec)
-                            last_saved_gesture_bytes = vec.tobytes()
                             unknown_counter += 1
-                            status = f"Auto-saved: {gesture_name}"
-                            color = (0, 165, 255)  # Orange
-                        except Exception as e:
-                            print(f"[ERROR] Auto-save failed: {e}")
-                
+                        filename, gesture_id = save_gesture_sample(gesture_name, vec)
+                        last_saved_gesture_bytes = vec.tobytes()
+                        hand_status = f"Auto-saved: {gesture_name}"
+                        hand_color = (0, 165, 255)  # Orange
+                    except Exception as e:
+                        print(f"[ERROR] Auto-save failed: {e}")
+            
+            if i == 0:
+                # Tangan pertama dipakai untuk [t]/[n] dan status utama
+                status, color, confidence = hand_status, hand_color, hand_confidence
                 last_features = vec
                 last_gesture_idx = idx
+            labels.append(f"{handedness[i] if i < len(handedness) else i + 1}: {name or hand_status}")
+        
+        if len(labels) > 1:
+            status = ' | '.join(labels)
+    
+    return display_frame, status, color, confidence
+
+def print_pipeline_stats(pipeline):
+    for stage in pipeline.stats():
+        print(f"[STATS] {stage['stage']:<10} " + ' '.join(f"{k}={v}" for k, v in stage.items() if k != 'stage'))
+    print("[STATS] model      " + ' '.join(f"{k}={v}" for k, v in model.snapshot().art.search_stats().items()))
+
+def main():
+    global gesture_counter, auto_save_unknown
+    
+    pipeline = Pipeline(cap, [('inference', process_frame)],
+                        transform=lambda frame, dst: cv2.flip(frame, 1, dst=dst),
+                        queue_size=PIPELINE_QUEUE_SIZE, ring=FrameRing(RING_SLOTS)).start()
+    
+    while True:
+        item = pipeline.output.get(timeout=1.0)
+        if item is None:
+            if pipeline.output.closed:
+                break
+            continue
+        display_frame, status, color, confidence = item
 
         # UI
         cv2.rectangle(display_frame, (0, 0), (640, 120), (0, 0, 0), -1)
         cv2.putText(display_frame, status, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        cv2.putText(display_frame, f"Confidence: {confidence:.2f} | Categories: {len(art.weights)}", (20, 75), cv2.FONT_ITALIC, 0.5, (200, 200, 200), 1)
+        cv2.putText(display_frame, f"Confidence: {confidence:.2f} | Categories: {len(model.snapshot().art.weights)}", (20, 75), cv2.FONT_ITALIC, 0.5, (200, 200, 200), 1)
         cv2.putText(display_frame, f"Press [t] to save | Counter: {gesture_counter}", (20, 110), cv2.FONT_ITALIC, 0.5, (100, 200, 255), 1)
         
         cv2.imshow("Hand Gesture Recognition", display_frame)
@@ -405,9 +276,20 @@ def main():
                 print("[ERROR] Hand tidak terdeteksi. Silakan tunjukkan gesture terlebih dahulu.")
         
         elif key == ord('s'):
-            # Save model
-            save_model_csv(art, gesture_names)
-            print(f"[OK] Model saved! Total categories: {len(art.weights)}")
+            # Save model (biner + ekspor CSV)
+            with model.read() as snap:
+                model_files.save(snap.art, snap.names)
+            print(f"[OK] Model saved! Total categories: {len(snap.art.weights)}")
+        
+        elif key == ord('e'):
+            # Bangun file Excel dari log sampel
+            if not EXCEL_AVAILABLE:
+                print("[ERROR] openpyxl tidak terpasang, ekspor Excel tidak tersedia.")
+            else:
+                try:
+                    print(f"[OK] Excel diekspor ke {sample_log.export_excel(EXCEL_FILE)}")
+                except Exception as e:
+                    print(f"[ERROR] Failed to export Excel: {e}")
         
         elif key == ord('a'):
             # Toggle auto-save untuk gesture yang tidak dikenal
@@ -415,6 +297,10 @@ def main():
             status_msg = "ENABLED" if auto_save_unknown else "DISABLED"
             print(f"[INFO] Auto-save: {status_msg}")
         
+        elif key == ord('p'):
+            # Statistik per stage pipeline
+            print_pipeline_stats(pipeline)
+        
         elif key == ord('r'):
             # Reset counter
             gesture_counter = 0
@@ -425,6 +311,9 @@ def main():
             print("\n[EXIT] Closing application...")
             break
 
+    pipeline.stop()
+    hand_detector.stop()
+    feature_archive.close()
     cap.release()
     cv2.destroyAllWindows()
     print("[OK] Application closed")
@@ -1,18 +1,19 @@
-import cv2
-import mediapipe as mp
 import numpy as np
 import os
 import csv
 import time
 import glob
 
-# [PENTING] Import yang benar untuk klien HTTP Roboflow
-from inference_sdk import InferenceHTTPClient
+from lazy_init import LazyModule
+from fuzzy_art import ModelFiles
+import sample_store
+from feature_archive import FeatureArchive, iter_csv_chunks
+from hand_detector import AsyncDetector, LandmarkTracker, NullDetector, create_detector, extract_all_features, parse_box
 
-CLIENT = InferenceHTTPClient(
-    api_url="https://serverless.roboflow.com",
-    api_key="5vFdrINv9FtzcV3AztHz"
-)
+# cv2 dan mediapipe hanya dibutuhkan loop kamera (main); perintah train/export
+# yang hanya menyentuh model tidak ikut menunggu impornya
+cv2 = LazyModule('cv2')
+mp = LazyModule('mediapipe')
 
 
 
@@ -24,6 +25,12 @@ CLIENT = InferenceHTTPClient(
 # File untuk menyimpan memori model ART
 WEIGHTS_FILE = 'model_art_weights.csv' 
 NAMES_FILE = 'model_art_names.csv'      
+# Format biner (header + matriks bobot) yang dimuat via mmap, plus journal
+MODEL_FILE = 'model_art.bin'
+# Katalog sampel yang direkam lewat app.py / capture_gestures.py
+SAMPLE_LOG_FILE = 'gestures_log.db'
+# Arsip fitur terpaket (hasil simpan sampel + migrasi JSON/CSV)
+ARCHIVE_DIR = 'gesture_archive'
 
 # Daftar folder dataset CSV (Roboflow dan Custom)
 DATASET_FOLDERS = [
@@ -38,141 +45,29 @@ ROBOFLOW_MODEL_ID = "object-dect-qhvpj/3"
 ROBOFLOW_URL = "https://detect.roboflow.com"
 ROBOFLOW_SERVERLESS_URL = "https://serverless.roboflow.com"  # For serverless inference (no server needed)
 
+# Backend detektor tangan: roboflow | onnx | mediapipe | fake
+HAND_DETECTOR = os.getenv('HAND_DETECTOR', 'roboflow')
+HAND_DETECTOR_MODEL = os.getenv('HAND_DETECTOR_MODEL', 'models/hand_detector.onnx')
+HAND_DETECTOR_FAKE_BOX = os.getenv('HAND_DETECTOR_FAKE_BOX', '')
+# Crop berikutnya dari landmark frame sebelumnya (HAND_TRACKING=0: detektor tiap frame)
+HAND_TRACKING = os.getenv('HAND_TRACKING', '1') != '0'
+# Jumlah tangan per frame (MAX_HANDS=2 untuk isyarat dua tangan, tanpa crop detektor)
+MAX_HANDS = max(1, int(os.getenv('MAX_HANDS', '1')))
+# Umur maksimum (detik) kotak tangan dari stage deteksi sebelum dianggap basi
+DETECTOR_MAX_AGE = 0.5
+
 # Parameter Algoritma Fuzzy ART
 RHO = 0.90    # Vigilance (Kewaspadaan)
 ALPHA = 0.001 # Choice parameter
 BETA = 1.0    # Learning Rate (Fast Learning)
 
-# ==========================================
-# 2. ALGORITMA FUZZY ART (CORE)
-# ==========================================
-class FuzzyART:
-    def __init__(self, rho=RHO, alpha=ALPHA, beta=BETA):
-        self.rho = rho
-        self.alpha = alpha
-        self.beta = beta
-        self.weights = [] # List of numpy arrays
-
-    def complement_coding(self, x):
-        """Transformasi wajib untuk Fuzzy ART: [input, 1-input]"""
-        x = np.clip(x, 0, 1)
-        return np.concatenate((x, 1 - x))
-
-    def train_single_input(self, x_raw):
-        """Melatih model secara inkremental"""
-        x = self.complement_coding(x_raw)
-        
-        if len(self.weights) == 0:
-            self.weights.append(x)
-            return 0
-
-        # Pattern Matching
-        T = []
-        for W_j in self.weights:
-            fuzzy_and = np.minimum(x, W_j)
-            T_j = np.sum(fuzzy_and) / (self.alpha + np.sum(W_j))
-            T.append(T_j)
-        
-        sorted_indices = np.argsort(T)[::-1]
-
-        # Vigilance Test & Resonance
-        for j_star in sorted_indices:
-            W_jstar = self.weights[j_star]
-            match_ratio = np.sum(np.minimum(x, W_jstar)) / np.sum(x)
-
-            if match_ratio >= self.rho:
-                # Update Bobot
-                new_weight = self.beta * np.minimum(x, W_jstar) + (1 - self.beta) * W_jstar
-                self.weights[j_star] = new_weight
-                return j_star
-
-        # Reset (Kategori Baru)
-        self.weights.append(x)
-        return len(self.weights) - 1
-
-    def classify(self, x_raw):
-        """Mengklasifikasikan input"""
-        if len(self.weights) == 0: return -1
-        x = self.complement_coding(x_raw)
-
-        T = []
-        for W_j in self.weights:
-            fuzzy_and = np.minimum(x, W_j)
-            T_j = np.sum(fuzzy_and) / (self.alpha + np.sum(W_j))
-            T.append(T_j)
-        
-        j_star = np.argmax(T)
-        W_jstar = self.weights[j_star]
-        match_ratio = np.sum(np.minimum(x, W_jstar)) / np.sum(x)
-
-        if match_ratio >= self.rho: return j_star
-        else: return -2 # Tidak Dikenal
-
-# ==========================================
-# 3. FUNGSI MUAT & SIMPAN MODEL (CSV)
-# ==========================================
-def save_model_csv(art_model, gesture_names):
-    """Menyimpan bobot dan nama ke dua file CSV."""
-    print("\n[INFO] Menyimpan model ke CSV...")
-    
-    # A. Simpan Bobot (Weights)
-    with open(WEIGHTS_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
-        for w in art_model.weights:
-            writer.writerow(w) 
-    
-    # B. Simpan Nama Gesture (Names)
-    with open(NAMES_FILE, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(["id", "name"]) # Header
-        for idx, name in gesture_names.items():
-            writer.writerow([idx, name])
-            
-    print(f" -> Bobot disimpan ke: {WEIGHTS_FILE}")
-    print(f" -> Nama disimpan ke : {NAMES_FILE}")
-
-def load_model_csv():
-    """Memuat bobot dan nama dari CSV."""
-    art = FuzzyART()
-    names = {}
-    
-    # A. Muat Bobot
-    if os.path.exists(WEIGHTS_FILE):
-        print(f"[INFO] Memuat bobot dari {WEIGHTS_FILE}...")
-        with open(WEIGHTS_FILE, 'r') as f:
-            reader = csv.reader(f)
-            loaded_weights = []
-            for row in reader:
-                if not row: continue
-                try:
-                    w_vec = np.array(row, dtype=np.float32)
-                    loaded_weights.append(w_vec)
-                except ValueError:
-                    print(f"[ERROR] Gagal memuat baris: {row}. Cek format CSV.")
-            art.weights = loaded_weights
-        print(f" -> {len(art.weights)} kategori bobot dimuat.")
-    else:
-        print(f"[INFO] File bobot {WEIGHTS_FILE} tidak ditemukan. Membuat model baru.")
+# Jumlah baris CSV yang dibaca per blok saat pre-training massal
+TRAIN_CHUNK_ROWS = 65536
 
-    # B. Muat Nama
-    if os.path.exists(NAMES_FILE):
-        print(f"[INFO] Memuat nama dari {NAMES_FILE}...")
-        with open(NAMES_FILE, 'r') as f:
-            reader = csv.reader(f)
-            next(reader, None) # Skip Header
-            for row in reader:
-                if len(row) >= 2:
-                    try:
-                        idx = int(row[0])
-                        label = row[1]
-                        names[idx] = label
-                    except ValueError:
-                        continue
-    
-    return art, names
+model_files = ModelFiles(MODEL_FILE, WEIGHTS_FILE, NAMES_FILE, RHO, ALPHA, BETA, verbose=True)
 
 # ==========================================
-# 4. FUNGSI UTILITAS
+# 2. FUNGSI UTILITAS
 # ==========================================
 def test_inference(image_urls=None, model_id=None):
     """
@@ -200,6 +95,8 @@ def test_inference(image_urls=None, model_id=None):
     print(f"Testing {len(image_urls)} image(s)...\n")
     
     try:
+        # [PENTING] Import yang benar untuk klien HTTP Roboflow
+        from inference_sdk import InferenceHTTPClient
         client = InferenceHTTPClient(
             api_url=ROBOFLOW_SERVERLESS_URL,
             api_key=ROBOFLOW_API_KEY
@@ -232,33 +129,34 @@ def test_inference(image_urls=None, model_id=None):
     return all_results
 
 # ==========================================
-# 5. FUNGSI UTILITAS
+# 3. FUNGSI UTILITAS
 # ==========================================
-def extract_features(results):
-    """Mengubah Landmark MediaPipe menjadi Vektor Fitur (42D)"""
-    if not results.multi_hand_landmarks: return None
-    hand_landmarks = results.multi_hand_landmarks[0]
-    base_x = hand_landmarks.landmark[0].x
-    base_y = hand_landmarks.landmark[0].y
-    feature_vector = []
-    for lm in hand_landmarks.landmark:
-        # Normalisasi Relatif terhadap pergelangan tangan (wrist)
-        norm_x = (lm.x - base_x) + 0.5
-        norm_y = (lm.y - base_y) + 0.5
-        feature_vector.append(max(0.0, min(1.0, norm_x)))
-        feature_vector.append(max(0.0, min(1.0, norm_y)))
-    return np.array(feature_vector, dtype=np.float32)
+def train_datasets(art_model, gesture_names, folders, bulk=True):
+    """Melatih ART dari multiple folder CSV dataset (Non-Real-Time/Pre-training).
 
-def train_datasets(art_model, gesture_names, folders):
-    """Melatih ART dari multiple folder CSV dataset (Non-Real-Time/Pre-training)."""
+    bulk=True membaca CSV per blok dan memakai FuzzyART.train_batch;
+    bulk=False memakai jalur lama baris demi baris (train_single_input).
+    Keduanya menghasilkan kategori yang sama untuk urutan input yang sama.
+    """
     print("\n--- CEK DATASET TAMBAHAN (PRE-TRAINING) ---")
     total = 0
+    start_time = time.time()
     for folder in folders:
         if not os.path.exists(folder): continue
         csv_files = glob.glob(os.path.join(folder, "*.csv"))
         
         for file_path in csv_files:
             label = os.path.basename(file_path).replace(".csv", "")
+            if bulk:
+                for block in iter_csv_chunks(file_path, TRAIN_CHUNK_ROWS):
+                    if len(art_model.weights) > 0 and 2 * block.shape[1] != art_model.weights.shape[1]:
+                        continue
+                    assigned = art_model.train_batch(block)
+                    for idx in np.unique(assigned):
+                        gesture_names[int(idx)] = label
+                    total += len(block)
+                continue
+
             with open(file_path, 'r') as f:
                 reader = csv.reader(f)
                 next(reader, None) # Skip header
@@ -274,38 +172,73 @@ def train_datasets(art_model, gesture_names, folders):
                         total += 1
                     except: continue
     if total > 0:
-        print(f"-> Berhasil mempelajari {total} sampel baru dari dataset.")
+        print(f"-> Berhasil mempelajari {total} sampel baru dari dataset ({time.time() - start_time:.1f}s).")
+        if art_model.searches:
+            print(f"-> Rata-rata kandidat diperiksa per sampel: {art_model.search_stats()['mean_examined']}")
     else:
         print("-> Tidak ada data baru dilatih.")
 
 
+def train_archive(art_model, gesture_names, archive_dir=ARCHIVE_DIR):
+    """Melatih ART dari arsip fitur terpaket, satu segmen (mmap) per train_batch.
+
+    Urutan sampel sama dengan urutan di arsip, dan nama kategori mengikuti
+    sampel terakhir yang masuk ke kategori tersebut (sama seperti pelatihan
+    baris demi baris).
+    """
+    print("\n--- PRE-TRAINING DARI ARSIP FITUR ---")
+    if not os.path.isdir(archive_dir):
+        print(f"-> Arsip {archive_dir} tidak ditemukan.")
+        return
+    total = 0
+    start_time = time.time()
+    for seg in FeatureArchive(archive_dir).segments():
+        if len(art_model.weights) > 0 and 2 * seg.features.shape[1] != art_model.weights.shape[1]:
+            continue
+        assigned = art_model.train_batch(seg.features)
+        # Indeks kemunculan terakhir setiap kategori dalam segmen ini
+        last = len(assigned) - 1 - np.unique(assigned[::-1], return_index=True)[1]
+        for pos in last:
+            gesture_names[int(assigned[pos])] = seg.labels[pos]
+        total += len(assigned)
+    print(f"-> Berhasil mempelajari {total} sampel dari arsip ({time.time() - start_time:.1f}s).")
+
+
 # ==========================================
-# 6. MAIN LOOP (REAL-TIME INTEGRASI)
+# 4. MAIN LOOP (REAL-TIME INTEGRASI)
 # ==========================================
 def main():
-    # --- 1. INISIALISASI ROBOFLOW CLIENT ---
-    yolo_client = None
+    # --- 1. INISIALISASI DETEKTOR TANGAN (sesuai HAND_DETECTOR) ---
+    detector_name = HAND_DETECTOR
     try:
-        yolo_client = InferenceHTTPClient(
-            api_url=ROBOFLOW_URL,
-            api_key=ROBOFLOW_API_KEY
-        )
-        print(f"[INFO] Roboflow Inference Client terhubung. Model ID: {ROBOFLOW_MODEL_ID}.")
+        # Model Roboflow ini bisa memberi nama gesture sebagai kelas, jadi
+        # prediksi terbaik kelas apa pun dipakai jika tidak ada kelas 'hand'
+        detector = create_detector(HAND_DETECTOR, confidence=0.5,
+                                   roboflow_url=ROBOFLOW_URL, roboflow_api_key=ROBOFLOW_API_KEY,
+                                   roboflow_model_id=ROBOFLOW_MODEL_ID,
+                                   onnx_model=HAND_DETECTOR_MODEL,
+                                   fake_box=parse_box(HAND_DETECTOR_FAKE_BOX),
+                                   fallback_any_class=True)
+        print(f"[INFO] Detektor tangan '{HAND_DETECTOR}' siap.")
     except Exception as e:
-        print(f"[ERROR] Gagal inisialisasi Roboflow Client. Pastikan API Key dan koneksi internet berfungsi. Detail: {e}")
+        print(f"[ERROR] Gagal inisialisasi detektor '{HAND_DETECTOR}', memakai MediaPipe saja. Detail: {e}")
+        detector = NullDetector()
+        detector_name = 'mediapipe'
+    hand_detector = AsyncDetector(detector, max_age=DETECTOR_MAX_AGE)
+    hand_tracker = LandmarkTracker(pad=30, enabled=HAND_TRACKING)
         
     # --- 2. SETUP MEDIA PIPE & ART ---
     mp_hands = mp.solutions.hands
     mp_draw = mp.solutions.drawing_utils
     # min_detection_confidence=0.5 adalah default yang baik untuk deteksi
-    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=1, min_detection_confidence=0.5) 
+    hands = mp_hands.Hands(static_image_mode=False, max_num_hands=MAX_HANDS, min_detection_confidence=0.5) 
     cap = cv2.VideoCapture(0)
 
     # TAHAP NON-REAL-TIME (PRE-TRAINING)
-    art, gesture_names = load_model_csv()
+    art, gesture_names = model_files.load()
     train_datasets(art, gesture_names, DATASET_FOLDERS)
 
-    print("\n--- SISTEM ART + ROBOFLOW SIAP ---")
+    print(f"\n--- SISTEM ART + DETEKTOR ({detector_name}) SIAP ---")
 
     while cap.isOpened():
         success, frame = cap.read()
@@ -319,86 +252,64 @@ def main():
         vec = None
         cropped_frame = None
 
-        # 3. LOKALISASI TANGAN DENGAN ROBOFLOW (Jika klien aktif)
-        if yolo_client:
-            try:
-                predictions = yolo_client.infer(
-                    display_frame, 
-                    model_id=ROBOFLOW_MODEL_ID, 
-                    confidence=0.5
-                )
-            except Exception:
-                predictions = None
+        # 3. LOKALISASI TANGAN: crop dari landmark frame sebelumnya, detektor
+        #    asinkron hanya dipakai saat tracking lepas
+        #    (detektor hanya memberi satu kotak: mode banyak tangan memakai frame penuh)
+        roi, _, tracked = hand_tracker.next_roi(hand_detector if MAX_HANDS == 1 else None, frame)
+        if roi is not None:
+            x_min, y_min, x_max, y_max = roi
             
-            hand_bb = None
-            if predictions and 'predictions' in predictions:
-                # Cari bounding box tangan (Asumsi: class di Roboflow adalah 'hand' atau nama gesture)
-                hand_predictions = [p for p in predictions['predictions'] if p['class'].lower() == 'hand']
-                if not hand_predictions:
-                    # Coba ambil prediksi dengan confidence tertinggi, apapun namanya
-                    all_predictions = predictions['predictions']
-                    if all_predictions:
-                        hand_predictions.append(max(all_predictions, key=lambda x: x['confidence']))
-
-
-                if hand_predictions:
-                    best_pred = max(hand_predictions, key=lambda x: x['confidence'])
-                    hand_bb = best_pred
+            # Gambar Bounding Box (kuning = hasil tracking, biru = detektor)
+            cv2.rectangle(display_frame, (x_min, y_min), (x_max, y_max), (0, 255, 255) if tracked else (255, 0, 0), 2)
             
-            if hand_bb:
-                x_min, y_min, x_max, y_max = hand_bb['x_min'], hand_bb['y_min'], hand_bb['x_max'], hand_bb['y_max']
-                
-                # Tambah Padding agar MediaPipe tidak memotong jari
-                pad = 30 
-                H, W, _ = frame.shape
-                x_min = max(0, int(x_min) - pad)
-                y_min = max(0, int(y_min) - pad)
-                x_max = min(W, int(x_max) + pad)
-                y_max = min(H, int(y_max) + pad)
-                
-                # Gambar Bounding Box
-                cv2.rectangle(display_frame, (x_min, y_min), (x_max, y_max), (255, 0, 0), 2)
-                
-                # Potong Frame (Crop)
-                cropped_frame = frame[y_min:y_max, x_min:x_max]
+            # Potong Frame (Crop)
+            cropped_frame = frame[y_min:y_max, x_min:x_max]
+            if cropped_frame.size == 0:
+                roi, cropped_frame = None, None
         
         # 4. MEDIA PIPE PADA FRAME TERTARGET
-        frame_to_process = cropped_frame if cropped_frame is not None and cropped_frame.size > 0 else frame
+        frame_to_process = cropped_frame if cropped_frame is not None else frame
         
         rgb_frame = cv2.cvtColor(frame_to_process, cv2.COLOR_BGR2RGB)
         results = hands.process(rgb_frame)
+        hand_tracker.update(results, roi, frame.shape)
 
         if results.multi_hand_landmarks:
             # Gambar Landmark
-            mp_draw.draw_landmarks(display_frame, results.multi_hand_landmarks[0], mp_hands.HAND_CONNECTIONS)
+            for hand_landmarks in results.multi_hand_landmarks:
+                mp_draw.draw_landmarks(display_frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
             
-            # Ekstraksi Fitur dan Klasifikasi ART
-            vec = extract_features(results)
+            # Ekstraksi Fitur dan Klasifikasi ART semua tangan (satu batch)
+            X = extract_all_features(results)
+            vec = X[0]
             
-            if vec is not None:
-                # TAHAP REAL-TIME (KLASIFIKASI)
-                idx = art.classify(vec) 
-                
-                if idx >= 0:
-                    name = gesture_names.get(idx, f"Unknown ({idx})")
-                    status = f"Gesture: {name}"
-                    color = (0, 255, 0)
-                elif idx == -2:
-                    status = "Tidak Dikenal"
-                    color = (0, 0, 255)
+            # TAHAP REAL-TIME (KLASIFIKASI)
+            indices = art.classify_batch(X)[0]
+            labels = [gesture_names.get(int(i), f"Unknown ({i})") if i >= 0 else "Tidak Dikenal"
+                      for i in indices if i != -1]
+            idx = int(indices[0])
+            
+            if idx >= 0:
+                status = f"Gesture: {labels[0]}"
+                color = (0, 255, 0)
+            elif idx == -2:
+                status = "Tidak Dikenal"
+                color = (0, 0, 255)
+            if len(labels) > 1:
+                status = ' | '.join(labels)
 
         # UI
         cv2.rectangle(display_frame, (0, 0), (640, 60), (0, 0, 0), -1)
         cv2.putText(display_frame, status, (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
-        cv2.putText(display_frame, f"Data Tersimpan: {len(art.weights)} | Roboflow: {'ON' if yolo_client else 'OFF'}", (20, 75), cv2.FONT_ITALIC, 0.5, (200, 200, 200), 1)
+        cv2.putText(display_frame, f"Data Tersimpan: {len(art.weights)} | Detektor: {detector_name}", (20, 75), cv2.FONT_ITALIC, 0.5, (200, 200, 200), 1)
         
         cv2.imshow("Hand Gesture", display_frame)
         
         key = cv2.waitKey(1) & 0xFF
         
-        # Save ke CSV
+        # Save ke CSV + biner
         if key == ord('s'):
-            save_model_csv(art, gesture_names)
+            model_files.save(art, gesture_names)
             
         # Manual Train (REAL-TIME ADAPTATION)
         elif key == ord('t') and vec is not None:
@@ -408,9 +319,10 @@ def main():
                 
         # Quit
         elif key == ord('q'):
-            save_model_csv(art, gesture_names)
+            model_files.save(art, gesture_names)
             break
 
+    hand_detector.stop()
     cap.release()
     cv2.destroyAllWindows()
 
@@ -424,6 +336,23 @@ if __name__ == "__main__":
             "https://source.roboflow.com/MADpQ3Hao1cYUHceGeNrCZOcl6k1/sMeu89vrsUkigz3q8gMQ/original.jpg",
         ]
         test_inference(test_urls)
+    elif len(sys.argv) > 1 and sys.argv[1] == "train":
+        # Pre-training massal tanpa kamera (mis. rebuild model terjadwal)
+        art, gesture_names = model_files.load()
+        train_datasets(art, gesture_names, sys.argv[2:] or DATASET_FOLDERS)
+        model_files.save(art, gesture_names)
+    elif len(sys.argv) > 1 and sys.argv[1] == "train-archive":
+        # Pre-training dari arsip fitur terpaket (lihat feature_archive.py migrate)
+        art, gesture_names = model_files.load()
+        train_archive(art, gesture_names, sys.argv[2] if len(sys.argv) > 2 else ARCHIVE_DIR)
+        model_files.save(art, gesture_names)
+    elif len(sys.argv) > 1 and sys.argv[1] == "export":
+        # Ekspor sampel rekaman ke CSV dataset (satu file per gesture)
+        folder = sys.argv[2] if len(sys.argv) > 2 else DATASET_FOLDERS[1]
+        written = sample_store.SampleLog(SAMPLE_LOG_FILE).export_dataset(folder)
+        for name, rows in written.items():
+            print(f"-> {name}: {rows} sampel")
+        print(f"[INFO] {sum(written.values())} sampel diekspor ke {folder}")
     else:
         # Run the main gesture recognition loop
         main()
\ No newline at end of file
@@ -0,0 +1,385 @@
+"""Arsip fitur gesture terpaket: record float32 lebar tetap + sidecar label/waktu.
+
+Pengganti satu file JSON per sampel. Arsip adalah folder berisi segmen:
+
+    archive.json            versi + dimensi fitur
+    seg_000000.f32          fitur mentah float32, N x dim (bisa di-mmap)
+    seg_000000.idx          sidecar per baris: label id (uint32) + timestamp ms (int64)
+    seg_000000.labels       tabel nama label segmen, satu per baris (baris ke-i = id i)
+    imported.json           sumber CSV yang sudah dimigrasi (path -> mtime, ukuran byte, sha1 isi)
+
+Setiap writer mengklaim segmen baru secara eksklusif (O_EXCL), jadi
+app.py dan capture_gestures.py bisa menulis ke arsip yang sama tanpa
+saling menimpa. Segmen berganti setelah segment_rows baris.
+
+Urutan tulis saat flush: .labels, lalu .f32, lalu .idx, masing-masing
+di-fsync sebelum file berikutnya; baris .idx ditahan di memori sampai
+label dan fiturnya sudah di disk. Dengan flush_interval, append(...,
+flush=False) dari jalur simpan per sampel digabung (group commit): satu
+flush per interval, saat segmen berganti, dan saat close()/keluar proses.
+Sampel yang belum di-flush saat crash hilang; sisanya tetap konsisten. Pembaca membuka setiap segmen dengan
+np.memmap dan memakai prefix konsisten terpanjang: min(baris fitur, baris
+sidecar), dipotong lagi di baris pertama yang label id-nya belum ada di
+.labels. Record terakhir yang terpotong saat crash diabaikan tanpa
+membuang baris sebelumnya.
+
+Migrasi gesture_data/*.json dan folder CSV datasets:
+
+    python feature_archive.py migrate [--archive DIR] [--json DIR] [--csv FOLDER ...]
+"""
+import argparse
+import csv
+import glob
+import hashlib
+import itertools
+import atexit
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+SEGMENT_ROWS = 65536
+CSV_CHUNK_ROWS = 65536
+INDEX_DTYPE = np.dtype([('label', '<u4'), ('timestamp', '<i8')])
+
+Segment = namedtuple('Segment', ['name', 'features', 'labels', 'timestamps'])
+
+
+def iter_csv_chunks(file_path, chunk_rows=CSV_CHUNK_ROWS, offset=0):
+    """Membaca CSV dataset per blok sebagai matriks float32 (N x fitur).
+
+    offset > 0 melanjutkan dari posisi byte tersebut (awal baris, tanpa header).
+    """
+    with open(file_path, 'r', newline='') as f:
+        if offset:
+            f.seek(offset)
+        reader = csv.reader(f)
+        if not offset:
+            next(reader, None) # Skip header
+        reader = (row for row in reader if row)
+        dim = None
+        while True:
+            rows = list(itertools.islice(reader, chunk_rows))
+            if not rows: break
+            try:
+                block = np.array(rows, dtype=np.float32)
+            except ValueError:
+                # Blok berisi baris rusak: parse per baris, lewati yang gagal
+                parsed = []
+                for row in rows:
+                    try:
+                        vec = np.array(row, dtype=np.float32)
+                    except ValueError:
+                        continue
+                    if dim is None or len(vec) == dim:
+                        parsed.append(vec)
+                        dim = len(vec)
+                if not parsed: continue
+                block = np.array(parsed)
+            if block.ndim != 2: continue
+            dim = block.shape[1]
+            yield block
+
+
+def prefix_digest(file_path, size, chunk_bytes=1 << 20):
+    """sha1 (hex) dari `size` byte pertama file"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        while size > 0:
+            block = f.read(min(chunk_bytes, size))
+            if not block:
+                break
+            digest.update(block)
+            size -= len(block)
+    return digest.hexdigest()
+
+
+class FeatureArchive:
+    """Arsip fitur bersegmen; append() untuk penulisan, segments()/load() untuk pembacaan"""
+
+    def __init__(self, path, dim=42, segment_rows=SEGMENT_ROWS, flush_interval=0):
+        self.path = path
+        self.segment_rows = segment_rows
+        self.flush_interval = flush_interval
+        self._flush_timer = None
+        self._lock = threading.Lock()
+        self._segment = None
+        self._files = None
+        self._rows = 0
+        self._label_ids = {}
+        self._pending_index = []  # baris .idx yang menunggu flush()
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'archive.json')
+        try:
+            fd = os.open(meta_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': FORMAT_VERSION, 'dim': int(dim)}, f)
+            self.dim = int(dim)
+        except FileExistsError:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported archive version: {meta.get('version')}")
+            self.dim = int(meta['dim'])
+        if flush_interval:
+            atexit.register(self.close)
+
+    # ---------- Penulisan ----------
+    def append(self, label, features, timestamp=None, flush=True):
+        """Tambah satu sampel, kembalikan referensi 'seg_XXXXXX.f32#baris'"""
+        return self.append_many(label, np.atleast_2d(features),
+                                None if timestamp is None else [timestamp], flush)
+
+    def append_many(self, label, X, timestamps=None, flush=True):
+        """Tambah N sampel satu label sekaligus (N x dim)"""
+        X = np.ascontiguousarray(np.atleast_2d(X), dtype=np.float32)
+        if X.shape[1] != self.dim:
+            raise ValueError(f"Feature dim {X.shape[1]} does not match archive dim {self.dim}")
+        if timestamps is None:
+            timestamps = np.full(len(X), int(time.time() * 1000), dtype=np.int64)
+
+        with self._lock:
+            ref = None
+            start = 0
+            while start < len(X):
+                if self._files is None or self._rows >= self.segment_rows:
+                    self._open_segment()
+                n = min(len(X) - start, self.segment_rows - self._rows)
+                label_id = self._label_id(label)
+                index = np.empty(n, dtype=INDEX_DTYPE)
+                index['label'] = label_id
+                index['timestamp'] = timestamps[start:start + n]
+                self._files[0].write(X[start:start + n].tobytes())
+                self._pending_index.append(index)
+                if ref is None:
+                    ref = f"{self._segment}.f32#{self._rows}"
+                self._rows += n
+                start += n
+            if flush:
+                self._flush()
+            elif self.flush_interval and self._flush_timer is None:
+                # Group commit: semua append dalam interval ini berbagi satu flush
+                self._flush_timer = threading.Timer(self.flush_interval, self._flush_due)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return ref
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush_due(self):
+        with self._lock:
+            self._flush_timer = None
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._files is not None:
+                self._flush()
+                for f in self._files:
+                    f.close()
+                self._files = None
+
+    def _flush(self):
+        if self._files is not None:
+            # Label dan fitur di disk dulu, sidecar terakhir: baris sidecar selalu valid
+            data, idx, labels = self._files
+            for f in (labels, data):
+                f.flush()
+                os.fsync(f.fileno())
+            if self._pending_index:
+                for index in self._pending_index:
+                    idx.write(index.tobytes())
+                self._pending_index = []
+                idx.flush()
+                os.fsync(idx.fileno())
+
+    def _open_segment(self):
+        if self._files is not None:
+            self._flush()
+            for f in self._files:
+                f.close()
+        number = len(glob.glob(os.path.join(self.path, 'seg_*.f32')))
+        while True:
+            name = f"seg_{number:06d}"
+            try:
+                fd = os.open(os.path.join(self.path, name + '.f32'), os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                break
+            except FileExistsError:
+                number += 1
+        base = os.path.join(self.path, name)
+        self._files = (os.fdopen(fd, 'wb'), open(base + '.idx', 'wb'), open(base + '.labels', 'w'))
+        self._segment = name
+        self._rows = 0
+        self._label_ids = {}
+        self._pending_index = []
+
+    def _label_id(self, label):
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = len(self._label_ids)
+            self._label_ids[label] = label_id
+            self._files[2].write(label.replace('\n', ' ') + '\n')
+        return label_id
+
+    # ---------- Pembacaan ----------
+    def segments(self):
+        """Iterasi Segment(name, features memmap N x dim, labels, timestamps) per segmen"""
+        row_bytes = 4 * self.dim
+        for data_path in sorted(glob.glob(os.path.join(self.path, 'seg_*.f32'))):
+            base = data_path[:-len('.f32')]
+            try:
+                rows = min(os.path.getsize(data_path) // row_bytes,
+                           os.path.getsize(base + '.idx') // INDEX_DTYPE.itemsize)
+                with open(base + '.labels', 'r') as f:
+                    names = f.read().split('\n')[:-1]
+            except OSError:
+                continue
+            if rows == 0:
+                continue
+            index = np.memmap(base + '.idx', dtype=INDEX_DTYPE, mode='r', shape=(rows,))
+            label_ids = np.asarray(index['label'])
+            unknown = np.flatnonzero(label_ids >= len(names))
+            if len(unknown):
+                # Prefix konsisten: berhenti di baris pertama yang labelnya belum tertulis
+                rows = int(unknown[0])
+                if rows == 0:
+                    continue
+                index, label_ids = index[:rows], label_ids[:rows]
+            features = np.memmap(data_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+            labels = np.array(names, dtype=object)[label_ids]
+            yield Segment(os.path.basename(base), features, labels, np.asarray(index['timestamp']))
+
+    def load(self, label=None):
+        """Gabungkan semua segmen -> (X, labels, timestamps), opsional satu label"""
+        parts = []
+        for seg in self.segments():
+            if label is None:
+                parts.append((seg.features, seg.labels, seg.timestamps))
+            else:
+                mask = seg.labels == label
+                if mask.any():
+                    parts.append((seg.features[mask], seg.labels[mask], seg.timestamps[mask]))
+        if not parts:
+            return (np.empty((0, self.dim), dtype=np.float32),
+                    np.empty(0, dtype=object), np.empty(0, dtype=np.int64))
+        return tuple(np.concatenate(p) for p in zip(*parts))
+
+    def count(self):
+        return sum(len(seg.features) for seg in self.segments())
+
+    def keys(self):
+        """Himpunan (label, timestamp) yang sudah ada, untuk deduplikasi migrasi"""
+        keys = set()
+        for seg in self.segments():
+            keys.update(zip(seg.labels.tolist(), seg.timestamps.tolist()))
+        return keys
+
+
+# ---------- Migrasi ----------
+def migrate_json(archive, json_dir):
+    """Masukkan file {gesture}_{timestamp}.json; yang sudah ada di arsip dilewati"""
+    if not os.path.isdir(json_dir):
+        return 0
+    existing = archive.keys()
+    added = 0
+    for entry in os.scandir(json_dir):
+        if not entry.name.endswith('.json'):
+            continue
+        try:
+            with open(entry.path, 'r') as f:
+                data = json.load(f)
+            label = data.get('gesture') or entry.name[:-len('.json')].rpartition('_')[0]
+            timestamp = int(data.get('timestamp', entry.name[:-len('.json')].rpartition('_')[2]))
+            features = np.asarray(data['features'], dtype=np.float32)
+        except (OSError, ValueError, KeyError, TypeError):
+            print(f"[ERROR] Skipping unreadable sample: {entry.name}")
+            continue
+        if (label, timestamp) in existing or features.shape != (archive.dim,):
+            continue
+        archive.append(label, features, timestamp, flush=False)
+        existing.add((label, timestamp))
+        added += 1
+    archive.flush()
+    return added
+
+
+def migrate_csv(archive, folders):
+    """Masukkan CSV dataset (label = nama file); bagian yang sudah dimigrasi dilewati"""
+    imported_path = os.path.join(archive.path, 'imported.json')
+    try:
+        with open(imported_path, 'r') as f:
+            imported = json.load(f)
+    except (OSError, ValueError):
+        imported = {}
+
+    added = 0
+    for folder in folders:
+        for file_path in sorted(glob.glob(os.path.join(folder, '*.csv'))):
+            key = os.path.abspath(file_path)
+            mtime = os.path.getmtime(file_path)
+            size = os.path.getsize(file_path)
+            previous = imported.get(key)
+            offset = 0
+            if previous is not None:
+                if previous['mtime'] == mtime and previous['size'] == size:
+                    continue
+                if (size >= previous['size'] and
+                        previous.get('sha1') == prefix_digest(file_path, previous['size'])):
+                    # File CSV hanya bertambah di akhir: lanjutkan dari byte terakhir yang dimigrasi
+                    offset = previous['size']
+                else:
+                    print(f"[INFO] {file_path} berubah, dimigrasi ulang dari awal")
+            label = os.path.basename(file_path).replace('.csv', '')
+            timestamp = int(mtime * 1000)
+            for block in iter_csv_chunks(file_path, offset=offset):
+                if block.shape[1] != archive.dim:
+                    continue
+                archive.append_many(label, block, np.full(len(block), timestamp, dtype=np.int64), flush=False)
+                added += len(block)
+            imported[key] = {'mtime': mtime, 'size': size, 'sha1': prefix_digest(file_path, size)}
+
+    archive.flush()
+    tmp_path = imported_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(imported, f, indent=1)
+    os.replace(tmp_path, imported_path)
+    return added
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Arsip fitur gesture terpaket')
+    sub = parser.add_subparsers(dest='command', required=True)
+    migrate = sub.add_parser('migrate', help='impor gesture_data/*.json dan CSV datasets ke arsip')
+    migrate.add_argument('--archive', default='gesture_archive')
+    migrate.add_argument('--json', default='gesture_data')
+    migrate.add_argument('--csv', nargs='*', default=['datasets/roboflow_data', 'datasets/my_custom_data'])
+    migrate.add_argument('--dim', type=int, default=42)
+    info = sub.add_parser('info', help='ringkasan isi arsip')
+    info.add_argument('--archive', default='gesture_archive')
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        archive = FeatureArchive(args.archive, dim=args.dim)
+        start = time.time()
+        json_added = migrate_json(archive, args.json)
+        csv_added = migrate_csv(archive, args.csv)
+        archive.close()
+        print(f"[INFO] {json_added} sampel JSON + {csv_added} baris CSV dimigrasi ke {args.archive} "
+              f"({time.time() - start:.1f}s)")
+    else:
+        archive = FeatureArchive(args.archive)
+        X, labels, _ = archive.load()
+        names, counts = np.unique(labels.astype(str), return_counts=True) if len(labels) else ([], [])
+        print(f"[INFO] {len(X)} sampel, dim {archive.dim}")
+        for name, count in zip(names, counts):
+            print(f"-> {name}: {count}")
@@ -0,0 +1,122 @@
+"""Ring buffer frame di shared memory: capture menulis langsung ke slot.
+
+    ring = FrameRing(slots=8)
+    frame = ring.acquire((480, 640, 3))      # view ndarray ke slot kosong
+    cv2.flip(raw, 1, dst=frame)              # tulis in-place, tanpa alokasi
+
+Semua slot ada di satu blok multiprocessing.shared_memory yang dialokasikan
+sekali (saat frame pertama, dari bentuk frame kamera). Stage hilir menerima
+view ke slot, bukan salinan; crop juga hanya view. Slot kembali bebas
+otomatis saat view terakhirnya (crop, frame di detektor asinkron) dilepas,
+lewat weakref.finalize pada array slot. Slot hanya dibaca: overlay
+digambar di salinan privat, sehingga klien stream yang lambat tidak
+pernah menahan slot. Jika semua
+slot masih dipakai, acquire() mengembalikan None dan capture membuang frame
+itu (dicatat di stats()).
+
+RGBBuffer mengonversi BGR -> RGB ke buffer per thread yang dipakai ulang,
+jadi input MediaPipe tidak dialokasikan ulang setiap frame.
+"""
+import atexit
+import threading
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+
+RING_SLOTS = 8
+
+
+class FrameRing:
+    """Slot frame berukuran tetap di shared memory, dipinjam lewat acquire()"""
+
+    def __init__(self, slots=RING_SLOTS, dtype=np.uint8):
+        self.slots = slots
+        self.dtype = np.dtype(dtype)
+        self.shape = None
+        self._shm = None
+        self._retired = []  # blok lama yang mungkin masih punya view (bentuk frame berubah)
+        self._lock = threading.Lock()
+        self._free = []
+        self._generation = 0
+        self.acquired = 0
+        self.exhausted = 0
+        self.closed = False
+        atexit.register(self.close)
+
+    def _allocate(self, shape):
+        """Alokasikan ulang ring untuk bentuk frame baru (panggil dengan lock)"""
+        if self._shm is not None:
+            self._retired.append(self._shm)
+        nbytes = int(np.prod(shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes * self.slots)
+        self.shape = tuple(shape)
+        self._generation += 1
+        self._free = list(range(self.slots))
+
+    def acquire(self, shape):
+        """View ke slot kosong berbentuk shape; None jika semua slot masih dipakai"""
+        shape = tuple(shape)
+        with self._lock:
+            if self.closed:
+                return None
+            if shape != self.shape:
+                self._allocate(shape)
+            if not self._free:
+                self.exhausted += 1
+                return None
+            slot = self._free.pop()
+            self.acquired += 1
+            generation = self._generation
+            frame = np.ndarray(shape, self.dtype, buffer=self._shm.buf,
+                               offset=slot * int(np.prod(shape)) * self.dtype.itemsize)
+        weakref.finalize(frame, self._release, slot, generation)
+        return frame
+
+    def _release(self, slot, generation):
+        with self._lock:
+            if generation == self._generation:
+                self._free.append(slot)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'slots': self.slots,
+                'in_use': self.slots - len(self._free) if self.shape is not None else 0,
+                'shape': list(self.shape) if self.shape is not None else None,
+                'acquired': self.acquired,
+                'exhausted': self.exhausted
+            }
+
+    def close(self):
+        """Lepas blok shared memory (view yang masih ada tetap valid sampai dilepas)"""
+        with self._lock:
+            self.closed = True
+            blocks = self._retired + ([self._shm] if self._shm is not None else [])
+            self._shm, self._retired, self.shape = None, [], None
+        for shm in blocks:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # masih ada view; mmap dilepas saat view terakhir hilang
+            shm.unlink()
+
+
+class RGBBuffer:
+    """Konversi BGR -> RGB ke buffer yang dipakai ulang (satu per thread)"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def convert(self, bgr):
+        import cv2
+
+        nbytes = bgr.shape[0] * bgr.shape[1] * 3
+        buf = getattr(self._local, 'buf', None)
+        if buf is None or len(buf) < nbytes:
+            buf = np.empty(max(nbytes, 2 * len(buf) if buf is not None else 0), dtype=np.uint8)
+            self._local.buf = buf
+        # View contiguous di awal buffer: cvtColor menulis langsung ke sana
+        rgb = np.ndarray((bgr.shape[0], bgr.shape[1], 3), np.uint8, buffer=buf)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+        return rgb
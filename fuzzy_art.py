@@ -0,0 +1,445 @@
+"""Inti Fuzzy ART bersama untuk app.py, api/app.py, capture_gestures.py dan datasets.py.
+
+FuzzyART menyimpan bobot di buffer float32 yang tumbuh geometris dengan
+cache norma per kategori. Norma dan indeks dihitung saat pertama dipakai,
+jadi memuat snapshot biner yang di-mmap tetap O(1). Pencarian resonansi memakai candidates() (top-k
+lazy, atau indeks kategori art_index untuk model besar), jadi klasifikasi
+dan pelatihan hanya punya satu implementasi.
+
+fork() membuat salinan copy-on-write untuk pelatihan sementara pembaca di
+thread lain terus memakai model lama (lihat model_snapshot.py).
+
+ModelFiles menyatukan persistence satu entry point: snapshot biner +
+journal (model_store) sebagai format utama, CSV bobot/nama untuk
+ekspor/impor.
+"""
+import copy
+import csv
+import os
+
+import numpy as np
+
+import model_store
+from art_index import MIN_CATEGORIES, CategoryIndex, iter_descending
+
+# Parameter default Algoritma Fuzzy ART
+RHO = 0.90    # Vigilance (Kewaspadaan)
+ALPHA = 0.001 # Choice parameter
+BETA = 1.0    # Learning Rate (Fast Learning)
+
+
+class FuzzyART:
+    def __init__(self, rho=RHO, alpha=ALPHA, beta=BETA):
+        self.rho = rho
+        self.alpha = alpha
+        self.beta = beta
+        # Kandidat yang diperiksa pencarian vigilance (lihat search_stats)
+        self.searches = 0
+        self.examined = 0
+        self.last_examined = 0
+        self.weights = [] # Matriks float32 (kategori x 2*fitur)
+
+    @property
+    def weights(self):
+        """Matriks bobot contiguous, satu baris per kategori"""
+        return self._weights[:self._count]
+
+    @weights.setter
+    def weights(self, value):
+        if len(value) == 0:
+            W = np.empty((0, 0), dtype=np.float32)
+        else:
+            W = np.ascontiguousarray(value, dtype=np.float32)
+        self._count = 0
+        self._norms = None # Dihitung saat pertama dipakai (lihat _norms)
+        self._weights = W
+        self._count = len(W)
+        self._shared = 0 # Baris [0, _shared) dipakai bersama model lain (fork)
+        self._index = None
+        self._index_pending = True # Indeks dibangun saat pertama dipakai
+
+    # Snapshot biner di-mmap: norma dan indeks tidak dihitung saat muat
+    # (menyentuh setiap halaman file), tetapi pada pencarian pertama.
+    # Dua thread yang menghitung bersamaan mendapat hasil yang sama.
+    @property
+    def _norms(self):
+        """Cache |W_j| per kategori, sepanjang kapasitas buffer bobot"""
+        norms = self._norm_cache
+        if norms is None:
+            n = self._count
+            norms = np.empty(len(self._weights), dtype=np.float32)
+            norms[:n] = self._weights[:n].sum(axis=1)
+            self._norm_cache = norms
+        return norms
+
+    @_norms.setter
+    def _norms(self, value):
+        self._norm_cache = value
+
+    @property
+    def _index(self):
+        """CategoryIndex untuk model besar (None jika scan penuh)"""
+        if self._index_pending:
+            self._index_pending = False
+            self._refresh_index()
+        return self._index_value
+
+    @_index.setter
+    def _index(self, value):
+        self._index_value = value
+
+    def _refresh_index(self):
+        """Bangun (ulang) indeks kategori untuk model besar jika ekornya sudah panjang"""
+        n = self._count
+        if n >= MIN_CATEGORIES and (self._index is None or self._index.stale(n)):
+            self._index = CategoryIndex(self._weights[:n])
+
+    def complement_coding(self, x):
+        """Transformasi wajib untuk Fuzzy ART: [input, 1-input]"""
+        x = np.clip(x, 0, 1)
+        return np.concatenate((x, 1 - x))
+
+    def _reserve(self, n, dim):
+        """Menjamin kapasitas buffer >= n baris (pertumbuhan geometris)"""
+        if self._count == 0 and self._weights.shape[1] != dim:
+            self._weights = np.empty((0, dim), dtype=np.float32)
+            self._norms = np.empty(0, dtype=np.float32)
+        capacity = len(self._weights)
+        if n <= capacity:
+            return
+        capacity = max(n, 2 * capacity, 64)
+        weights = np.empty((capacity, dim), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        weights[:self._count] = self._weights[:self._count]
+        norms[:self._count] = self._norms[:self._count]
+        # Norma di-assign lebih dulu agar pembaca di thread lain
+        # tidak pernah melihat baris bobot tanpa norma
+        self._norms = norms
+        self._weights = weights
+
+    def add_category(self, w):
+        """Menambah kategori baru, mengembalikan indeksnya"""
+        w = np.asarray(w, dtype=np.float32)
+        j = self._count
+        self._reserve(j + 1, len(w))
+        self._weights[j] = w
+        self._norms[j] = self._weights[j].sum()
+        self._count = j + 1
+        self._refresh_index()
+        return j
+
+    def update_category(self, j, w):
+        """Mengganti bobot kategori j dan memperbarui cache norma"""
+        if j < self._shared:
+            self._unshare()
+        if self._index is not None:
+            # Batas leaf diperlebar sebelum bobot berubah agar pembaca tetap eksak
+            self._index.update(j, w)
+        self._weights[j] = w
+        self._norms[j] = self._weights[j].sum()
+
+    def fork(self):
+        """Salinan copy-on-write: model ini tidak pernah berubah oleh pelatihan salinan.
+
+        Buffer bobot, cache norma dan indeks dipakai bersama. Kategori baru
+        ditulis setelah baris terakhir model ini (tidak terlihat olehnya);
+        baris lama disalin saat salinan pertama kali mengubah kategori lama.
+        """
+        clone = copy.copy(self)
+        clone._shared = self._count
+        return clone
+
+    def _unshare(self):
+        """Salin baris yang dipakai bersama sebelum baris lama diubah.
+
+        Hanya baris terpakai [0, _count) yang disalin, ditambah sedikit ruang
+        untuk kategori baru; kapasitas cadangan buffer lama tidak ikut.
+        """
+        n = self._count
+        capacity = n + max(64, n // 8)
+        weights = np.empty((capacity, self._weights.shape[1]), dtype=np.float32)
+        norms = np.empty(capacity, dtype=np.float32)
+        weights[:n] = self._weights[:n]
+        norms[:n] = self._norms[:n]
+        self._norms = norms
+        self._weights = weights
+        if self._index is not None:
+            self._index = self._index.copy()
+        self._shared = 0
+
+    def activations(self, x):
+        """Choice (T) dan match ratio untuk semua kategori dalam satu operasi"""
+        n = self._count
+        W = self._weights[:n]
+        norms = self._norms[:n]
+        fuzzy_and = np.minimum(x, W).sum(axis=1)
+        T = fuzzy_and / (self.alpha + norms)
+        match_ratio = fuzzy_and / np.sum(x)
+        return T, match_ratio
+
+    def candidates(self, x, vigilance=True):
+        """(j, match_ratio) kandidat urut choice T menurun.
+
+        x sudah complement-coded. vigilance=True (pelatihan): hanya kategori
+        yang lolos rho, seri T -> indeks terbesar. vigilance=False (classify):
+        semua kategori, seri T -> indeks terkecil seperti np.argmax. Tanpa
+        indeks kandidat diurutkan lazily per blok top-k; dengan indeks
+        kategori yang tidak mungkin menang tidak pernah dihitung.
+
+        Setiap pencarian satu vektor (train_single_input, train_batch,
+        classify) lewat sini, jadi search_stats() menghitung semuanya di
+        satu tempat untuk kedua jalur. classify_batch adalah scan matriks,
+        bukan pencarian per vektor, dan tidak dihitung.
+        """
+        self.searches += 1
+        self.last_examined = 0
+        index = self._index
+        if index is not None:
+            n = self._count
+            start = index.examined
+            for j, _, match in index.candidates(x, self._weights[:n], self._norms[:n], self.alpha,
+                                                rho=self.rho if vigilance else None, prefer_high=vigilance):
+                self._examined(index.examined - start)
+                yield j, match
+            self._examined(index.examined - start)
+            return
+
+        T, match_ratio = self.activations(x)
+        passing = np.flatnonzero(match_ratio >= self.rho) if vigilance else np.arange(len(T))
+        if len(passing) == 0:
+            self._examined(len(T))
+        for k in iter_descending(T[passing], prefer_high=vigilance):
+            j = int(passing[k])
+            # Posisi j dalam urutan T penuh = kandidat yang diperiksa scan berurutan
+            ties = T[j:] == T[j] if vigilance else T[:j + 1] == T[j]
+            self._examined(int(np.count_nonzero(T > T[j]) + np.count_nonzero(ties)))
+            yield j, match_ratio[j]
+
+    def _examined(self, count):
+        """Catat jumlah kandidat yang diperiksa pencarian saat ini"""
+        self.examined += count - self.last_examined
+        self.last_examined = count
+
+    def search_stats(self):
+        """Kandidat per pencarian vigilance, untuk tuning rho dan indeks kategori"""
+        return {
+            'categories': len(self.weights),
+            'indexed': self._index is not None,
+            'searches': self.searches,
+            'mean_examined': round(self.examined / self.searches, 2) if self.searches else 0.0,
+            'last_examined': self.last_examined
+        }
+
+    def train_single_input(self, x_raw):
+        """Melatih model secara inkremental"""
+        x = self.complement_coding(x_raw)
+        
+        if len(self.weights) == 0:
+            return self.add_category(x)
+
+        # Pattern Matching + Vigilance Test & Resonance
+        for j_star, match in self.candidates(x):
+            if match >= self.rho:
+                # Update Bobot
+                W_jstar = self.weights[j_star]
+                new_weight = self.beta * np.minimum(x, W_jstar) + (1 - self.beta) * W_jstar
+                self.update_category(j_star, new_weight)
+                return j_star
+
+        # Reset (Kategori Baru)
+        return self.add_category(x)
+
+    def train_batch(self, X_raw):
+        """Pelatihan massal N sampel (N x fitur) secara berurutan.
+
+        Hasil kategori identik dengan memanggil train_single_input() untuk
+        setiap baris, tetapi complement coding dilakukan sekali untuk seluruh
+        blok; pencarian per sampel memakai candidates() (scan vektor atau
+        indeks kategori) dan hanya mengambil kandidat resonansi pertama.
+        """
+        X = np.clip(np.atleast_2d(np.asarray(X_raw, dtype=np.float32)), 0, 1)
+        X = np.concatenate((X, 1 - X), axis=1)
+        assigned = np.empty(len(X), dtype=np.int64)
+
+        for b, x in enumerate(X):
+            if self._count == 0:
+                assigned[b] = self.add_category(x)
+                continue
+
+            j_star = next((j for j, _ in self.candidates(x)), None)
+            if j_star is None:
+                j_star = self.add_category(x)
+            else:
+                W_jstar = self._weights[j_star]
+                self.update_category(j_star, self.beta * np.minimum(x, W_jstar) + (1 - self.beta) * W_jstar)
+            assigned[b] = j_star
+
+        return assigned
+
+    def classify(self, x_raw):
+        """Mengklasifikasikan input"""
+        if len(self.weights) == 0: return -1
+        x = self.complement_coding(x_raw)
+
+        # Kategori dengan choice T terbesar, lalu uji vigilance
+        j_star, match = next(self.candidates(x, vigilance=False))
+        if match >= self.rho: return j_star
+        else: return -2 # Tidak Dikenal
+
+    def classify_batch(self, X_raw):
+        """Klasifikasi N vektor fitur (N x fitur) dalam satu panggilan.
+
+        Mengembalikan (indeks, choice, match_ratio) masing-masing sepanjang N.
+        Kode indeks sama dengan classify(): -1 model kosong, -2 tidak dikenal.
+        """
+        X_raw = np.atleast_2d(np.asarray(X_raw, dtype=np.float32))
+        N = len(X_raw)
+        indices = np.full(N, -1, dtype=np.int64)
+        choice = np.zeros(N, dtype=np.float32)
+        match_ratio = np.zeros(N, dtype=np.float32)
+
+        n = self._count
+        W = self._weights[:n]
+        if n == 0 or N == 0:
+            return indices, choice, match_ratio
+        norms = self._norms[:n]
+
+        X = np.clip(X_raw, 0, 1)
+        X = np.concatenate((X, 1 - X), axis=1)
+
+        index = self._index
+        if index is not None:
+            # Model besar: per baris lewat indeks (pruning eksak), bukan tensor penuh
+            for i, x in enumerate(X):
+                j_star, choice[i], match_ratio[i] = next(index.candidates(x, W, norms, self.alpha, prefer_high=False))
+                indices[i] = j_star if match_ratio[i] >= self.rho else -2
+            return indices, choice, match_ratio
+
+        # Tensor sementara (blok x kategori x fitur) dibatasi ~64 MB
+        step = max(1, (1 << 24) // W.size)
+        for start in range(0, N, step):
+            stop = min(N, start + step)
+            fuzzy_and = np.minimum(X[start:stop, np.newaxis, :], W).sum(axis=2)
+            T = fuzzy_and / (self.alpha + norms)
+            j_star = T.argmax(axis=1)
+            rows = np.arange(stop - start)
+            choice[start:stop] = T[rows, j_star]
+            match_ratio[start:stop] = fuzzy_and[rows, j_star] / X[start:stop].sum(axis=1)
+            indices[start:stop] = np.where(match_ratio[start:stop] >= self.rho, j_star, -2)
+
+        return indices, choice, match_ratio
+
+
+class ModelFiles:
+    """Lokasi model satu entry point: snapshot biner ber-journal + CSV bobot/nama.
+
+    rho/alpha/beta dipakai untuk model baru; model yang dimuat dari snapshot
+    memakai parameter yang tersimpan di snapshot. verbose=True mencetak
+    progres muat/simpan (dipakai CLI datasets.py). sync_interval: jendela
+    group commit fsync journal (lihat model_store.JournaledModelStore).
+    """
+
+    def __init__(self, model_file, weights_file, names_file, rho=RHO, alpha=ALPHA, beta=BETA, verbose=False,
+                 sync_interval=0):
+        self.model_file = model_file
+        self.weights_file = weights_file
+        self.names_file = names_file
+        self.params = {'rho': rho, 'alpha': alpha, 'beta': beta}
+        self.verbose = verbose
+        self.journal = model_store.JournaledModelStore(model_file, rho, alpha, beta, sync_interval=sync_interval)
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def save_csv(self, art_model, gesture_names):
+        """Menyimpan bobot dan nama ke dua file CSV."""
+        self._log("\n[INFO] Menyimpan model ke CSV...")
+        with open(self.weights_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            for w in art_model.weights:
+                writer.writerow(w)
+
+        with open(self.names_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name"]) # Header
+            for idx, name in gesture_names.items():
+                writer.writerow([idx, name])
+
+        self._log(f" -> Bobot disimpan ke: {self.weights_file}")
+        self._log(f" -> Nama disimpan ke : {self.names_file}")
+
+    def load_csv(self):
+        """Memuat bobot dan nama dari CSV (model kosong jika file belum ada)."""
+        art = FuzzyART(**self.params)
+        names = {}
+
+        if os.path.exists(self.weights_file):
+            self._log(f"[INFO] Memuat bobot dari {self.weights_file}...")
+            with open(self.weights_file, 'r') as f:
+                reader = csv.reader(f)
+                loaded_weights = []
+                for row in reader:
+                    if not row: continue
+                    try:
+                        loaded_weights.append(np.array(row, dtype=np.float32))
+                    except ValueError:
+                        print(f"[ERROR] Gagal memuat baris: {row}. Cek format CSV.")
+                art.weights = loaded_weights
+            self._log(f" -> {len(art.weights)} kategori bobot dimuat.")
+        else:
+            self._log(f"[INFO] File bobot {self.weights_file} tidak ditemukan. Membuat model baru.")
+
+        if os.path.exists(self.names_file):
+            self._log(f"[INFO] Memuat nama dari {self.names_file}...")
+            with open(self.names_file, 'r') as f:
+                reader = csv.reader(f)
+                next(reader, None) # Skip Header
+                for row in reader:
+                    if len(row) >= 2:
+                        try:
+                            names[int(row[0])] = row[1]
+                        except ValueError:
+                            continue
+
+        return art, names
+
+    def save_binary(self, art_model, gesture_names):
+        """Menyimpan snapshot biner lengkap (bisa di-mmap) dan mengosongkan journal."""
+        self.journal.compact(art_model.weights, gesture_names,
+                             art_model.rho, art_model.alpha, art_model.beta)
+        self._log(f" -> Model biner disimpan ke: {self.model_file}")
+
+    def save(self, art_model, gesture_names):
+        """Menyimpan model ke format biner dan mengekspor CSV untuk kompatibilitas."""
+        self.save_csv(art_model, gesture_names)
+        self.save_binary(art_model, gesture_names)
+
+    def load(self):
+        """Memuat snapshot biner via mmap + journal; impor CSV jika biner belum ada atau CSV lebih baru.
+
+        CSV hanya diimpor jika journal kosong: impor menulis snapshot baru dan
+        mengosongkan journal, jadi pembaruan yang belum dikompaksi akan hilang.
+        """
+        snapshot = None
+        if model_store.is_current(self.model_file, [self.weights_file, self.names_file]):
+            snapshot = self.journal.load()
+        elif self.journal.has_journal():
+            snapshot = self.journal.load()
+            print(f"[INFO] CSV model lebih baru dari {self.model_file}, tetapi journal berisi pembaruan "
+                  f"yang belum dikompaksi; CSV diabaikan (simpan model untuk menyatukan)")
+
+        if snapshot is None:
+            art, names = self.load_csv()
+            self.save_binary(art, names)
+            return art, names
+
+        weights, names, params = snapshot
+        art = FuzzyART(**params)
+        art.weights = weights
+        self._log(f"[INFO] Model biner {self.model_file} dimuat: {len(art.weights)} kategori.")
+        return art, names
+
+    def record(self, idx, weight, name):
+        """Catat satu kategori yang berubah ke journal (snapshot dikompaksi di latar belakang)"""
+        self.journal.record(idx, weight, name)
@@ -0,0 +1,346 @@
+"""Detektor tangan yang bisa diganti-ganti + stage deteksi asinkron.
+
+Semua detektor punya satu method detect(frame) -> HandBox atau None.
+Backend dipilih lewat konfigurasi dengan create_detector():
+
+    roboflow   Roboflow Inference HTTP API (remote, butuh inference_sdk)
+    onnx       model YOLO ONNX lokal via OpenCV DNN di CPU
+    mediapipe  tanpa detektor: MediaPipe memproses frame penuh (tanpa crop)
+    fake       kotak tetap, untuk tes/offline
+
+AsyncDetector menjalankan detektor apa pun di thread terpisah dengan
+laju sendiri: loop frame cukup submit() frame terbaru lalu memakai kotak
+terakhir dari latest() selama umurnya belum melewati batas, sehingga
+MediaPipe dan FuzzyART tetap berjalan pada frame rate kamera.
+
+LandmarkTracker menurunkan crop frame berikutnya dari landmark MediaPipe
+frame sebelumnya (gabungan semua tangan), sehingga detektor hanya dipanggil
+saat tracking lepas. landmark_features() mengubah landmark semua tangan
+menjadi matriks fitur (tangan x 42) dalam satu operasi array;
+extract_all_features() / extract_features() membungkus hasil MediaPipe Hands.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+HandBox = namedtuple('HandBox', ['x_min', 'y_min', 'x_max', 'y_max', 'confidence', 'timestamp'])
+
+
+def landmark_points(multi_hand_landmarks):
+    """Koordinat (x, y) ternormalisasi semua tangan -> array (tangan x 21 x 2)"""
+    return np.array([[(lm.x, lm.y) for lm in hand.landmark] for hand in multi_hand_landmarks],
+                    dtype=np.float64)
+
+
+def landmark_features(multi_hand_landmarks):
+    """Fitur 42D semua tangan -> matriks float32 (tangan x 42).
+
+    Setiap titik dibuat relatif terhadap pergelangan (landmark 0), digeser
+    +0.5 lalu dibatasi ke [0, 1]; urutan fitur x0, y0, x1, y1, ...
+    """
+    points = landmark_points(multi_hand_landmarks)
+    features = np.clip(points - points[:, :1] + 0.5, 0.0, 1.0)
+    return features.reshape(len(points), -1).astype(np.float32)
+
+
+def extract_all_features(results):
+    """Fitur semua tangan dari hasil MediaPipe Hands -> (tangan x 42), None jika tidak ada"""
+    if not results.multi_hand_landmarks:
+        return None
+    return landmark_features(results.multi_hand_landmarks)
+
+
+def extract_features(results):
+    """Vektor fitur 42D tangan pertama, None jika tidak ada tangan"""
+    X = extract_all_features(results)
+    return X[0] if X is not None else None
+
+
+def pad_box(box, frame_shape, pad=30):
+    """Tambah padding agar MediaPipe tidak memotong jari, dibatasi ukuran frame"""
+    H, W = frame_shape[:2]
+    x_min = max(0, int(box.x_min) - pad)
+    y_min = max(0, int(box.y_min) - pad)
+    x_max = min(W, int(box.x_max) + pad)
+    y_max = min(H, int(box.y_max) + pad)
+    return x_min, y_min, x_max, y_max
+
+
+class RoboflowDetector:
+    """Deteksi tangan via Roboflow Inference HTTP API (remote)"""
+
+    def __init__(self, client, model_id, confidence=0.5, fallback_any_class=False):
+        self.client = client
+        self.model_id = model_id
+        self.confidence = confidence
+        self.fallback_any_class = fallback_any_class
+
+    def detect(self, frame):
+        timestamp = time.monotonic()
+        try:
+            predictions = self.client.infer(frame, model_id=self.model_id, confidence=self.confidence)
+        except Exception:
+            return None
+        if not predictions or 'predictions' not in predictions:
+            return None
+
+        hand_predictions = [p for p in predictions['predictions'] if p['class'].lower() == 'hand']
+        if not hand_predictions and self.fallback_any_class:
+            hand_predictions = predictions['predictions']
+        if not hand_predictions:
+            return None
+
+        best_pred = max(hand_predictions, key=lambda x: x['confidence'])
+        if 'x_min' in best_pred:
+            x_min, y_min, x_max, y_max = best_pred['x_min'], best_pred['y_min'], best_pred['x_max'], best_pred['y_max']
+        else:
+            # Format standar Roboflow: titik tengah + ukuran kotak
+            half_w, half_h = best_pred['width'] / 2, best_pred['height'] / 2
+            x_min, y_min = best_pred['x'] - half_w, best_pred['y'] - half_h
+            x_max, y_max = best_pred['x'] + half_w, best_pred['y'] + half_h
+        return HandBox(x_min, y_min, x_max, y_max, best_pred.get('confidence', 0.0), timestamp)
+
+
+class OpenCVDNNDetector:
+    """Detektor YOLO (ekspor ONNX) lokal via OpenCV DNN di CPU, tanpa jaringan.
+
+    Mendukung output YOLOv8 (1, 4+kelas, N) dan, dengan objectness=True,
+    YOLOv5 (1, N, 5+kelas). Hanya kotak terbaik untuk class_id yang diambil,
+    jadi NMS tidak diperlukan.
+    """
+
+    def __init__(self, model_path, input_size=640, confidence=0.5, class_id=0, objectness=False):
+        import cv2
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"ONNX model not found: {model_path}")
+        self.cv2 = cv2
+        self.net = cv2.dnn.readNet(model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self.input_size = input_size
+        self.confidence = confidence
+        self.class_id = class_id
+        self.objectness = objectness
+
+    def detect(self, frame):
+        timestamp = time.monotonic()
+        H, W = frame.shape[:2]
+        blob = self.cv2.dnn.blobFromImage(frame, 1 / 255.0, (self.input_size, self.input_size),
+                                          swapRB=True, crop=False)
+        self.net.setInput(blob)
+        out = np.squeeze(self.net.forward(), axis=0)
+
+        if self.objectness:
+            scores = out[:, 5 + self.class_id] * out[:, 4]
+            boxes = out[:, :4]
+        else:
+            scores = out[4 + self.class_id]
+            boxes = out[:4].T
+
+        best = int(np.argmax(scores))
+        if scores[best] < self.confidence:
+            return None
+        cx, cy, w, h = boxes[best]
+        sx, sy = W / self.input_size, H / self.input_size
+        return HandBox((cx - w / 2) * sx, (cy - h / 2) * sy, (cx + w / 2) * sx, (cy + h / 2) * sy,
+                       float(scores[best]), timestamp)
+
+
+class NullDetector:
+    """Mode MediaPipe saja: tidak pernah mengembalikan kotak, frame tidak di-crop"""
+
+    def detect(self, frame):
+        return None
+
+
+class FakeDetector:
+    """Detektor lokal pengganti untuk tes/offline: kotak tetap atau callable"""
+
+    def __init__(self, box=None, confidence=0.9, delay=0.0):
+        self.box = box
+        self.confidence = confidence
+        self.delay = delay
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        box = self.box(frame) if callable(self.box) else self.box
+        if box is None:
+            return None
+        x_min, y_min, x_max, y_max = box
+        return HandBox(x_min, y_min, x_max, y_max, self.confidence, time.monotonic())
+
+
+class AsyncDetector:
+    """Menjalankan detektor di thread sendiri; loop frame tidak pernah menunggu.
+
+    submit() hanya menyimpan frame terbaru (frame lama yang belum sempat
+    diproses dibuang). latest() mengembalikan kotak terakhir selama umurnya,
+    dihitung dari saat frame sumbernya di-submit, tidak melebihi max_age detik.
+    """
+
+    def __init__(self, detector, max_age=0.5):
+        self.detector = detector
+        self.max_age = max_age
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_time = 0.0
+        self._box = None
+        self._thread = None
+        self._running = False
+        self.detections = 0
+        self.last_latency = 0.0
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def submit(self, frame):
+        if not self._running:
+            self.start()
+        with self._cond:
+            self._frame = frame
+            self._frame_time = time.monotonic()
+            self._cond.notify()
+
+    def latest(self):
+        box = self._box
+        if box is None or time.monotonic() - box.timestamp > self.max_age:
+            return None
+        return box
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._frame is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                frame, frame_time = self._frame, self._frame_time
+                self._frame = None
+
+            start = time.monotonic()
+            try:
+                box = self.detector.detect(frame)
+            except Exception as e:
+                print(f"[ERROR] Hand detection failed: {e}")
+                box = None
+            self.last_latency = time.monotonic() - start
+            self.detections += 1
+            # Umur kotak dihitung dari saat frame sumbernya diambil
+            self._box = box._replace(timestamp=frame_time) if box is not None else None
+
+
+class LandmarkTracker:
+    """ROI tangan berikutnya dari landmark MediaPipe frame sebelumnya.
+
+    Selama tracking aktif detektor tidak dipanggil dan MediaPipe hanya
+    memproses crop di sekitar tangan. Tracking dilepas (detektor dipakai
+    lagi) jika tangan tidak ditemukan di ROI, skor MediaPipe turun di bawah
+    min_score, landmark menyentuh tepi ROI (tangan keluar), atau setelah
+    refresh_every frame berturut-turut agar ROI tidak menyimpang.
+    """
+
+    def __init__(self, pad=30, min_score=0.7, edge_margin=0.02, refresh_every=30, enabled=True):
+        self.pad = pad
+        self.min_score = min_score
+        self.edge_margin = edge_margin
+        self.refresh_every = refresh_every
+        self.enabled = enabled
+        self._roi = None
+        self._score = 0.0
+        self._frames = 0
+        self.tracked_frames = 0
+        self.detected_frames = 0
+
+    def next_roi(self, detector, frame):
+        """ROI frame ini -> (roi atau None, confidence, tracked).
+
+        detector adalah AsyncDetector; hanya di-submit jika tidak ada ROI
+        hasil tracking. detector None berarti frame penuh saat tracking lepas.
+        """
+        if self._roi is not None:
+            self.tracked_frames += 1
+            return self._roi, self._score, True
+        self.detected_frames += 1
+        if detector is None:
+            return None, 0.0, False
+        detector.submit(frame)
+        box = detector.latest()
+        if box is None:
+            return None, 0.0, False
+        return pad_box(box, frame.shape, self.pad), box.confidence, False
+
+    def update(self, results, roi, frame_shape):
+        """Perbarui ROI dari hasil hands.process() pada crop roi (None = frame penuh)"""
+        if not self.enabled or not results.multi_hand_landmarks:
+            return self.reset()
+        # Banyak tangan: ROI mencakup semua tangan, skor terendah yang menentukan
+        scores = [h.classification[0].score for h in results.multi_handedness or []]
+        score = min(scores) if scores else 1.0
+        if score < self.min_score or self._frames >= self.refresh_every:
+            return self.reset()
+
+        H, W = frame_shape[:2]
+        x0, y0, x1, y1 = roi if roi is not None else (0, 0, W, H)
+        points = landmark_points(results.multi_hand_landmarks).reshape(-1, 2)
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        if roi is not None:
+            # Landmark di tepi ROI yang bukan tepi frame -> tangan keluar dari ROI
+            m = self.edge_margin
+            if ((lo[0] < m and x0 > 0) or (lo[1] < m and y0 > 0) or
+                    (hi[0] > 1 - m and x1 < W) or (hi[1] > 1 - m and y1 < H)):
+                return self.reset()
+
+        w, h = x1 - x0, y1 - y0
+        box = HandBox(x0 + lo[0] * w, y0 + lo[1] * h, x0 + hi[0] * w, y0 + hi[1] * h, score, time.monotonic())
+        self._roi = pad_box(box, frame_shape, self.pad)
+        self._score = score
+        self._frames += 1
+        return self._roi
+
+    def reset(self):
+        self._roi = None
+        self._frames = 0
+        return None
+
+
+def create_detector(backend, confidence=0.5, roboflow_url=None, roboflow_api_key=None,
+                    roboflow_model_id=None, onnx_model=None, fake_box=None,
+                    fallback_any_class=False):
+    """Buat detektor sesuai nama backend dari konfigurasi"""
+    backend = backend.lower()
+    if backend == 'roboflow':
+        from inference_sdk import InferenceHTTPClient
+        client = InferenceHTTPClient(api_url=roboflow_url, api_key=roboflow_api_key)
+        return RoboflowDetector(client, roboflow_model_id, confidence, fallback_any_class)
+    if backend == 'onnx':
+        return OpenCVDNNDetector(onnx_model, confidence=confidence)
+    if backend == 'mediapipe':
+        return NullDetector()
+    if backend == 'fake':
+        return FakeDetector(box=fake_box, confidence=confidence)
+    raise ValueError(f"Unknown hand detector backend: {backend}")
+
+
+def parse_box(value):
+    """'x_min,y_min,x_max,y_max' -> tuple int, atau None jika kosong"""
+    if not value:
+        return None
+    return tuple(int(v) for v in value.split(','))
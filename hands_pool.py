@@ -0,0 +1,235 @@
+"""Pool proses MediaPipe Hands dengan frame lewat shared memory.
+
+Satu instance Hands di proses utama membuat semua stream mengantre di satu
+graph dan bagian Python-nya di GIL yang sama. HandsPool menjalankan N
+proses worker, masing-masing dengan graph Hands sendiri:
+
+    pool = HandsPool(workers=4, max_hands=2)
+    results = pool.process(rgb)          # pengganti hands.process(rgb), blocking
+    future = pool.submit(rgb)            # asinkron; future.result() -> HandResults
+
+Frame disalin sekali ke slot shared memory yang dibuat sebelum worker
+mulai (worker hanya menerima nomor slot dan bentuk array, bukan frame
+yang di-pickle). Jumlah slot membatasi frame yang sedang diproses: submit()
+menunggu slot kosong, sehingga produsen cepat tidak menumpuk frame.
+Hasil per frame (landmark + handedness, protobuf kecil) kembali lewat satu
+antrian dan dipasangkan ke future-nya; urutan hasil dijaga oleh pemanggil
+dengan menyimpan future sesuai urutan submit.
+
+Dengan static_image_mode=False (mode tracking video) setiap stream
+mendapat worker sendiri: pemanggil menyebut stream-nya secara eksplisit
+(mis. submit(rgb, stream=cam_id)) dan frame stream itu selalu ke worker
+yang sama, jadi state tracking tidak pernah tercampur antar stream. Jika
+semua worker sudah dipegang stream lain, submit() menolak dengan
+RuntimeError; pakai static_image_mode=True bila stream lebih banyak dari
+worker. release_stream(stream) melepas worker saat stream berhenti; graph
+Hands worker itu dibuat ulang sebelum melayani stream berikutnya. Mode
+gambar statis membagi frame ke worker yang paling sedikit bebannya.
+"""
+import atexit
+import itertools
+import multiprocessing
+import queue
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Pengganti objek hasil MediaPipe (tidak bisa di-pickle), atribut yang sama
+HandResults = namedtuple('HandResults', ['multi_hand_landmarks', 'multi_handedness'])
+
+# Ukuran slot default: cukup untuk frame BGR/RGB 1920x1080
+SLOT_BYTES = 1920 * 1080 * 3
+SLOTS_PER_WORKER = 2
+
+
+def _worker_main(tasks, results, slots, max_hands, static_image_mode, min_confidence):
+    """Loop worker: baca frame dari slot, jalankan Hands, kirim landmark"""
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(static_image_mode=static_image_mode, max_num_hands=max_hands,
+                                     min_detection_confidence=min_confidence)
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        seq, slot, shape, dtype, data, reset = task
+        if reset:
+            # Worker pindah ke stream lain: buang state tracking stream lama
+            hands.close()
+            hands = mp.solutions.hands.Hands(static_image_mode=static_image_mode, max_num_hands=max_hands,
+                                             min_detection_confidence=min_confidence)
+        try:
+            image = data if data is not None else np.ndarray(shape, dtype, buffer=slots[slot].buf)
+            r = hands.process(image)
+            del image
+            results.put((seq, HandResults(list(r.multi_hand_landmarks) if r.multi_hand_landmarks else None,
+                                          list(r.multi_handedness) if r.multi_handedness else None), None))
+        except Exception as e:
+            results.put((seq, None, repr(e)))
+    hands.close()
+
+
+class HandsPool:
+    """N proses MediaPipe Hands; lihat docstring modul"""
+
+    def __init__(self, workers, max_hands=1, static_image_mode=False, min_confidence=0.5,
+                 slots=None, slot_bytes=SLOT_BYTES):
+        # fork jika tersedia: worker mewarisi slot tanpa mengimpor ulang __main__.
+        # Buat pool sebelum thread lain berjalan (mis. saat impor modul).
+        methods = multiprocessing.get_all_start_methods()
+        ctx = multiprocessing.get_context('fork' if 'fork' in methods else 'spawn')
+        self.workers = workers
+        self.static_image_mode = static_image_mode
+        self.slot_bytes = slot_bytes
+        self._slots = [shared_memory.SharedMemory(create=True, size=slot_bytes)
+                       for _ in range(slots or SLOTS_PER_WORKER * workers)]
+        self._free = queue.Queue()
+        for slot in range(len(self._slots)):
+            self._free.put(slot)
+
+        self._results = ctx.Queue()
+        self._tasks = [ctx.Queue() for _ in range(workers)]
+        self._procs = [ctx.Process(target=_worker_main, name=f"hands-{i}", daemon=True,
+                                   args=(self._tasks[i], self._results, self._slots,
+                                         max_hands, static_image_mode, min_confidence))
+                       for i in range(workers)]
+        for proc in self._procs:
+            proc.start()
+
+        self._lock = threading.Lock()
+        self._pending = {}  # seq -> (future, slot, worker)
+        self._seq = itertools.count()
+        self._in_flight = [0] * workers
+        self._affinity = {}  # stream -> worker (mode tracking)
+        self._served = [None] * workers  # stream terakhir yang dilayani tiap worker
+        self.processed = 0
+        self.errors = 0
+        self.closed = False
+        self._collector = threading.Thread(target=self._collect, name='hands-pool', daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def _pick_worker(self, stream):
+        """(worker, reset) untuk frame berikutnya dari stream (panggil dengan lock)"""
+        if self.static_image_mode:
+            return min(range(self.workers), key=self._in_flight.__getitem__), False
+        # Mode tracking: satu stream memegang satu worker sampai release_stream()
+        worker = self._affinity.get(stream)
+        if worker is None:
+            taken = set(self._affinity.values())
+            free = [i for i in range(self.workers) if i not in taken]
+            if not free:
+                raise RuntimeError(f"Semua {self.workers} worker MediaPipe sudah dipakai stream lain; "
+                                   f"tambah worker atau pakai static_image_mode=True")
+            worker = free[0]
+            self._affinity[stream] = worker
+        reset = self._served[worker] not in (None, stream)
+        self._served[worker] = stream
+        return worker, reset
+
+    def release_stream(self, stream):
+        """Lepas worker yang dipegang stream (mis. pipeline kamera berhenti)"""
+        with self._lock:
+            self._affinity.pop(stream, None)
+
+    def submit(self, image, bgr=False, stream=None):
+        """Kirim satu frame RGB uint8; Future berisi HandResults.
+
+        bgr=True: image BGR (mis. crop view dari frame kamera), dikonversi
+        ke RGB langsung ke slot shared memory tanpa array perantara.
+        stream: id stream (mis. id kamera) untuk mode tracking; frame tanpa
+        stream dianggap satu stream yang sama.
+        """
+        if self.closed:
+            raise RuntimeError('HandsPool sudah ditutup')
+        slot = self._free.get()
+        data = None
+        if image.nbytes <= self.slot_bytes:
+            dst = np.ndarray(image.shape, image.dtype, buffer=self._slots[slot].buf)
+            if bgr:
+                import cv2
+                cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=dst)
+            else:
+                dst[...] = image
+            del dst
+        else:
+            # Frame lebih besar dari slot: dikirim lewat pickle
+            if bgr:
+                import cv2
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            data = np.ascontiguousarray(image)
+        future = Future()
+        with self._lock:
+            try:
+                worker, reset = self._pick_worker(stream)
+            except RuntimeError:
+                self._free.put(slot)
+                raise
+            seq = next(self._seq)
+            self._pending[seq] = (future, slot, worker)
+            self._in_flight[worker] += 1
+        self._tasks[worker].put((seq, slot, image.shape, image.dtype.str, data, reset))
+        return future
+
+    def process(self, image, bgr=False, timeout=None, stream=None):
+        """Sama dengan Hands.process(image): blocking sampai worker selesai"""
+        return self.submit(image, bgr, stream).result(timeout)
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            seq, results, error = item
+            with self._lock:
+                future, slot, worker = self._pending.pop(seq)
+                self._in_flight[worker] -= 1
+                if error is None:
+                    self.processed += 1
+                else:
+                    self.errors += 1
+            self._free.put(slot)
+            if error is None:
+                future.set_result(results)
+            else:
+                future.set_exception(RuntimeError(f"MediaPipe worker gagal: {error}"))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'alive': sum(proc.is_alive() for proc in self._procs),
+                'in_flight': sum(self._in_flight),
+                'streams': len(self._affinity),
+                'processed': self.processed,
+                'errors': self.errors,
+                'slots': len(self._slots)
+            }
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        for tasks in self._tasks:
+            tasks.put(None)
+        for proc in self._procs:
+            proc.join(timeout=2.0)
+            if proc.is_alive():
+                proc.terminate()
+        self._results.put(None)
+        self._collector.join(timeout=1.0)
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, _, _ in pending:
+            if not future.done():
+                future.set_exception(RuntimeError('HandsPool ditutup'))
+        for shm in self._slots:
+            try:
+                shm.close()
+            except BufferError:
+                pass  # submit() lain masih menulis ke slot (mis. saat interpreter berhenti)
+            shm.unlink()
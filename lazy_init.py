@@ -0,0 +1,127 @@
+"""Inisialisasi malas untuk sumber daya berat + laporan waktu startup.
+
+Mengimpor entry point (app.py, api/app.py, datasets.py) tidak lagi
+langsung memuat mediapipe/cv2, membuat klien Roboflow, MediaPipe Hands
+atau membuka kamera. Setiap sumber daya dibungkus dan baru dibuat saat
+pertama dipakai:
+
+    cv2 = LazyModule('cv2', startup)         # impor saat atribut pertama diakses
+    camera = Lazy('camera', lambda: cv2.VideoCapture(0), startup)
+    camera.get()                             # dibuat sekali, thread-safe
+
+StartupReport mencatat lama setiap langkah (eager saat impor modul, lazy
+saat pertama dipakai) sehingga biaya cold start bisa dilihat lewat
+/api/startup atau dicetak oleh CLI.
+"""
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupReport:
+    """Lama (ms) setiap langkah inisialisasi, diukur sejak report dibuat"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.steps = []
+        self.ready_ms = None
+
+    def _elapsed_ms(self):
+        return round((time.perf_counter() - self._start) * 1000, 1)
+
+    @contextmanager
+    def step(self, name, lazy=False):
+        """Catat lama blok; langkah di dalam langkah lain diberi depth > 0"""
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start = time.perf_counter()
+        at_ms = self._elapsed_ms()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            with self._lock:
+                self.steps.append({
+                    'name': name,
+                    'lazy': lazy,
+                    'depth': depth,
+                    'at_ms': at_ms,
+                    'ms': round((time.perf_counter() - start) * 1000, 1)
+                })
+
+    def ready(self):
+        """Tandai modul selesai diimpor; kembalikan lama startup (ms)"""
+        self.ready_ms = self._elapsed_ms()
+        return self.ready_ms
+
+    def stats(self):
+        with self._lock:
+            steps = list(self.steps)
+        return {
+            'ready_ms': self.ready_ms,
+            'eager_ms': round(sum(s['ms'] for s in steps if not s['lazy'] and s['depth'] == 0), 1),
+            'lazy_ms': round(sum(s['ms'] for s in steps if s['lazy'] and s['depth'] == 0), 1),
+            'steps': steps
+        }
+
+    def summary(self):
+        """Satu baris ringkasan untuk log, mis. 'ready 12.3 ms (model 4.1 ms, ...)'"""
+        eager = ', '.join(f"{s['name']} {s['ms']} ms" for s in self.steps if not s['lazy'] and s['depth'] == 0)
+        return f"ready {self.ready_ms} ms ({eager or '-'})"
+
+
+class Lazy:
+    """Nilai yang dibuat factory() sekali saat get() pertama (thread-safe).
+
+    Jika factory gagal, exception diteruskan ke pemanggil dan get() berikutnya
+    mencoba lagi.
+    """
+
+    def __init__(self, name, factory, report=None):
+        self.name = name
+        self._factory = factory
+        self._report = report
+        self._lock = threading.Lock()
+        self._value = None
+        self.loaded = False
+
+    def get(self):
+        if self.loaded:
+            return self._value
+        with self._lock:
+            if not self.loaded:
+                if self._report is not None:
+                    with self._report.step(self.name, lazy=True):
+                        self._value = self._factory()
+                else:
+                    self._value = self._factory()
+                self.loaded = True
+        return self._value
+
+    def peek(self):
+        """Nilai jika sudah dibuat, None jika belum (tanpa memicu factory)"""
+        return self._value if self.loaded else None
+
+    def reset(self):
+        """Lupakan nilai yang sudah dibuat (get() berikutnya memanggil factory lagi), kembalikan nilai lama"""
+        with self._lock:
+            value = self._value if self.loaded else None
+            self._value = None
+            self.loaded = False
+        return value
+
+
+class LazyModule(Lazy):
+    """Modul yang baru diimpor saat atributnya pertama diakses"""
+
+    def __init__(self, module_name, report=None):
+        super().__init__(f"import {module_name}", lambda: importlib.import_module(module_name), report)
+
+    def __getattr__(self, attr):
+        # Hanya dipanggil untuk atribut yang tidak ada di objek Lazy sendiri
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.get(), attr)
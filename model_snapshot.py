@@ -0,0 +1,102 @@
+"""Model FuzzyART bersama antar thread: snapshot copy-on-write + read-write lock.
+
+Thread inferensi (satu per kamera) dan request HTTP mengklasifikasi dari
+snapshot yang tidak pernah berubah. Pelatihan bekerja pada salinan
+copy-on-write (FuzzyART.fork) dan menerbitkannya dengan satu assignment:
+
+    model = SharedModel(art, gesture_names)
+
+    snap = model.snapshot()                 # tanpa lock, tidak menunggu pelatihan/disk
+    indices, _, _ = snap.art.classify_batch(X)
+    name = snap.names.get(idx)
+
+    with model.edit() as (art, names):      # satu penulis sekaligus (write lock)
+        idx = art.train_single_input(vec)
+        names[idx] = 'ok'
+        model_files.record(idx, art.weights[idx], 'ok')
+    # versi baru terlihat setelah blok selesai; exception membuang salinan
+
+    with model.read() as snap:              # read lock: tidak ada edit selama blok
+        model_files.save(snap.art, snap.names)
+
+Pembaca tidak pernah melihat daftar bobot atau nama yang setengah
+diperbarui. read() dipakai saat operasi butuh model yang tetap terbaru
+sepanjang blok, mis. kompaksi snapshot disk yang tidak boleh berselang
+dengan record() journal dari edit().
+"""
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
+
+# names: dict read-only {id kategori: nama gesture}; version naik setiap edit
+ModelSnapshot = namedtuple('ModelSnapshot', ['art', 'names', 'version'])
+
+
+class RWLock:
+    """Banyak pembaca sekaligus atau satu penulis; penulis yang menunggu didahulukan.
+
+    Tidak reentrant: jangan ambil read() di dalam write() pada thread yang sama.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            self._cond.wait_for(lambda: not self._writer and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class SharedModel:
+    """FuzzyART + nama gesture dengan snapshot immutable; lihat docstring modul"""
+
+    def __init__(self, art, names):
+        self._lock = RWLock()
+        self._snapshot = ModelSnapshot(art, MappingProxyType(dict(names)), 0)
+
+    def snapshot(self):
+        """Snapshot terbaru (atomik, tanpa lock); jangan latih snapshot.art langsung"""
+        return self._snapshot
+
+    @contextmanager
+    def read(self):
+        """Snapshot terbaru yang dijamin tidak diganti edit() selama blok"""
+        with self._lock.read():
+            yield self._snapshot
+
+    @contextmanager
+    def edit(self):
+        """(art, names) salinan copy-on-write; diterbitkan jika blok selesai tanpa exception"""
+        with self._lock.write():
+            current = self._snapshot
+            art, names = current.art.fork(), dict(current.names)
+            yield art, names
+            self._snapshot = ModelSnapshot(art, MappingProxyType(names), current.version + 1)
@@ -0,0 +1,309 @@
+"""Format model Fuzzy ART biner yang bisa di-memory-map.
+
+Satu file berisi header JSON kecil (rho/alpha/beta, dimensi fitur, tabel
+nama) diikuti matriks bobot float32 mentah (kategori x 2*fitur):
+
+    MAGIC (8 byte) | panjang header (uint32 LE) | header JSON | padding | bobot
+
+Bobot dimulai pada offset kelipatan 64 byte sehingga bisa langsung dibuka
+dengan np.memmap tanpa parsing teks. File ditulis ke .tmp lalu di-rename
+secara atomik, jadi pembaca tidak pernah melihat file setengah jadi.
+
+Penyimpanan per sampel memakai JournaledModelStore: perubahan kategori
+ditambahkan ke journal append-only di samping snapshot, lalu digabungkan
+ke snapshot baru oleh thread latar belakang.
+"""
+import atexit
+import json
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+MAGIC = b'FUZZYART'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Di Windows file yang sedang di-mmap tidak bisa diganti lewat os.replace,
+# jadi di sana bobot dibaca langsung ke memori (tetap tanpa parsing teks).
+DEFAULT_MMAP_MODE = None if os.name == 'nt' else 'c'
+
+
+def _data_offset(header_len):
+    offset = len(MAGIC) + 4 + header_len
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_snapshot(path, weights, names, rho, alpha, beta):
+    """Simpan bobot + header ke satu file biner secara atomik"""
+    weights = np.ascontiguousarray(weights, dtype=np.float32)
+    if weights.ndim != 2:
+        weights = weights.reshape(len(weights), -1)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'rho': float(rho),
+        'alpha': float(alpha),
+        'beta': float(beta),
+        'categories': int(weights.shape[0]),
+        'feature_dim': int(weights.shape[1] // 2),
+        'names': {str(int(idx)): name for idx, name in names.items()},
+    }
+    blob = json.dumps(header).encode('utf-8')
+    offset = _data_offset(len(blob))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(blob)))
+        f.write(blob)
+        f.write(b'\0' * (offset - f.tell()))
+        f.write(weights.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path, mmap_mode=DEFAULT_MMAP_MODE):
+    """Buka file biner, kembalikan (weights, names, params) atau None.
+
+    Dengan mmap_mode='c' bobot di-memory-map copy-on-write: pembukaan O(1),
+    halaman dibaca saat dipakai, dan update in-place tidak menyentuh file.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (header_len,) = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(header_len).decode('utf-8'))
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if header.get('version') != FORMAT_VERSION:
+        return None
+
+    shape = (header['categories'], 2 * header['feature_dim'])
+    offset = _data_offset(header_len)
+    if os.path.getsize(path) < offset + 4 * shape[0] * shape[1]:
+        return None
+
+    if shape[0] == 0:
+        weights = np.empty((0, 0), dtype=np.float32)
+    elif mmap_mode is None:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            weights = np.fromfile(f, dtype=np.float32, count=shape[0] * shape[1]).reshape(shape)
+    else:
+        weights = np.memmap(path, dtype=np.float32, mode=mmap_mode, offset=offset, shape=shape)
+
+    names = {int(idx): name for idx, name in header['names'].items()}
+    params = {'rho': header['rho'], 'alpha': header['alpha'], 'beta': header['beta']}
+    return weights, names, params
+
+
+def is_current(path, sources):
+    """True jika snapshot ada dan tidak lebih tua dari file sumber (CSV)"""
+    if not os.path.exists(path):
+        return False
+    mtime = os.path.getmtime(path)
+    return all(not os.path.exists(src) or os.path.getmtime(src) <= mtime for src in sources)
+
+
+# ---------- Journal append-only ----------
+# Setiap record: panjang payload + crc32 (uint32 LE), lalu payload berisi
+# indeks kategori (int32), panjang nama (uint16), nama UTF-8, bobot float32.
+JOURNAL_RECORD = struct.Struct('<II')
+JOURNAL_ENTRY = struct.Struct('<iH')
+
+
+def encode_record(idx, weight, name):
+    name_bytes = name.encode('utf-8')
+    payload = (JOURNAL_ENTRY.pack(int(idx), len(name_bytes)) + name_bytes +
+               np.asarray(weight, dtype=np.float32).tobytes())
+    return JOURNAL_RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_journal(path):
+    """Baca record utuh dari journal -> (records, offset akhir record valid).
+
+    Record terakhir yang terpotong (crash saat menulis) atau crc-nya tidak
+    cocok menghentikan pembacaan; semua record sebelumnya tetap dipakai.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+
+    records = []
+    pos = 0
+    while pos + JOURNAL_RECORD.size <= len(data):
+        length, crc = JOURNAL_RECORD.unpack_from(data, pos)
+        start = pos + JOURNAL_RECORD.size
+        payload = data[start:start + length]
+        if len(payload) < length or length < JOURNAL_ENTRY.size or zlib.crc32(payload) != crc:
+            break
+        idx, name_len = JOURNAL_ENTRY.unpack_from(payload)
+        name = payload[JOURNAL_ENTRY.size:JOURNAL_ENTRY.size + name_len].decode('utf-8')
+        weight = np.frombuffer(payload, dtype=np.float32, offset=JOURNAL_ENTRY.size + name_len)
+        records.append((idx, weight, name))
+        pos = start + length
+    return records, pos
+
+
+def apply_records(weights, names, records):
+    """Terapkan record journal ke (weights, names); record bersifat idempoten"""
+    if not records:
+        return weights
+    dim = len(records[0][1])
+    count = max(len(weights), max(idx for idx, _, _ in records) + 1)
+    if len(weights) == 0:
+        weights = np.zeros((count, dim), dtype=np.float32)
+    elif count > len(weights):
+        weights = np.concatenate((weights, np.zeros((count - len(weights), dim), dtype=np.float32)))
+    for idx, weight, name in records:
+        weights[idx] = weight
+        names[idx] = name
+    return weights
+
+
+class JournaledModelStore:
+    """Snapshot biner + journal append-only untuk penyimpanan per sampel.
+
+    record() hanya menambahkan satu record (indeks, nama, bobot akhir
+    kategori) ke journal, jadi latensi simpan tetap konstan berapa pun
+    besar modelnya. Setiap compact_every record, thread latar belakang
+    memutar journal ke .old lalu menggabungkan snapshot + journal lama
+    menjadi snapshot baru (rename atomik) dan menghapus journal lama.
+    Karena record menyimpan keadaan akhir kategori, replay bersifat
+    idempoten: crash di titik mana pun dipulihkan dengan snapshot +
+    journal lama + journal aktif.
+
+    Record tahan crash setelah di-fsync. sync_interval=0 melakukan fsync
+    di setiap record(); sync_interval > 0 menggabungkan fsync (group
+    commit, sama seperti arsip fitur): record dalam jendela itu bisa hilang
+    saat listrik padam, tetapi journal tetap konsisten sampai record
+    terakhir yang utuh.
+    """
+
+    def __init__(self, path, rho, alpha, beta, compact_every=512, sync_interval=0):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.rotated_path = path + '.journal.old'
+        self.params = {'rho': rho, 'alpha': alpha, 'beta': beta}
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._journal = None
+        self._pending = 0
+        self.sync_interval = sync_interval
+        self._sync_timer = None
+        if sync_interval:
+            atexit.register(self.sync)
+
+    def load(self, mmap_mode=DEFAULT_MMAP_MODE):
+        """Snapshot + replay journal -> (weights, names, params) atau None"""
+        with self._lock:
+            snapshot = load_snapshot(self.path, mmap_mode)
+            rotated, _ = read_journal(self.rotated_path)
+            current, valid = read_journal(self.journal_path)
+            if os.path.exists(self.journal_path) and valid < os.path.getsize(self.journal_path):
+                # Buang ekor record yang terpotong agar append berikutnya valid
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(valid)
+            self._pending = len(rotated) + len(current)
+
+        if snapshot is None and not rotated and not current:
+            return None
+        if snapshot is None:
+            snapshot = (np.empty((0, 0), dtype=np.float32), {}, dict(self.params))
+        weights, names, params = snapshot
+        weights = apply_records(weights, names, rotated + current)
+        return weights, names, params
+
+    def has_journal(self):
+        """True jika ada record journal yang belum digabung ke snapshot"""
+        return any(os.path.exists(path) and os.path.getsize(path) > 0
+                   for path in (self.journal_path, self.rotated_path))
+
+    def record(self, idx, weight, name):
+        """Tambahkan keadaan akhir kategori idx ke journal (O(1))"""
+        data = encode_record(idx, weight, name)
+        with self._lock:
+            if self._journal is None:
+                self._journal = open(self.journal_path, 'ab')
+            self._journal.write(data)
+            self._journal.flush()
+            if not self.sync_interval:
+                os.fsync(self._journal.fileno())
+            elif self._sync_timer is None:
+                # Group commit: record dalam interval ini berbagi satu fsync
+                self._sync_timer = threading.Timer(self.sync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+            self._pending += 1
+            due = self._pending >= self.compact_every
+        if due:
+            self.compact_async()
+
+    def sync(self):
+        """fsync journal aktif sekarang (dipanggil timer group commit dan saat keluar)"""
+        with self._lock:
+            self._sync_timer = None
+            if self._journal is not None:
+                os.fsync(self._journal.fileno())
+
+    def compact(self, weights, names, rho, alpha, beta):
+        """Tulis snapshot dari keadaan model di memori dan kosongkan journal.
+
+        Pemanggil harus menahan lock yang juga melindungi record(), agar
+        tidak ada record yang masuk di antara snapshot dan pengosongan.
+        """
+        with self._compact_lock:
+            with self._lock:
+                save_snapshot(self.path, weights, names, rho, alpha, beta)
+                self._close_journal()
+                for path in (self.journal_path, self.rotated_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._pending = 0
+
+    def compact_async(self):
+        """Mulai kompaksi latar belakang jika belum ada yang berjalan"""
+        if not self._compact_lock.acquire(blocking=False):
+            return None
+        thread = threading.Thread(target=self._compact_rotated, daemon=True)
+        thread.start()
+        return thread
+
+    def _compact_rotated(self):
+        try:
+            with self._lock:
+                # Journal .old sisa crash sebelumnya digabung lebih dulu
+                if not os.path.exists(self.rotated_path) and os.path.exists(self.journal_path):
+                    self._close_journal()
+                    os.replace(self.journal_path, self.rotated_path)
+                    self._pending = 0
+
+            snapshot = load_snapshot(self.path, mmap_mode=None)
+            if snapshot is None:
+                snapshot = (np.empty((0, 0), dtype=np.float32), {}, dict(self.params))
+            weights, names, params = snapshot
+            records, _ = read_journal(self.rotated_path)
+            weights = apply_records(weights, names, records)
+            save_snapshot(self.path, weights, names, **params)
+            if os.path.exists(self.rotated_path):
+                os.remove(self.rotated_path)
+        except Exception as e:
+            print(f"[ERROR] Kompaksi model gagal: {e}")
+        finally:
+            self._compact_lock.release()
+
+    def _close_journal(self):
+        if self._journal is not None:
+            # Journal yang diputar ke .old harus utuh di disk sebelum snapshot baru ditulis
+            os.fsync(self._journal.fileno())
+            self._journal.close()
+            self._journal = None
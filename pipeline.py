@@ -0,0 +1,314 @@
+"""Pipeline capture bertahap: satu thread per stage, antrian terbatas.
+
+    kamera -> [capture] -> q -> [stage 1] -> q -> [stage 2] -> ... -> output
+
+Thread capture terus membaca kamera dan hanya menyimpan frame terbaru.
+Setiap antrian punya kapasitas tetap; jika penuh, item tertua dibuang
+(latest-frame-wins). Stage yang lambat hanya menambah latensi, tidak
+pernah menurunkan laju capture atau menumpuk frame basi. Setiap stage
+mencatat throughput, latensi, kedalaman antrian dan jumlah frame dibuang.
+
+Untuk banyak konsumen (klien /video_feed) output pipeline bisa berupa
+Broadcast: satu loop inferensi, setiap klien hanya mengambil JPEG terbaru.
+
+Dengan FrameRing (frame_ring.py) capture menulis frame langsung ke slot
+shared memory yang dipakai ulang; stage hilir menerima view, bukan salinan.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class LatestQueue:
+    """Antrian terbatas; put() pada antrian penuh membuang item tertua"""
+
+    def __init__(self, maxsize=1):
+        self.maxsize = maxsize
+        self._items = deque()
+        self._cond = threading.Condition()
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Ambil item berikutnya; None jika timeout atau antrian sudah ditutup"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self.closed, timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {'queue_depth': len(self._items), 'dropped': self.dropped}
+
+
+class Broadcast:
+    """Buffer item terbaru + nomor urut untuk banyak pelanggan.
+
+    put() menimpa item lama dan membangunkan semua pelanggan. Pelanggan
+    menunggu nomor urut yang lebih baru dari yang terakhir dilihatnya,
+    jadi pelanggan lambat hanya melewatkan frame tanpa memperlambat
+    pipeline, dan item yang sama dibagikan tanpa disalin.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self.seq = 0
+        self.closed = False
+        self.subscribers = 0
+
+    def put(self, item):
+        with self._cond:
+            self._item = item
+            self.seq += 1
+            self._cond.notify_all()
+
+    def wait(self, last_seq=0, timeout=None):
+        """(seq, item) terbaru setelah last_seq; item None jika timeout atau ditutup"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > last_seq or self.closed, timeout)
+            if self.seq > last_seq:
+                return self.seq, self._item
+            return last_seq, None
+
+    def latest(self):
+        """(seq, item) terbaru tanpa menunggu"""
+        with self._cond:
+            return self.seq, self._item
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    @contextmanager
+    def subscribe(self):
+        with self._cond:
+            self.subscribers += 1
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def __len__(self):
+        return 1 if self._item is not None else 0
+
+    def stats(self):
+        return {'published': self.seq, 'subscribers': self.subscribers}
+
+
+class StageStats:
+    """Throughput (per detik, jendela 1 detik) dan latensi rata-rata (EMA)"""
+
+    def __init__(self):
+        self.processed = 0
+        self.errors = 0
+        self.fps = 0.0
+        self.latency = 0.0
+        self._window_start = time.monotonic()
+        self._window_count = 0
+
+    def tick(self, latency):
+        self.processed += 1
+        self.latency = latency if self.processed == 1 else 0.9 * self.latency + 0.1 * latency
+        self._window_count += 1
+        now = time.monotonic()
+        if now - self._window_start >= 1.0:
+            self.fps = self._window_count / (now - self._window_start)
+            self._window_start = now
+            self._window_count = 0
+
+
+class Stage:
+    """Thread yang menjalankan fn(item) untuk setiap item dari inbox.
+
+    Hasil selain None diteruskan ke outbox. Jika inbox ditutup dan kosong,
+    stage berhenti dan menutup outbox sehingga penutupan merambat ke hilir.
+    on_stop() (jika ada) dipanggil setelah outbox ditutup.
+    """
+
+    def __init__(self, name, fn, inbox, outbox, on_stop=None):
+        self.name = name
+        self.fn = fn
+        self.inbox = inbox
+        self.outbox = outbox
+        self.on_stop = on_stop
+        self.stats = StageStats()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def _run(self):
+        try:
+            while self._running:
+                item = self.inbox.get(timeout=0.1)
+                if item is None:
+                    if self.inbox.closed:
+                        break
+                    continue
+                start = time.monotonic()
+                try:
+                    result = self.fn(item)
+                except Exception as e:
+                    self.stats.errors += 1
+                    print(f"[ERROR] Stage '{self.name}' failed: {e}")
+                    continue
+                self.stats.tick(time.monotonic() - start)
+                if result is not None:
+                    self.outbox.put(result)
+        finally:
+            self.outbox.close()
+            if self.on_stop is not None:
+                self.on_stop()
+
+
+class CaptureStage(Stage):
+    """Sumber pipeline: membaca kamera secepat mungkin ke antrian berikutnya.
+
+    Tanpa ring, transform(frame) mengembalikan frame baru. Dengan ring,
+    transform(frame, dst) menulis ke slot ring dst (mis. cv2.flip(frame, 1,
+    dst=dst)); tanpa transform frame disalin apa adanya ke slot. Jika semua
+    slot masih dipakai hilir, frame dibuang (ring.stats()['exhausted']).
+
+    max_fps membatasi laju frame yang diteruskan: frame di antaranya hanya
+    di-grab (tidak di-decode), sehingga buffer kamera tetap segar dan setiap
+    kamera mendapat laju yang bisa diprediksi walau banyak kamera berbagi CPU.
+
+    release=True melepas kamera dari thread capture sendiri saat berhenti,
+    sehingga release() tidak pernah berjalan bersamaan dengan read().
+    """
+
+    def __init__(self, cap, outbox, transform=None, name='capture', ring=None, max_fps=0, release=False):
+        super().__init__(name, transform, None, outbox)
+        self.cap = cap
+        self.ring = ring
+        self.release = release
+        self.interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.skipped = 0
+
+    def _run(self):
+        next_due = 0.0
+        try:
+            while self._running:
+                start = time.monotonic()
+                if start < next_due:
+                    if not self.cap.grab():
+                        print(f"[ERROR] Stage '{self.name}': camera read failed, stopping pipeline")
+                        break
+                    self.skipped += 1
+                    continue
+                if self.interval:
+                    next_due = max(next_due + self.interval, start)
+                success, frame = self.cap.read()
+                if not success:
+                    print(f"[ERROR] Stage '{self.name}': camera read failed, stopping pipeline")
+                    break
+                if self.ring is not None:
+                    dst = self.ring.acquire(frame.shape)
+                    if dst is None:
+                        continue
+                    if self.fn is not None:
+                        self.fn(frame, dst)
+                    else:
+                        dst[...] = frame
+                    frame = dst
+                elif self.fn is not None:
+                    frame = self.fn(frame)
+                self.stats.tick(time.monotonic() - start)
+                self.outbox.put(frame)
+        finally:
+            try:
+                if self.release:
+                    self.cap.release()
+            finally:
+                self.outbox.close()
+            if self.on_stop is not None:
+                self.on_stop()
+
+
+class Pipeline:
+    """Rangkaian CaptureStage + stage pemrosesan yang terhubung LatestQueue.
+
+    stages berisi pasangan (nama, fn). Hasil stage terakhir masuk ke
+    self.output: LatestQueue untuk satu konsumen (output.get()), atau
+    Broadcast jika diberikan sebagai output (output.wait()). ring
+    (FrameRing) membuat capture menulis ke slot shared memory; lihat
+    CaptureStage untuk bentuk transform-nya, max_fps dan release_camera
+    (kamera dilepas saat capture berhenti). on_stop() dipanggil sekali
+    setelah stage terakhir berhenti, baik karena stop() maupun kamera gagal
+    dibaca.
+    """
+
+    def __init__(self, cap, stages, transform=None, queue_size=1, output=None, ring=None, max_fps=0,
+                 on_stop=None, release_camera=False):
+        queues = [LatestQueue(queue_size) for _ in range(len(stages))]
+        queues.append(output if output is not None else LatestQueue(queue_size))
+        self.ring = ring
+        self.stages = [CaptureStage(cap, queues[0], transform, ring=ring, max_fps=max_fps,
+                                    release=release_camera)]
+        for i, (name, fn) in enumerate(stages):
+            self.stages.append(Stage(name, fn, queues[i], queues[i + 1]))
+        self.stages[-1].on_stop = on_stop
+        self.output = queues[-1]
+
+    def start(self):
+        # Hilir dulu agar frame pertama dari kamera langsung punya konsumen
+        for stage in reversed(self.stages):
+            stage.start()
+        return self
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+
+    @property
+    def running(self):
+        return not self.output.closed
+
+    def stats(self):
+        """Statistik per stage: throughput, latensi, antrian masuk dan frame dibuang"""
+        report = []
+        for stage in self.stages:
+            inbox = stage.inbox
+            report.append({
+                'stage': stage.name,
+                'processed': stage.stats.processed,
+                'errors': stage.stats.errors,
+                'fps': round(stage.stats.fps, 1),
+                'latency_ms': round(stage.stats.latency * 1000, 2),
+                'queue_depth': len(inbox) if inbox is not None else 0,
+                'dropped': inbox.dropped if inbox is not None else 0,
+            })
+            if isinstance(stage, CaptureStage):
+                report[-1]['skipped'] = stage.skipped
+        report.append(dict(stage='output', **self.output.stats()))
+        if self.ring is not None:
+            report.append(dict(stage='ring', **self.ring.stats()))
+        return report
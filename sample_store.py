@@ -0,0 +1,327 @@
+"""Log/katalog sampel gesture (SQLite) dengan ekspor Excel on-demand.
+
+Setiap sampel yang disimpan cukup satu INSERT ke SQLite (mode WAL), jadi
+biaya simpan tidak bergantung pada jumlah sampel sebelumnya. File Excel
+baru dibangun saat diminta, memakai workbook write-only openpyxl yang
+menulis baris secara streaming, dan di-cache sampai ada sampel baru.
+
+Tabel gesture_counts dijaga trigger sehingga jumlah sampel per gesture
+dan total dibaca tanpa memindai sampel (pengganti os.listdir atas folder
+gesture_data). Indeks (gesture, timestamp) dan (timestamp) melayani query
+rentang waktu/label dan ekspor massal ke CSV dataset.
+"""
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
+
+EXCEL_HEADERS = ["No", "Gesture Name", "Timestamp", "Confidence", "Features (Sample)"]
+EXCEL_WIDTHS = {'A': 5, 'B': 15, 'C': 20, 'D': 12, 'E': 35}
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# umask proses, dibaca sekali saat impor (os.umask hanya bisa dibaca dengan menggantinya,
+# jadi tidak dilakukan saat thread lain mungkin sedang membuat file)
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+def features_sample(features):
+    """Ringkasan 5 fitur pertama, format sama dengan kolom Excel lama"""
+    if isinstance(features, (list, np.ndarray)):
+        return ', '.join([f"{f:.3f}" for f in features[:5]]) + "..."
+    return str(features)
+
+
+class SampleLog:
+    """Log sampel gesture di SQLite, aman dipakai dari banyak thread."""
+
+    def __init__(self, path, legacy_excel=None, json_dir=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS samples (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                gesture TEXT NOT NULL,
+                timestamp INTEGER NOT NULL,
+                confidence REAL NOT NULL,
+                features BLOB,
+                features_sample TEXT NOT NULL
+            )''')
+        self._conn.executescript('''
+            CREATE INDEX IF NOT EXISTS idx_samples_gesture_time ON samples (gesture, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_samples_time ON samples (timestamp);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS gesture_counts (gesture TEXT PRIMARY KEY, count INTEGER NOT NULL);
+            CREATE TRIGGER IF NOT EXISTS samples_count_insert AFTER INSERT ON samples BEGIN
+                INSERT INTO gesture_counts (gesture, count) VALUES (NEW.gesture, 1)
+                ON CONFLICT (gesture) DO UPDATE SET count = count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS samples_count_delete AFTER DELETE ON samples BEGIN
+                UPDATE gesture_counts SET count = count - 1 WHERE gesture = OLD.gesture;
+            END;
+        ''')
+        if self._get_meta('counts_version') is None:
+            # Database lama (sebelum ada trigger): isi tabel jumlah sekali
+            self._conn.execute('DELETE FROM gesture_counts')
+            self._conn.execute('INSERT INTO gesture_counts (gesture, count) '
+                               'SELECT gesture, COUNT(*) FROM samples GROUP BY gesture')
+            self._set_meta('counts_version', '1')
+        self._conn.commit()
+        self._exported = {}  # path xlsx -> id terakhir yang sudah diekspor
+
+        if legacy_excel and os.path.exists(legacy_excel) and self.count() == 0:
+            self._import_excel(legacy_excel)
+        if json_dir and os.path.isdir(json_dir):
+            key = 'json_indexed:' + os.path.abspath(json_dir)
+            if self._get_meta(key) is None:
+                self._index_json_dir(json_dir)
+                with self._lock:
+                    self._set_meta(key, '1')
+                    self._conn.commit()
+
+    def append(self, gesture_name, features, confidence, timestamp=None):
+        """Tambah satu sampel (timestamp dalam milidetik)"""
+        timestamp = int(timestamp if timestamp is not None else datetime.now().timestamp() * 1000)
+        blob = None
+        if isinstance(features, (list, np.ndarray)):
+            blob = np.asarray(features, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO samples (gesture, timestamp, confidence, features, features_sample) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (gesture_name, timestamp, float(confidence), blob, features_sample(features)))
+            self._conn.commit()
+
+    def count(self, gesture=None):
+        """Jumlah sampel (semua atau satu gesture) dari tabel gesture_counts"""
+        with self._lock:
+            if gesture is None:
+                row = self._conn.execute('SELECT COALESCE(SUM(count), 0) FROM gesture_counts').fetchone()
+            else:
+                row = self._conn.execute('SELECT count FROM gesture_counts WHERE gesture = ?',
+                                         (gesture,)).fetchone()
+        return row[0] if row else 0
+
+    def counts(self):
+        """Jumlah sampel per gesture -> {nama: jumlah}"""
+        with self._lock:
+            rows = self._conn.execute('SELECT gesture, count FROM gesture_counts WHERE count > 0 '
+                                      'ORDER BY gesture').fetchall()
+        return dict(rows)
+
+    def query(self, gesture=None, start=None, end=None, limit=None, offset=0, with_features=False):
+        """Sampel per label dan/atau rentang waktu [start, end] (milidetik), urut waktu.
+
+        Mengembalikan list dict; dengan with_features=True setiap dict berisi
+        'features' (np.float32) atau None untuk baris tanpa fitur (impor Excel).
+        """
+        sql, params = self._range_sql(
+            'SELECT id, gesture, timestamp, confidence' + (', features' if with_features else '') + ' FROM samples',
+            gesture, start, end)
+        sql += ' ORDER BY timestamp, id'
+        if limit is not None:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [int(limit), int(offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        samples = []
+        for row in rows:
+            sample = {'id': row[0], 'gesture': row[1], 'timestamp': row[2], 'confidence': row[3]}
+            if with_features:
+                sample['features'] = np.frombuffer(row[4], dtype=np.float32) if row[4] else None
+            samples.append(sample)
+        return samples
+
+    def export_dataset(self, folder, gesture=None, start=None, end=None):
+        """Ekspor massal fitur ke CSV dataset (satu file per gesture, format datasets.py).
+
+        Baris dibaca streaming lewat koneksi terpisah; sampel tanpa fitur
+        dilewati. Mengembalikan {nama gesture: jumlah baris}.
+        """
+        os.makedirs(folder, exist_ok=True)
+        sql, params = self._range_sql('SELECT gesture, features FROM samples', gesture, start, end)
+        sql += (' AND' if params else ' WHERE') + ' features IS NOT NULL ORDER BY gesture, timestamp, id'
+
+        written = {}
+        conn = sqlite3.connect(self.path)
+        f = writer = current = None
+        try:
+            for name, blob in conn.execute(sql, params):
+                if name != current:
+                    if f is not None:
+                        f.close()
+                    current = name
+                    f = open(os.path.join(folder, f"{name}.csv"), 'w', newline='')
+                    writer = csv.writer(f)
+                    features = np.frombuffer(blob, dtype=np.float32)
+                    writer.writerow([f"f{i}" for i in range(len(features))])
+                    written[name] = 0
+                writer.writerow([f"{v:.6f}" for v in np.frombuffer(blob, dtype=np.float32)])
+                written[name] += 1
+        finally:
+            if f is not None:
+                f.close()
+            conn.close()
+        return written
+
+    def export_excel(self, excel_file):
+        """Bangun file Excel dari log (streaming), lewati jika sudah terbaru"""
+        with self._lock:
+            last_id = self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM samples').fetchone()[0]
+        if os.path.exists(excel_file) and self._exported.get(excel_file) == last_id:
+            return excel_file
+
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Gestures")
+        for col, width in EXCEL_WIDTHS.items():
+            ws.column_dimensions[col].width = width
+
+        center = Alignment(horizontal="center", vertical="center")
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_font = Font(bold=True, color="FFFFFF")
+        header = []
+        for title in EXCEL_HEADERS:
+            cell = WriteOnlyCell(ws, value=title)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = center
+            header.append(cell)
+        ws.append(header)
+
+        # Koneksi terpisah agar pembacaan panjang tidak menahan append()
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute(
+                'SELECT gesture, timestamp, confidence, features_sample FROM samples '
+                'WHERE id <= ? ORDER BY id', (last_id,))
+            for no, (gesture, timestamp, confidence, sample) in enumerate(rows, 1):
+                timestamp_str = datetime.fromtimestamp(timestamp / 1000).strftime(TIMESTAMP_FORMAT)
+                cells = []
+                for value in (no, gesture, timestamp_str, f"{confidence:.2f}"):
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.alignment = center
+                    cells.append(cell)
+                ws.append(cells + [sample])
+        finally:
+            conn.close()
+
+        # Nama sementara unik per panggilan: ekspor bersamaan tidak saling menimpa
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(excel_file)),
+                                         prefix=os.path.basename(excel_file) + '.', suffix='.tmp',
+                                         delete=False) as tmp:
+            tmp_file = tmp.name
+        try:
+            wb.save(tmp_file)
+            # NamedTemporaryFile membuat file 0600; pakai mode default umask seperti open()
+            os.chmod(tmp_file, 0o666 & ~UMASK)
+            os.replace(tmp_file, excel_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+        self._exported[excel_file] = last_id
+        return excel_file
+
+    @staticmethod
+    def _range_sql(select, gesture, start, end):
+        clauses, params = [], []
+        if gesture is not None:
+            clauses.append('gesture = ?')
+            params.append(gesture)
+        if start is not None:
+            clauses.append('timestamp >= ?')
+            params.append(int(start))
+        if end is not None:
+            clauses.append('timestamp <= ?')
+            params.append(int(end))
+        if clauses:
+            select += ' WHERE ' + ' AND '.join(clauses)
+        return select, params
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def _index_json_dir(self, json_dir):
+        """Masukkan sekali file {gesture}_{timestamp}.json lama ke katalog.
+
+        File yang sudah tercatat (timestamp sama) dilewati; baris hasil
+        impor Excel (tanpa fitur, timestamp per detik) dilengkapi fiturnya.
+        """
+        added = 0
+        for entry in os.scandir(json_dir):
+            if not entry.name.endswith('.json'):
+                continue
+            gesture, _, stamp = entry.name[:-len('.json')].rpartition('_')
+            try:
+                with open(entry.path, 'r') as f:
+                    data = json.load(f)
+                gesture = data.get('gesture', gesture)
+                timestamp = int(data.get('timestamp', stamp))
+                features = data.get('features')
+            except (OSError, ValueError, TypeError):
+                continue
+            blob = np.asarray(features, dtype=np.float32).tobytes() if features else None
+
+            with self._lock:
+                if self._conn.execute('SELECT 1 FROM samples WHERE gesture = ? AND timestamp = ?',
+                                      (gesture, timestamp)).fetchone():
+                    continue
+                second = timestamp // 1000 * 1000
+                row = self._conn.execute(
+                    'SELECT id FROM samples WHERE gesture = ? AND timestamp BETWEEN ? AND ? '
+                    'AND features IS NULL LIMIT 1', (gesture, second, second + 999)).fetchone()
+                if row:
+                    self._conn.execute('UPDATE samples SET features = ?, timestamp = ? WHERE id = ?',
+                                       (blob, timestamp, row[0]))
+                else:
+                    self._conn.execute(
+                        'INSERT INTO samples (gesture, timestamp, confidence, features, features_sample) '
+                        'VALUES (?, ?, ?, ?, ?)',
+                        (gesture, timestamp, 0.95, blob, features_sample(features)))
+                    added += 1
+        with self._lock:
+            self._conn.commit()
+        if added:
+            print(f"[INFO] Indexed {added} gesture samples from {json_dir}")
+
+    def _import_excel(self, excel_file):
+        """Impor sekali baris dari gestures_data.xlsx lama agar tidak hilang"""
+        try:
+            from openpyxl import load_workbook
+            wb = load_workbook(excel_file, read_only=True)
+        except Exception as e:
+            print(f"[ERROR] Failed to import legacy Excel: {e}")
+            return
+
+        rows = []
+        for row in wb.active.iter_rows(min_row=2, values_only=True):
+            if not row or row[1] is None:
+                continue
+            try:
+                timestamp = int(datetime.strptime(str(row[2]), TIMESTAMP_FORMAT).timestamp() * 1000)
+                confidence = float(row[3])
+            except (TypeError, ValueError):
+                continue
+            rows.append((str(row[1]), timestamp, confidence, None, str(row[4] or '')))
+        wb.close()
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO samples (gesture, timestamp, confidence, features, features_sample) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+            self._conn.commit()
@@ -0,0 +1,114 @@
+"""Encode JPEG sekali per frame untuk stream MJPEG, dengan profil per klien.
+
+JpegFrame menyimpan satu frame tampilan beserta cache JPEG per profil
+(kualitas, skala): profil yang sama hanya di-encode sekali, berapa pun
+jumlah klien yang memintanya. Kualitas dan skala dibulatkan ke langkah
+tetap agar klien dengan permintaan mirip berbagi hasil encode yang sama.
+Setelah frame berikutnya terbit, release_image() melepas gambar mentah;
+klien yang masih memegang frame lama hanya mendapat JPEG yang sudah di-cache.
+
+AdaptiveProfile menurunkan kualitas (lalu skala) satu klien jika socket-nya
+tersendat, diukur dari lama generator tertahan di yield, dan menaikkannya
+kembali ke profil yang diminta setelah penulisan lancar lagi.
+"""
+import threading
+
+DEFAULT_QUALITY = 80
+MIN_QUALITY = 30
+MAX_QUALITY = 95
+QUALITY_STEP = 10
+MIN_SCALE = 0.25
+SCALE_STEP = 0.05
+
+
+def normalize_profile(quality=DEFAULT_QUALITY, scale=1.0):
+    """Batasi dan bulatkan (kualitas, skala) ke langkah cache"""
+    quality = int(round(min(MAX_QUALITY, max(MIN_QUALITY, quality)) / 5.0) * 5)
+    scale = round(round(min(1.0, max(MIN_SCALE, scale)) / SCALE_STEP) * SCALE_STEP, 2)
+    return quality, scale
+
+
+class JpegFrame:
+    """Frame tampilan + cache JPEG per profil (kualitas, skala)"""
+
+    def __init__(self, image):
+        self.image = image
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def jpeg(self, quality=DEFAULT_QUALITY, scale=1.0):
+        key = normalize_profile(quality, scale)
+        data = self._cache.get(key)
+        if data is not None:
+            return data
+        with self._lock:
+            data = self._cache.get(key)
+            if data is None:
+                import cv2  # diimpor saat encode pertama, bukan saat app diimpor
+                quality, scale = key
+                image = self.image
+                if image is None:
+                    # Gambar mentah sudah dilepas: profil ter-cache yang paling dekat
+                    return min(self._cache.items(),
+                               key=lambda item: abs(item[0][0] - quality) + 100 * abs(item[0][1] - scale))[1]
+                if scale < 1.0:
+                    image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                data = buffer.tobytes()
+                self._cache[key] = data
+        return data
+
+    def release_image(self):
+        """Lepas gambar mentah; panggil setelah setidaknya satu profil di-encode"""
+        with self._lock:
+            if self._cache:
+                self.image = None
+
+    @property
+    def encodes(self):
+        return len(self._cache)
+
+
+class AdaptiveProfile:
+    """Profil stream satu klien yang turun saat socket tersendat.
+
+    record_write() menerima lama penulisan chunk terakhir. Di atas
+    slow_write detik kualitas turun QUALITY_STEP (sampai MIN_QUALITY), lalu
+    skala turun 25%. Setelah recover_after penulisan lancar berturut-turut,
+    skala dulu lalu kualitas naik kembali ke yang diminta klien.
+    """
+
+    def __init__(self, quality=DEFAULT_QUALITY, scale=1.0, slow_write=0.05, recover_after=30, adaptive=True):
+        self.requested = normalize_profile(quality, scale)
+        self.quality, self.scale = self.requested
+        self.slow_write = slow_write
+        self.recover_after = recover_after
+        self.adaptive = adaptive
+        self.downgrades = 0
+        self._fast_writes = 0
+
+    def profile(self):
+        return self.quality, self.scale
+
+    def record_write(self, seconds):
+        if not self.adaptive:
+            return
+        if seconds > self.slow_write:
+            self._fast_writes = 0
+            if self.quality > MIN_QUALITY:
+                self.quality, self.scale = normalize_profile(self.quality - QUALITY_STEP, self.scale)
+                self.downgrades += 1
+            elif self.scale > MIN_SCALE:
+                self.quality, self.scale = normalize_profile(self.quality, self.scale * 0.75)
+                self.downgrades += 1
+            return
+
+        self._fast_writes += 1
+        if self._fast_writes < self.recover_after:
+            return
+        self._fast_writes = 0
+        quality, scale = self.requested
+        if self.scale < scale:
+            self.quality, self.scale = normalize_profile(self.quality, min(scale, self.scale / 0.75))
+        elif self.quality < quality:
+            self.quality, self.scale = normalize_profile(min(quality, self.quality + QUALITY_STEP), self.scale)
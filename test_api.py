@@ -17,7 +17,8 @@ def test_get_gesture():
         print(f"  [OK] Confidence: {data.get('confidence')}")
         print(f"  [OK] Categories: {data.get('categories')}")
         print(f"  [OK] Features length: {len(data.get('features', [])) if data.get('features') else 'None'}")
-        return True
+        print(f"  [OK] Hands: {len(data.get('hands', []))}")
+        return 'hands' in data
     else:
         print(f"  [ERROR] Status code: {response.status_code}")
         return False
@@ -60,6 +61,115 @@ def test_save_gesture():
             print(f"  [ERROR] Response: {response.text}")
         return False
 
+def test_classify_batch():
+    """Test classifying many feature vectors at once"""
+    print("\n[TEST] Testing classify batch endpoint...")
+    
+    batch = np.random.rand(64, 42).tolist()
+    response = requests.post(f"{API_URL}/api/classify_batch", json={'features': batch})
+    
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  [OK] Classified: {data.get('count')} vectors")
+        print(f"  [OK] Recognized: {sum(1 for g in data.get('gesture_ids', []) if g >= 0)}")
+        return data.get('count') == len(batch)
+    else:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+
+def test_classify_batch_rejects_null():
+    """Test that null/NaN features are rejected instead of returning invalid JSON"""
+    print("\n[TEST] Testing classify batch with null features...")
+    
+    batch = np.random.rand(2, 42).tolist()
+    batch[1][5] = None
+    response = requests.post(f"{API_URL}/api/classify_batch", json={'features': batch})
+    
+    print(f"  [OK] Status code: {response.status_code}, {response.json().get('message')}")
+    assert response.status_code == 400
+    return True
+
+def test_gesture_stream():
+    """Test the server-sent gesture event stream"""
+    print("\n[TEST] Testing gesture event stream...")
+    response = requests.get(f"{API_URL}/api/gesture/stream", stream=True, timeout=5)
+    if response.status_code != 200:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+    
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith('data: '):
+                data = json.loads(line[len('data: '):])
+                print(f"  [OK] Gesture: {data.get('gesture')}")
+                print(f"  [OK] Saved gestures: {data.get('saved_gestures')}")
+                return 'gesture' in data
+    finally:
+        response.close()
+    return False
+
+def test_pipeline_stats():
+    """Test per-stage pipeline statistics"""
+    print("\n[TEST] Testing pipeline stats endpoint...")
+    response = requests.get(f"{API_URL}/api/pipeline/stats")
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  [OK] Running: {data.get('running')}")
+        for stage in data.get('stages', []):
+            print(f"      - {stage['stage']}: " + ' '.join(f"{k}={v}" for k, v in stage.items() if k != 'stage'))
+        return data.get('status') == 'success'
+    else:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+
+def test_cameras():
+    """Test configured camera list and per-camera gesture endpoint"""
+    print("\n[TEST] Testing cameras endpoint...")
+    response = requests.get(f"{API_URL}/api/cameras")
+    if response.status_code != 200:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+    cameras = response.json().get('cameras', [])
+    print(f"  [OK] Found {len(cameras)} cameras")
+    for cam in cameras:
+        print(f"      - {cam['id']}: {cam['source']} (running: {cam['running']}, {cam['capture_fps']} fps)")
+    if not cameras:
+        return False
+    response = requests.get(f"{API_URL}/api/gesture/{cameras[-1]['id']}")
+    if response.status_code == 200:
+        print(f"  [OK] Camera {cameras[-1]['id']}: {response.json().get('gesture')}")
+        return response.json().get('camera') == cameras[-1]['id']
+    else:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+
+def test_model_stats():
+    """Test vigilance search statistics"""
+    print("\n[TEST] Testing model stats endpoint...")
+    response = requests.get(f"{API_URL}/api/model/stats")
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  [OK] Categories: {data.get('categories')} (indexed: {data.get('indexed')})")
+        print(f"  [OK] Searches: {data.get('searches')}, mean examined: {data.get('mean_examined')}")
+        return data.get('status') == 'success'
+    else:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+
+def test_startup():
+    """Test startup time report"""
+    print("\n[TEST] Testing startup report endpoint...")
+    response = requests.get(f"{API_URL}/api/startup")
+    if response.status_code == 200:
+        data = response.json()
+        print(f"  [OK] Ready in {data.get('ready_ms')} ms (lazy so far: {data.get('lazy_ms')} ms)")
+        for step in data.get('steps', []):
+            print(f"      - {step['name']}: {step['ms']} ms{' (lazy)' if step['lazy'] else ''}")
+        return data.get('status') == 'success'
+    else:
+        print(f"  [ERROR] Status code: {response.status_code}")
+        return False
+
 def test_list_gestures():
     """Test listing all saved gestures"""
     print("\n[TEST] Listing all saved gestures...")
@@ -95,6 +205,13 @@ if __name__ == "__main__":
     # Run tests
     test_get_gesture()
     test_save_gesture()
+    test_classify_batch()
+    test_classify_batch_rejects_null()
+    test_gesture_stream()
+    test_pipeline_stats()
+    test_cameras()
+    test_model_stats()
+    test_startup()
     test_list_gestures()
     test_save_model()
     
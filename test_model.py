@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+"""Test model dan penyimpanan in-process: FuzzyART (snapshot copy-on-write, pelatihan massal, statistik pencarian, journal), arsip fitur"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+import datasets
+import fuzzy_art
+from feature_archive import INDEX_DTYPE, FeatureArchive, migrate_csv
+from fuzzy_art import FuzzyART, ModelFiles
+from model_snapshot import SharedModel
+import model_store
+from model_store import JournaledModelStore
+
+
+def make_art(categories=200, reserve=4096, features=63, seed=0):
+    """Model dengan `categories` kategori acak dan kapasitas buffer `reserve` baris"""
+    rng = np.random.default_rng(seed)
+    art = FuzzyART(rho=0.99)
+    for x in rng.random((categories, features), dtype=np.float32):
+        art.add_category(art.complement_coding(x))
+    art._reserve(reserve, 2 * features)
+    return art
+
+
+def test_edit_keeps_parent_snapshot():
+    """Edit baris lama tidak mengubah snapshot lama dan hanya menyalin baris terpakai"""
+    model = SharedModel(make_art(), {0: 'ok'})
+    before = model.snapshot()
+    weights = before.art.weights.copy()
+    norms = before.art._norms[:before.art._count].copy()
+
+    with model.edit() as (art, names):
+        # Kategori baru: buffer lama tetap dipakai bersama
+        art.add_category(np.full(weights.shape[1], 0.5, dtype=np.float32))
+        assert np.shares_memory(art._weights, before.art._weights)
+        # Ubah kategori lama: baris terpakai disalin, kapasitas cadangan tidak
+        art.update_category(0, np.zeros(weights.shape[1], dtype=np.float32))
+        names[0] = 'diubah'
+        assert not np.shares_memory(art._weights, before.art._weights)
+        assert len(art._weights) < len(before.art._weights) // 4
+
+    after = model.snapshot()
+    assert after.version == before.version + 1
+    assert after.art.weights[0].sum() == 0 and after.names[0] == 'diubah'
+    assert len(after.art.weights) == len(weights) + 1
+    # Snapshot lama tetap utuh
+    assert np.array_equal(before.art.weights, weights)
+    assert np.array_equal(before.art._norms[:before.art._count], norms)
+    assert before.names[0] == 'ok' and len(before.art.weights) == len(weights)
+
+
+def test_search_stats_count_every_search():
+    """train_batch dan classify dihitung di candidates(), dengan dan tanpa indeks"""
+    rng = np.random.default_rng(1)
+    for categories in (200, 9000):
+        art = make_art(categories, reserve=categories)
+        assert (art._index is not None) == (categories >= 8192)
+        X = rng.random((20, 63), dtype=np.float32)
+        art.train_batch(X)
+        assert art.search_stats()['searches'] == 20
+        for x in X:
+            art.classify(x)
+        stats = art.search_stats()
+        assert stats['searches'] == 40 and stats['mean_examined'] > 0
+
+
+def test_index_matches_full_scan():
+    """Dengan indeks kategori, classify/classify_batch/train_single_input sama dengan scan penuh"""
+    rng = np.random.default_rng(4)
+    min_categories = fuzzy_art.MIN_CATEGORIES
+
+    def lockstep(fn):
+        """fn(model) pada model berindeks dan model scan penuh, hasil keduanya"""
+        results = []
+        for model, threshold in ((indexed, 64), (full, 1 << 30)):
+            fuzzy_art.MIN_CATEGORIES = threshold
+            results.append(fn(model))
+        return results
+
+    def check(queries):
+        a, b = lockstep(lambda m: [m.classify(x) for x in queries])
+        assert a == b
+        a, b = lockstep(lambda m: m.classify_batch(queries))
+        assert all(np.array_equal(u, v) for u, v in zip(a, b))
+        assert np.array_equal(a[0], [indexed.classify(x) for x in queries])
+
+    # Sebagian kategori duplikat agar ada seri choice T
+    centers = rng.random((300, 8), dtype=np.float32)
+    centers[::10] = centers[1::10]
+    indexed, full = FuzzyART(rho=0.85), FuzzyART(rho=0.85)
+    try:
+        lockstep(lambda m: [m.add_category(m.complement_coding(x)) for x in centers])
+        assert indexed._index is not None and full._index is None
+        queries = np.concatenate((centers[:40], rng.random((60, 8), dtype=np.float32)))
+        check(queries)
+
+        # Ekor baru di luar indeks, lalu cukup banyak kategori untuk membangun ulang indeks
+        sizes = []
+        for added in (20, 400):
+            new = rng.random((added, 8), dtype=np.float32)
+            lockstep(lambda m: [m.add_category(m.complement_coding(x)) for x in new])
+            sizes.append(indexed._index.size)
+            check(queries)
+        assert sizes[0] < indexed._count and sizes[1] > sizes[0]
+
+        X = rng.random((200, 8), dtype=np.float32)
+        X[::4] = centers[:50]
+        a, b = lockstep(lambda m: [m.train_single_input(x) for x in X])
+        assert a == b and np.array_equal(indexed.weights, full.weights)
+        check(queries)
+    finally:
+        fuzzy_art.MIN_CATEGORIES = min_categories
+
+
+def test_train_batch_matches_sequential():
+    """train_batch dan train_datasets(bulk=True) identik dengan train_single_input, termasuk seri T"""
+    rng = np.random.default_rng(2)
+    # Nilai terkuantisasi: banyak kategori dengan choice T yang persis sama
+    X = rng.integers(0, 3, (400, 6)).astype(np.float32) / 2
+    sequential = FuzzyART(rho=0.6, beta=0.5)
+    ties = 0
+    for x in X:
+        if sequential._count:
+            T, match = sequential.activations(sequential.complement_coding(x))
+            passing = T[match >= sequential.rho]
+            ties += int(np.count_nonzero(passing == passing.max(initial=-1)) > 1)
+        sequential.train_single_input(x)
+    assert ties > 0
+
+    batch = FuzzyART(rho=0.6, beta=0.5)
+    batch.train_batch(X[:150])
+    batch.train_batch(X[150:])
+    assert np.array_equal(batch.weights, sequential.weights)
+
+    # Jalur CSV: blok kecil agar batas blok jatuh di tengah file
+    folder = tempfile.mkdtemp(prefix='handgesture-datasets-')
+    for label, rows in (('ok', X[:250]), ('victory', X[250:])):
+        with open(os.path.join(folder, f"{label}.csv"), 'w') as f:
+            f.write(','.join(f"f{i}" for i in range(6)) + '\n')
+            f.writelines(','.join(str(v) for v in row) + '\n' for row in rows)
+    chunk_rows = datasets.TRAIN_CHUNK_ROWS
+    datasets.TRAIN_CHUNK_ROWS = 64
+    try:
+        models = []
+        for bulk in (True, False):
+            art, names = FuzzyART(rho=0.6, beta=0.5), {}
+            datasets.train_datasets(art, names, [folder], bulk=bulk)
+            models.append((art, names))
+    finally:
+        datasets.TRAIN_CHUNK_ROWS = chunk_rows
+    (bulk_art, bulk_names), (row_art, row_names) = models
+    assert np.array_equal(bulk_art.weights, row_art.weights)
+    assert bulk_names == row_names
+
+
+def test_load_keeps_journal_when_csv_is_newer():
+    """CSV yang lebih baru dari snapshot tidak boleh membuang pembaruan di journal"""
+    os.chdir(tempfile.mkdtemp(prefix='handgesture-model-'))
+
+    def model_files():
+        return ModelFiles('model.bin', 'weights.csv', 'names.csv')
+
+    art = make_art(5, reserve=5)
+    model_files().save(art, {i: f"g{i}" for i in range(5)})
+    files = model_files()
+    art, names = files.load()
+    idx = art.add_category(np.full(126, 0.5, dtype=np.float32))
+    files.record(idx, art.weights[idx], 'baru')
+    files.journal._close_journal()
+    # CSV disentuh setelah snapshot terakhir (mis. disalin ulang)
+    later = os.path.getmtime('model.bin') + 10
+    for path in ('weights.csv', 'names.csv'):
+        os.utime(path, (later, later))
+
+    art, names = model_files().load()
+    assert len(art.weights) == 6 and names[5] == 'baru'
+
+    # Tanpa journal, CSV yang lebih baru tetap diimpor
+    files = model_files()
+    files.save_csv(make_art(3, reserve=3), {0: 'csv'})
+    files.save_binary(make_art(7, reserve=7), {})
+    later = os.path.getmtime('model.bin') + 10
+    for path in ('weights.csv', 'names.csv'):
+        os.utime(path, (later, later))
+    art, names = model_files().load()
+    assert len(art.weights) == 3 and names == {0: 'csv'}
+
+
+def count_fsyncs(fn):
+    """Jalankan fn() dan kembalikan jumlah panggilan os.fsync selama itu"""
+    fsync, calls = os.fsync, []
+    os.fsync = lambda fd: (calls.append(fd), fsync(fd))
+    try:
+        fn()
+    finally:
+        os.fsync = fsync
+    return len(calls)
+
+
+def test_journal_recovers_after_crash():
+    """Snapshot + journal .old + journal aktif dipulihkan; ekor record terpotong dibuang"""
+    os.chdir(tempfile.mkdtemp(prefix='handgesture-journal-'))
+    rows = np.eye(4, dtype=np.float32)
+    store = JournaledModelStore('model.bin', 0.9, 0.001, 1.0)
+    store.compact(rows[:2], {0: 'a', 1: 'b'}, 0.9, 0.001, 1.0)
+    assert count_fsyncs(lambda: store.record(1, rows[3], 'b2')) == 1
+    # Crash di tengah kompaksi latar belakang: journal sudah diputar ke .old
+    store._close_journal()
+    os.replace(store.journal_path, store.rotated_path)
+    store.record(2, rows[2], 'c')
+    store._close_journal()
+    # Crash saat menulis record berikutnya: hanya sebagian yang sampai ke disk
+    partial = model_store.encode_record(3, rows[0], 'd')
+    with open(store.journal_path, 'ab') as f:
+        f.write(partial[:len(partial) // 2])
+
+    store = JournaledModelStore('model.bin', 0.9, 0.001, 1.0)
+    weights, names, _ = store.load()
+    assert names == {0: 'a', 1: 'b2', 2: 'c'}
+    assert np.array_equal(weights, rows[[0, 3, 2]])
+    # Ekor terpotong dipangkas, record baru setelahnya tetap terbaca
+    store.record(3, rows[1], 'd')
+    store._close_journal()
+    weights, names, _ = JournaledModelStore('model.bin', 0.9, 0.001, 1.0).load()
+    assert names[3] == 'd' and np.array_equal(weights[3], rows[1])
+
+    # Rotasi: kompaksi pertama menggabungkan sisa .old, yang kedua memutar journal aktif
+    store.compact_async().join()
+    assert not os.path.exists(store.rotated_path) and os.path.exists(store.journal_path)
+    store.compact_async().join()
+    assert not os.path.exists(store.journal_path) and not os.path.exists(store.rotated_path)
+    snapshot, snap_names, _ = model_store.load_snapshot('model.bin', mmap_mode=None)
+    assert snap_names == names and np.array_equal(snapshot, weights)
+
+
+def test_journal_group_commit():
+    """sync_interval menggabungkan fsync banyak record menjadi satu"""
+    os.chdir(tempfile.mkdtemp(prefix='handgesture-journal-'))
+    store = JournaledModelStore('model.bin', 0.9, 0.001, 1.0, sync_interval=0.2)
+
+    def record_many():
+        for i in range(20):
+            store.record(i, np.full(4, i / 20, dtype=np.float32), f"g{i}")
+        time.sleep(0.6)
+
+    assert count_fsyncs(record_many) == 1
+    _, names, _ = JournaledModelStore('model.bin', 0.9, 0.001, 1.0).load()
+    assert len(names) == 20
+
+
+def test_load_defers_norms_and_index():
+    """Muat snapshot mmap tidak menghitung norma/indeks; pencarian pertama menghitungnya"""
+    os.chdir(tempfile.mkdtemp(prefix='handgesture-model-'))
+    source = make_art(9000, reserve=9000)
+    files = ModelFiles('model.bin', 'weights.csv', 'names.csv')
+    files.save_binary(source, {})
+    art, _ = ModelFiles('model.bin', 'weights.csv', 'names.csv').load()
+    assert isinstance(art._weights.base, np.memmap)
+    assert art._norm_cache is None and art._index_value is None
+
+    X = np.random.default_rng(3).random((10, 63), dtype=np.float32)
+    assert [art.classify(x) for x in X] == [source.classify(x) for x in X]
+    assert art._index is not None
+    assert np.array_equal(art._norms[:art._count], source._norms[:source._count])
+
+
+def test_archive_truncates_to_consistent_prefix():
+    """Segmen yang terpotong saat crash dibaca sampai prefix konsistennya, tidak dibuang"""
+    path = tempfile.mkdtemp(prefix='handgesture-archive-')
+    archive = FeatureArchive(path, dim=4)
+    archive.append_many('ok', np.ones((3, 4)))
+    # Writer lain belum flush: fitur dan sidecar ada di buffer, belum di .idx
+    archive.append_many('victory', np.zeros((2, 4)), flush=False)
+    assert archive.count() == 3
+    archive.close()
+    X, labels, _ = archive.load()
+    assert len(X) == 5 and labels.tolist() == ['ok'] * 3 + ['victory'] * 2
+
+    # Crash: baris .idx sudah menyebut label yang belum sampai ke .labels,
+    # ditambah record fitur setengah jadi
+    base = os.path.join(path, 'seg_000000')
+    with open(base + '.labels', 'w') as f:
+        f.write('ok\n')
+    with open(base + '.f32', 'ab') as f:
+        f.write(b'\0' * 6)
+    X, labels, _ = FeatureArchive(path).load()
+    assert len(X) == 3 and labels.tolist() == ['ok'] * 3
+    assert os.path.getsize(base + '.idx') == 5 * INDEX_DTYPE.itemsize
+
+
+def test_archive_group_commit():
+    """append(flush=False) dengan flush_interval: banyak sampel, satu kali fsync per file"""
+    archive = FeatureArchive(tempfile.mkdtemp(prefix='handgesture-archive-'), dim=4, flush_interval=0.2)
+    fsync, calls = os.fsync, []
+    os.fsync = lambda fd: (calls.append(fd), fsync(fd))
+    try:
+        for i in range(20):
+            archive.append('ok', np.full(4, i / 20), flush=False)
+        assert archive.count() == 0 and not calls
+        time.sleep(0.6)
+        assert archive.count() == 20 and len(calls) == 3
+    finally:
+        os.fsync = fsync
+        archive.close()
+
+
+def test_migrate_csv_resumes_only_appended_files():
+    """CSV yang hanya bertambah dilanjutkan; CSV yang ditulis ulang (walau lebih besar) diimpor ulang"""
+    folder = tempfile.mkdtemp(prefix='handgesture-csv-')
+    archive = FeatureArchive(os.path.join(folder, 'archive'), dim=2)
+    csv_path = os.path.join(folder, 'ok.csv')
+
+    def write(rows, mode='w', mtime=None):
+        with open(csv_path, mode) as f:
+            if mode == 'w':
+                f.write('a,b\n')
+            f.writelines(f"{a},{b}\n" for a, b in rows)
+        os.utime(csv_path, (mtime, mtime))
+
+    write([(0.1, 0.1), (0.2, 0.2)], mtime=1000)
+    assert migrate_csv(archive, [folder]) == 2
+    write([(0.3, 0.3)], mode='a', mtime=2000)
+    assert migrate_csv(archive, [folder]) == 1
+    assert migrate_csv(archive, [folder]) == 0
+    # Ditulis ulang: baris awal berubah dan file jadi lebih besar
+    write([(0.9, 0.9), (0.8, 0.8), (0.7, 0.7), (0.6, 0.6)], mtime=3000)
+    assert migrate_csv(archive, [folder]) == 4
+    X, _, _ = archive.load()
+    assert np.allclose(X[:, 0], [0.1, 0.2, 0.3, 0.9, 0.8, 0.7, 0.6])
+
+
+if __name__ == '__main__':
+    test_edit_keeps_parent_snapshot()
+    print("[OK] Edits leave parent snapshots unchanged")
+    test_search_stats_count_every_search()
+    print("[OK] Search stats count training and classification")
+    test_index_matches_full_scan()
+    print("[OK] Category index matches a full scan")
+    test_train_batch_matches_sequential()
+    print("[OK] Batch training matches sequential training")
+    test_load_keeps_journal_when_csv_is_newer()
+    print("[OK] Journal survives a newer CSV")
+    test_journal_recovers_after_crash()
+    print("[OK] Journal recovers from crashes, torn tails and rotation")
+    test_journal_group_commit()
+    print("[OK] Journal records share one fsync per interval")
+    test_load_defers_norms_and_index()
+    print("[OK] Loading a snapshot defers norms and index")
+    test_archive_truncates_to_consistent_prefix()
+    print("[OK] Archive reads the consistent prefix of a torn segment")
+    test_archive_group_commit()
+    print("[OK] Archive appends share one flush per interval")
+    test_migrate_csv_resumes_only_appended_files()
+    print("[OK] CSV migration re-imports rewritten files")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Test log sampel in-process: katalog SQLite (jumlah per gesture), ekspor dataset CSV dan Excel"""
+
+import os
+import sqlite3
+import stat
+import sys
+import tempfile
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+import sample_store
+from feature_archive import iter_csv_chunks
+
+
+def new_log():
+    folder = tempfile.mkdtemp(prefix='handgesture-samples-')
+    return folder, sample_store.SampleLog(os.path.join(folder, 'gestures_log.db'))
+
+
+def assert_counts_match(log):
+    """Tabel gesture_counts (trigger) harus sama dengan COUNT(*) dari samples"""
+    conn = sqlite3.connect(log.path)
+    try:
+        expected = dict(conn.execute('SELECT gesture, COUNT(*) FROM samples GROUP BY gesture'))
+    finally:
+        conn.close()
+    assert log.counts() == expected
+    assert log.count() == sum(expected.values())
+    for gesture in ('ok', 'victory', 'fist'):
+        assert log.count(gesture) == expected.get(gesture, 0)
+
+
+def test_counts_follow_insert_and_delete():
+    """Trigger jumlah tetap konsisten setelah insert, delete, dan buka ulang database"""
+    folder, log = new_log()
+    for i, gesture in enumerate(['ok'] * 3 + ['victory'] * 2 + ['fist']):
+        log.append(gesture, np.full(42, i / 10, dtype=np.float32), 0.9, timestamp=1000 + i)
+    assert_counts_match(log)
+
+    # Hapus dari koneksi lain (mis. pembersihan manual lewat sqlite3)
+    conn = sqlite3.connect(log.path)
+    with conn:
+        conn.execute("DELETE FROM samples WHERE gesture = 'ok' AND timestamp = 1000")
+        conn.execute("DELETE FROM samples WHERE gesture = 'fist'")
+    conn.close()
+    assert_counts_match(log)
+    assert 'fist' not in log.counts() and log.count('ok') == 2
+
+    log.append('fist', np.zeros(42, dtype=np.float32), 0.9)
+    log = sample_store.SampleLog(log.path)
+    assert_counts_match(log)
+    assert log.count() == 5
+
+
+def test_export_dataset_round_trip():
+    """CSV hasil export_dataset dibaca kembali dengan fitur dan urutan yang sama"""
+    folder, log = new_log()
+    rng = np.random.default_rng(0)
+    features = {'ok': rng.random((4, 42), dtype=np.float32), 'victory': rng.random((3, 42), dtype=np.float32)}
+    for i in range(4):
+        for gesture, X in features.items():
+            if i < len(X):
+                log.append(gesture, X[i], 0.9, timestamp=1000 + i)
+    # Sampel tanpa fitur (impor Excel lama) tidak ikut diekspor
+    log.append('ok', 'tanpa fitur', 0.5, timestamp=999)
+
+    out = os.path.join(folder, 'dataset')
+    assert log.export_dataset(out) == {'ok': 4, 'victory': 3}
+    for gesture, X in features.items():
+        blocks = list(iter_csv_chunks(os.path.join(out, f"{gesture}.csv"), 2))
+        assert np.allclose(np.concatenate(blocks), X, atol=1e-6)
+    assert log.export_dataset(out, gesture='victory', start=1001, end=1001) == {'victory': 1}
+
+
+def test_export_excel_round_trip():
+    """Excel hasil ekspor bisa diimpor lagi sebagai log lama (label, waktu per detik, confidence)"""
+    folder, log = new_log()
+    stamps = [1700000000123, 1700000001456, 1700000002789]
+    for stamp, gesture, confidence in zip(stamps, ['ok', 'victory', 'ok'], [0.95, 0.5, 0.75]):
+        log.append(gesture, np.full(42, 0.25, dtype=np.float32), confidence, timestamp=stamp)
+    excel_file = log.export_excel(os.path.join(folder, 'gestures_data.xlsx'))
+
+    from openpyxl import load_workbook
+    wb = load_workbook(excel_file, read_only=True)
+    rows = list(wb.active.iter_rows(values_only=True))
+    wb.close()
+    assert rows[0] == tuple(sample_store.EXCEL_HEADERS)
+    assert [row[0] for row in rows[1:]] == [1, 2, 3]
+    assert rows[1][4] == sample_store.features_sample(np.full(42, 0.25, dtype=np.float32))
+
+    copy_folder = tempfile.mkdtemp(prefix='handgesture-samples-')
+    imported = sample_store.SampleLog(os.path.join(copy_folder, 'gestures_log.db'), legacy_excel=excel_file)
+    assert imported.counts() == log.counts() == {'ok': 2, 'victory': 1}
+    assert [(s['gesture'], s['timestamp'], s['confidence']) for s in imported.query()] == \
+        [(s['gesture'], s['timestamp'] // 1000 * 1000, s['confidence']) for s in log.query()]
+
+
+def test_export_excel_keeps_default_mode():
+    """File Excel hasil ekspor memakai mode default (umask), bukan 0600 file sementara"""
+    folder, log = new_log()
+    log.append('ok', np.zeros(42, dtype=np.float32), 0.9)
+    excel_file = log.export_excel(os.path.join(folder, 'gestures_data.xlsx'))
+    assert stat.S_IMODE(os.stat(excel_file).st_mode) == 0o666 & ~sample_store.UMASK
+    assert [name for name in os.listdir(folder) if name.endswith('.tmp')] == []
+
+
+if __name__ == '__main__':
+    test_counts_follow_insert_and_delete()
+    print("[OK] Gesture counts follow inserts and deletes")
+    test_export_dataset_round_trip()
+    print("[OK] Dataset CSV export round-trips features")
+    test_export_excel_round_trip()
+    print("[OK] Excel export round-trips through the legacy import")
+    test_export_excel_keeps_default_mode()
+    print("[OK] Excel export keeps the default file mode")
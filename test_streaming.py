@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Test stream video in-process: fitur landmark multi-tangan, worker MediaPipe per kamera, klien /video_feed yang macet, pipeline tanpa klien"""
+
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, APP_DIR)
+
+# Satu kamera sintetis, MediaPipe di frame penuh (overlay di setiap frame)
+os.environ.setdefault('CAMERAS', 'fake:640x480@30')
+os.environ.setdefault('HAND_DETECTOR', 'mediapipe')
+os.environ.setdefault('MAX_HANDS', '2')
+os.environ.setdefault('HANDS_WORKERS', '0')
+os.environ.setdefault('PIPELINE_IDLE_TIMEOUT', '1')
+
+
+def fake_hands(points):
+    """Hasil MediaPipe Hands tiruan dari array (tangan x 21 x 2)"""
+    return SimpleNamespace(multi_hand_landmarks=[
+        SimpleNamespace(landmark=[SimpleNamespace(x=float(x), y=float(y), z=0.0) for x, y in hand])
+        for hand in points])
+
+
+def test_multi_hand_feature_layout():
+    """Satu baris 42D per tangan, urutan x0, y0, x1, y1, ... sama dengan ekstraksi lama per landmark"""
+    from fuzzy_art import FuzzyART
+    from hand_detector import extract_all_features, extract_features
+
+    rng = np.random.default_rng(0)
+    # Tangan kedua sebagian di luar [0, 1] setelah digeser ke pergelangan
+    points = np.stack([rng.uniform(0.3, 0.7, (21, 2)), rng.uniform(-0.5, 1.5, (21, 2))])
+    X = extract_all_features(fake_hands(points))
+    assert X.shape == (2, 42) and X.dtype == np.float32
+    for hand, row in zip(points, X):
+        base_x, base_y = hand[0]
+        expected = []
+        for x, y in hand:
+            expected.append(max(0.0, min(1.0, (x - base_x) + 0.5)))
+            expected.append(max(0.0, min(1.0, (y - base_y) + 0.5)))
+        assert np.array_equal(row, np.array(expected, dtype=np.float32))
+    assert X[0, 0] == X[0, 1] == 0.5
+    assert np.array_equal(extract_features(fake_hands(points)), X[0])
+    assert extract_all_features(SimpleNamespace(multi_hand_landmarks=None)) is None
+
+    # Klasifikasi batch per tangan = klasifikasi satu per satu
+    art = FuzzyART(rho=0.9)
+    art.train_single_input(X[1])
+    indices, _, _ = art.classify_batch(X)
+    assert indices.tolist() == [art.classify(x) for x in X] == [-2, 0]
+
+
+def test_hands_pool_worker_per_stream():
+    """Mode tracking: setiap stream memegang worker sendiri, stream berlebih ditolak"""
+    from hands_pool import HandsPool
+
+    # Dibuat sebelum app diimpor (fork sebelum thread pipeline berjalan)
+    pool = HandsPool(2, max_hands=1)
+    blank = np.zeros((64, 64, 3), dtype=np.uint8)
+    try:
+        pool.process(blank, stream='lobby', timeout=60)
+        pool.process(blank, stream='kiosk', timeout=60)
+        assert pool._affinity['lobby'] != pool._affinity['kiosk']
+        try:
+            pool.submit(blank, stream='demo')
+            raise AssertionError('stream ketiga seharusnya ditolak')
+        except RuntimeError:
+            pass
+        assert pool.stats()['in_flight'] == 0
+        pool.release_stream('lobby')
+        pool.process(blank, stream='demo', timeout=60)
+        assert pool.stats()['streams'] == 2
+        assert pool.stats()['errors'] == 0
+    finally:
+        pool.close()
+
+
+def load_app():
+    """Impor app.py dari direktori kerja sementara (file model/sampel tidak menyentuh repo)"""
+    os.chdir(tempfile.mkdtemp(prefix='handgesture-test-'))
+    import app
+    return app
+
+
+def ring_stats(app, cam):
+    return next(s for s in cam.pipeline.stats() if s['stage'] == 'ring')
+
+
+def test_stalled_clients_do_not_pin_ring():
+    """10 generator MJPEG berhenti di yield; capture tetap mendapat slot ring"""
+    app = load_app()
+    cam = app.default_camera
+    clients = [app.generate_frames(cam) for _ in range(10)]
+    for client in clients:
+        # Klien berhenti membaca di frame yang berbeda-beda
+        next(client)
+        time.sleep(0.15)
+    try:
+        time.sleep(1.0)
+        before = ring_stats(app, cam)
+        time.sleep(3.0)
+        after = ring_stats(app, cam)
+        print(f"[INFO] ring: {after}")
+        assert after['in_use'] < after['slots']
+        assert after['exhausted'] == before['exhausted']
+        assert after['acquired'] > before['acquired']
+    finally:
+        for client in clients:
+            client.close()
+
+
+def test_idle_pipeline_stops_and_restarts():
+    """Pipeline tanpa klien berhenti dan melepas kamera; klien berikutnya memulainya lagi"""
+    app = load_app()
+    cam = app.default_camera
+    client = app.generate_frames(cam)
+    next(client)
+    pipeline = cam.pipeline
+    client.close()
+    deadline = time.monotonic() + 10
+    while cam.pipeline is not None and time.monotonic() < deadline:
+        time.sleep(0.2)
+    assert cam.pipeline is None and not pipeline.running
+    assert not cam.camera.loaded and not pipeline.stages[0].cap.isOpened()
+
+    client = app.generate_frames(cam)
+    try:
+        next(client)
+        assert cam.pipeline is not pipeline and cam.pipeline.running and cam.camera.loaded
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    test_multi_hand_feature_layout()
+    print("[OK] Multi-hand features keep the per-landmark layout")
+    test_hands_pool_worker_per_stream()
+    print("[OK] HandsPool keeps one worker per stream")
+    test_stalled_clients_do_not_pin_ring()
+    print("[OK] Stalled clients do not pin ring slots")
+    test_idle_pipeline_stops_and_restarts()
+    print("[OK] Idle pipelines stop and restart on demand")